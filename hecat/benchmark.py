@@ -0,0 +1,603 @@
+"""hecat - synthetic datasets and benchmark suite
+Generate synthetic but realistic data (software/tags/platforms/licenses trees in the awesome-selfhosted-data format,
+an awesome-style markdown list and Shaarli exports) at a given size, and run each importer, processor and exporter
+against it, offline, measuring wall-clock time and peak memory (RSS) of each step.
+
+$ python3 -m hecat.benchmark generate --size 10000 .hecat-benchmark/size-10000
+$ python3 -m hecat.benchmark run --sizes 1000 10000 100000 --output benchmark-results.json
+$ python3 -m hecat.benchmark compare benchmark-baseline.json --threshold 1.2 --max-exponent 1.3
+
+compare runs the suite again with the sizes and modules of a baseline results file (or reads current results from a
+second file), prints time/memory ratios and how the time of each step grows with the size of the data (scaling
+exponent k, time ~ size^k after subtracting hecat startup time), and exits with an error if a step failed, is slower
+or uses more memory than the configured thresholds, or scales worse than --max-exponent.
+
+URLs in the generated data point to a local HTTP server started by the benchmark suite (--port, default 8765), or to
+github.com/gitlab.com for source code URLs, which are excluded from URL checks. Steps are run as separate processes
+so that each measurement includes startup time and peak RSS is not shared between steps.
+Modules which need remote services are benchmarked on the parts that can run offline:
+- processors/software_metadata: all projects already have metadata, with metadata_only_missing: True
+- processors/download_media: all items tagged 'video' already have a video_filename (nothing to download)
+- processors/archive_webpages: items tagged 'archive' are archived from the local HTTP server (requires wget)
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import threading
+import subprocess
+import http.server
+from datetime import date, timedelta
+import ruamel.yaml
+from .utils import to_kebab_case
+
+DATASET_VERSION = 1
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = 1800
+REFERENCE_DATE = date(2026, 1, 1)
+
+WORDS = ['cloud', 'note', 'photo', 'media', 'wiki', 'mail', 'chat', 'task', 'file', 'sync', 'book', 'feed', 'code',
+         'track', 'home', 'git', 'pad', 'board', 'vault', 'stream', 'link', 'shelf', 'desk', 'form', 'poll', 'cast',
+         'music', 'video', 'map', 'budget', 'recipe', 'paste', 'proxy', 'status', 'metric', 'search', 'backup', 'dns']
+VERBS = ['manage', 'share', 'organize', 'host', 'monitor', 'publish', 'archive', 'stream', 'search', 'synchronize']
+OBJECTS = ['documents', 'photos', 'bookmarks', 'notes', 'videos', 'feeds', 'passwords', 'recipes', 'tasks', 'files']
+ADJECTIVES = ['simple', 'fast', 'lightweight', 'modern', 'privacy-friendly', 'extensible', 'minimal', 'full-featured']
+PLATFORMS = ['Python', 'Go', 'Nodejs', 'PHP', 'Java', 'Rust', 'Ruby', 'C', 'C++', 'C#', 'Docker', 'Shell', 'Perl',
+             'Elixir', 'Erlang', 'Haskell', 'Kotlin', 'Scala', 'Dart', 'Deb', 'K8S', 'Lua', 'Nim', 'OCaml', 'Clojure']
+LICENSES = ['MIT', 'Apache-2.0', 'GPL-3.0', 'GPL-2.0', 'AGPL-3.0', 'LGPL-3.0', 'LGPL-2.1', 'BSD-3-Clause',
+            'BSD-2-Clause', 'MPL-2.0', 'ISC', 'Zlib', 'Unlicense', 'CC0-1.0', 'EUPL-1.2', 'Artistic-2.0', 'EPL-2.0',
+            'OSL-3.0', 'WTFPL', 'CECILL-2.1']
+SHAARLI_TAGS = ['doc', 'admin', 'dev', 'linux', 'python', 'network', 'security', 'hardware', 'diy', 'readlater',
+                'science', 'history', 'design', 'privacy', 'selfhosted', 'web', 'database', 'music', 'video', 'archive']
+
+def dump_yaml(data, path):
+    """write data to a YAML file using the fast (C-accelerated when available) safe dumper"""
+    yaml = ruamel.yaml.YAML(typ='safe', pure=False)
+    yaml.default_flow_style = False
+    yaml.allow_unicode = True
+    with open(path, 'w', encoding='utf-8') as yaml_file:
+        yaml.dump(data, yaml_file)
+
+def sentence(rng, max_length=200):
+    """return a random description, starting with an uppercase letter and ending with a period"""
+    text = '{} {} to {} your {} and {}.'.format(
+        rng.choice(['A', 'An']), rng.choice(ADJECTIVES), rng.choice(VERBS), rng.choice(OBJECTS), rng.choice(OBJECTS))
+    return text[:max_length - 1].rstrip('.') + '.'
+
+def generate_licenses():
+    """return a list of licenses"""
+    return [{'identifier': identifier, 'name': identifier + ' License', 'url': 'https://spdx.org/licenses/{}.html'.format(identifier)}
+            for identifier in LICENSES]
+
+def generate_tags(rng, count):
+    """return a list of count tags"""
+    names = ['{} {}'.format(rng.choice(WORDS).capitalize(), index) for index in range(count)]
+    tags = []
+    for name in names:
+        tag = {'name': name, 'description': '[Software](https://en.wikipedia.org/wiki/Software) to {} {}.'.format(rng.choice(VERBS), rng.choice(OBJECTS))}
+        related_tags = rng.sample([other for other in names if other != name], min(2, len(names) - 1))
+        if related_tags:
+            tag['related_tags'] = related_tags
+        if rng.random() < 0.1:
+            tag['external_links'] = [{'title': 'awesome-{}'.format(to_kebab_case(name)), 'url': 'https://github.com/awesome/{}'.format(to_kebab_case(name))}]
+        tags.append(tag)
+    return tags
+
+def generate_software(rng, index, tags, base_url):
+    """return a software item, its primary tag is tags[index % len(tags)] so that all tags have items"""
+    name = '{}{} {}'.format(rng.choice(WORDS).capitalize(), rng.choice(WORDS), index)
+    provider = rng.random()
+    if provider < 0.7:
+        source_code_url = 'https://github.com/{}/{}'.format(rng.choice(WORDS), to_kebab_case(name))
+    elif provider < 0.8:
+        source_code_url = 'https://gitlab.com/{}/{}'.format(rng.choice(WORDS), to_kebab_case(name))
+    else:
+        source_code_url = '{}/git/{}'.format(base_url, index)
+    extra_tags = [tag['name'] for tag in rng.sample(tags, min(rng.randint(0, 2), len(tags)))]
+    software = {
+        'name': name,
+        'website_url': '{}/site/{}'.format(base_url, index),
+        'source_code_url': source_code_url,
+        'description': sentence(rng),
+        'licenses': rng.sample(LICENSES, 2 if rng.random() < 0.1 else 1),
+        'platforms': rng.sample(PLATFORMS, rng.randint(1, 2)),
+        'tags': list(dict.fromkeys([tags[index % len(tags)]['name']] + extra_tags)),
+        'stargazers_count': int(rng.paretovariate(1.2) * 10),
+        'updated_at': (REFERENCE_DATE - timedelta(days=rng.randint(0, 700))).isoformat(),
+        'archived': False,
+        'current_release': {
+            'tag': 'v{}.{}.{}'.format(rng.randint(0, 5), rng.randint(0, 20), rng.randint(0, 10)),
+            'published_at': (REFERENCE_DATE - timedelta(days=rng.randint(0, 900))).isoformat(),
+        },
+        'commit_history': {(REFERENCE_DATE - timedelta(days=30 * month)).strftime('%Y-%m'): rng.randint(0, 80) for month in range(12)},
+    }
+    if rng.random() < 0.3:
+        software['demo_url'] = '{}/{}/{}'.format(base_url, '404' if rng.random() < 0.05 else 'demo', index)
+    if rng.random() < 0.1:
+        software['related_software_url'] = '{}/related/{}'.format(base_url, index)
+    if rng.random() < 0.05:
+        software['depends_3rdparty'] = True
+    return software
+
+def render_awesome_markdown(software_list, tags, licenses):
+    """return an awesome-style markdown list of software_list, in the format read by importers/markdown_awesome"""
+    by_tag = {tag['name']: [] for tag in tags}
+    for software in software_list:
+        links = []
+        if 'demo_url' in software:
+            links.append('[演示]({})'.format(software['demo_url']))
+        links.append('[源码]({})'.format(software['source_code_url']))
+        by_tag[software['tags'][0]].append('- [{}]({}) - {} ({}) `{}` `{}`'.format(
+            software['name'], software['website_url'], software['description'], ', '.join(links),
+            '/'.join(software['licenses']), '/'.join(software['platforms'])))
+    sections = ['# Awesome Benchmark\n\n## 软件\n']
+    for tag in tags:
+        sections.append('### {}\n\n{}\n\n{}\n'.format(tag['name'], tag['description'], '\n'.join(by_tag[tag['name']])))
+    sections.append('## 许可证清单\n\n' + '\n'.join('- `{}` - [{}]({})'.format(
+        license['identifier'], license['name'], license['url']) for license in licenses) + '\n')
+    return '\n'.join(sections)
+
+def generate_shaarli_items(rng, size, base_url):
+    """return a list of size Shaarli API items, newest first"""
+    items = []
+    created = REFERENCE_DATE
+    for index in range(size, 0, -1):
+        created = created - timedelta(minutes=rng.randint(1, 600))
+        timestamp = '{}T12:00:00+02:00'.format(created.isoformat())
+        tags = rng.sample(SHAARLI_TAGS[:-3], rng.randint(1, 4))
+        special = rng.random()
+        if special < 0.03:
+            tags.append('video')
+        elif special < 0.05:
+            tags.append('music')
+        elif special < 0.05 + min(0.01, 500 / size):
+            tags.append('archive')
+        items.append({
+            'created': timestamp,
+            'description': sentence(rng),
+            'id': index,
+            'private': rng.random() < 0.1,
+            'shorturl': '{:06x}'.format(index),
+            'tags': tags,
+            'title': '{} {} {}'.format(rng.choice(VERBS).capitalize(), rng.choice(OBJECTS), index),
+            'updated': timestamp,
+            'url': '{}/page/{}'.format(base_url, index),
+        })
+    return items
+
+def generate_dataset(directory, size, seed=0, base_url='http://127.0.0.1:{}'.format(DEFAULT_PORT)):
+    """generate a synthetic dataset of size software items and size Shaarli items in directory:
+    software/, tags/, platforms/, licenses.yml, markdown/, _static/: awesome-selfhosted-data format
+    README.md: awesome-style markdown list of the same data
+    shaarli.json: Shaarli API export
+    shaarli.yml: the same items, as already processed by download_media (video_filename set for 'video' items)"""
+    rng = random.Random(seed)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    for subdirectory in ['software', 'tags', 'platforms', 'markdown', '_static']:
+        os.makedirs(os.path.join(directory, subdirectory))
+    licenses = generate_licenses()
+    dump_yaml(licenses, os.path.join(directory, 'licenses.yml'))
+    tags = generate_tags(rng, max(10, size // 30))
+    for tag in tags:
+        dump_yaml(tag, os.path.join(directory, 'tags', to_kebab_case(tag['name']) + '.yml'))
+    for platform_name in PLATFORMS:
+        dump_yaml({'name': platform_name, 'description': 'Software written in {}.'.format(platform_name)},
+                  os.path.join(directory, 'platforms', to_kebab_case(platform_name) + '.yml'))
+    software_list = []
+    for index in range(size):
+        software = generate_software(rng, index, tags, base_url)
+        dump_yaml(software, os.path.join(directory, 'software', to_kebab_case(software['name']) + '.yml'))
+        software_list.append(software)
+    with open(os.path.join(directory, 'markdown', 'header.md'), 'w', encoding='utf-8') as header:
+        header.write('# Awesome Benchmark\n\nSynthetic data generated by hecat.benchmark.\n\n')
+    with open(os.path.join(directory, 'markdown', 'footer.md'), 'w', encoding='utf-8') as footer:
+        footer.write('\n## License\n\nCC-BY-SA-4.0\n')
+    with open(os.path.join(directory, 'README.md'), 'w', encoding='utf-8') as readme:
+        readme.write(render_awesome_markdown(software_list, tags, licenses))
+    shaarli_items = generate_shaarli_items(rng, size, base_url)
+    with open(os.path.join(directory, 'shaarli.json'), 'w', encoding='utf-8') as shaarli_json:
+        json.dump(shaarli_items, shaarli_json, indent=4)
+    for item in shaarli_items:
+        if 'video' in item['tags']:
+            item['video_filename'] = 'video/{}.webm'.format(item['id'])
+    dump_yaml(shaarli_items, os.path.join(directory, 'shaarli.yml'))
+    with open(os.path.join(directory, 'benchmark.json'), 'w', encoding='utf-8') as metadata:
+        json.dump({'version': DATASET_VERSION, 'size': size, 'seed': seed, 'base_url': base_url}, metadata)
+    logging.info('generated dataset of size %s in %s', size, directory)
+
+def dataset_matches(directory, size, seed, base_url):
+    """return True if directory contains a dataset generated with the same parameters"""
+    try:
+        with open(os.path.join(directory, 'benchmark.json'), 'r', encoding='utf-8') as metadata:
+            return json.load(metadata) == {'version': DATASET_VERSION, 'size': size, 'seed': seed, 'base_url': base_url}
+    except (OSError, ValueError):
+        return False
+
+class LocalRequestHandler(http.server.BaseHTTPRequestHandler):
+    """answer all requests with a small HTML page, or 404 for paths starting with /404/"""
+    protocol_version = 'HTTP/1.1'
+    body = b'<html><head><title>hecat benchmark</title></head><body><p>ok</p></body></html>'
+
+    def send_page(self, with_body):
+        """send the response headers, and the page if with_body is True"""
+        status = 404 if self.path.startswith('/404/') else 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(self.body)
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """answer GET requests"""
+        self.send_page(True)
+
+    def do_HEAD(self): # pylint: disable=invalid-name
+        """answer HEAD requests"""
+        self.send_page(False)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        """do not log requests"""
+
+def start_http_server(port):
+    """start the local HTTP server in a background thread, return the server"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), LocalRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def case_markdown_awesome(dataset_directory, case_directory):
+    """importers/markdown_awesome: import README.md to a new directory"""
+    return {'source_file': os.path.join(dataset_directory, 'README.md'), 'output_directory': os.path.join(case_directory, 'imported'),
+            'overwrite_tags': True}, ['imported/software', 'imported/tags', 'imported/platforms']
+
+def case_shaarli_api(dataset_directory, case_directory):
+    """importers/shaarli_api: import shaarli.json to a new data file"""
+    return {'source_file': os.path.join(dataset_directory, 'shaarli.json'), 'output_file': os.path.join(case_directory, 'shaarli.yml')}, []
+
+def case_software_metadata(dataset_directory, case_directory):
+    """processors/software_metadata: all projects already have metadata, no API request"""
+    return {'source_directory': dataset_directory, 'metadata_only_missing': True}, []
+
+def case_awesome_lint(dataset_directory, case_directory):
+    """processors/awesome_lint"""
+    return {'source_directory': dataset_directory, 'licenses_files': ['licenses.yml'],
+            'last_updated_error_days': 36500, 'last_updated_warn_days': 36500, 'last_updated_info_days': 36500}, []
+
+def case_url_check(dataset_directory, case_directory):
+    """processors/url_check: check URLs of software items against the local HTTP server"""
+    return {'source_directories': [os.path.join(dataset_directory, 'software')], 'source_files': [],
+            'check_keys': ['website_url', 'source_code_url', 'demo_url', 'related_software_url'], 'errors_are_fatal': False,
+            'exclude_regex': [r'^https://github\.com/.*$', r'^https://gitlab\.com/.*$'],
+            # all URLs point at the local server: do not measure per-host politeness delays
+            'host_delay': 0, 'max_per_host': 8}, []
+
+def case_archive_webpages(dataset_directory, case_directory):
+    """processors/archive_webpages: archive items tagged 'archive' from the local HTTP server"""
+    shutil.copy(os.path.join(dataset_directory, 'shaarli.yml'), os.path.join(case_directory, 'shaarli.yml'))
+    return {'data_file': os.path.join(case_directory, 'shaarli.yml'), 'only_tags': ['archive'],
+            'output_directory': os.path.join(case_directory, 'webpages')}, ['webpages']
+
+def case_download_media(dataset_directory, case_directory):
+    """processors/download_media: all items tagged 'video' already downloaded"""
+    shutil.copy(os.path.join(dataset_directory, 'shaarli.yml'), os.path.join(case_directory, 'shaarli.yml'))
+    return {'data_file': os.path.join(case_directory, 'shaarli.yml'), 'only_tags': ['video'],
+            'output_directory': os.path.join(case_directory, 'video')}, ['video']
+
+def case_markdown_singlepage(dataset_directory, case_directory):
+    """exporters/markdown_singlepage"""
+    return {'source_directory': dataset_directory, 'output_directory': case_directory, 'output_file': 'README.md',
+            'markdown_header': 'markdown/header.md', 'markdown_footer': 'markdown/footer.md', 'exclude_licenses': ['WTFPL']}, []
+
+def case_markdown_multipage(dataset_directory, case_directory):
+    """exporters/markdown_multipage"""
+    return {'source_directory': dataset_directory, 'output_directory': case_directory, 'exclude_licenses': ['WTFPL']}, []
+
+def case_html_table(dataset_directory, case_directory):
+    """exporters/html_table"""
+    return {'source_file': os.path.join(dataset_directory, 'shaarli.yml'), 'output_file': os.path.join(case_directory, 'index.html'),
+            'archive_dir': os.path.join(case_directory, 'webpages')}, []
+
+def case_sqlite_catalog(dataset_directory, case_directory):
+    """exporters/sqlite_catalog"""
+    return {'source_directory': dataset_directory, 'output_file': os.path.join(case_directory, 'catalog.sqlite')}, []
+
+# scaling exponents above this value are reported as superlinear (e.g. quadratic loops)
+SUPERLINEAR_EXPONENT = 1.3
+# difference between current and baseline scaling exponents tolerated before failing with --max-exponent
+SCALING_TOLERANCE = 0.15
+
+# name of the case measuring hecat startup time, subtracted from other cases when computing scaling exponents
+STARTUP = '(startup)'
+
+# module: function returning (module options, list of directories to create in the case directory)
+CASES = {
+    'importers/markdown_awesome': case_markdown_awesome,
+    'importers/shaarli_api': case_shaarli_api,
+    'processors/software_metadata': case_software_metadata,
+    'processors/awesome_lint': case_awesome_lint,
+    'processors/url_check': case_url_check,
+    'processors/archive_webpages': case_archive_webpages,
+    'processors/download_media': case_download_media,
+    'exporters/markdown_singlepage': case_markdown_singlepage,
+    'exporters/markdown_multipage': case_markdown_multipage,
+    'exporters/html_table': case_html_table,
+    'exporters/sqlite_catalog': case_sqlite_catalog,
+}
+
+# run hecat.main in the benchmark process, write its peak RSS to the file given as first argument when it exits
+# (ru_maxrss of a child process includes the RSS of its parent at fork time, and cannot be used directly)
+CHILD_CODE = '''
+import sys, atexit
+from hecat.memory import peak_rss
+def write_peak_rss(rss_file=sys.argv[1]):
+    with open(rss_file, 'w') as output:
+        output.write(str(peak_rss()[0]))
+atexit.register(write_peak_rss)
+sys.argv = ['hecat'] + sys.argv[2:]
+from hecat.main import main
+main()
+'''
+
+def run_process(command, log_file, timeout, rss_file):
+    """run command, return (status, elapsed seconds, peak RSS in bytes or None), the peak RSS is read from rss_file"""
+    timed_out = threading.Event()
+    with open(log_file, 'w', encoding='utf-8') as log:
+        start_time = time.perf_counter()
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT) # pylint: disable=consider-using-with
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            process.wait()
+            elapsed = time.perf_counter() - start_time
+        finally:
+            timer.cancel()
+    try:
+        with open(rss_file, 'r', encoding='utf-8') as rss:
+            max_rss = int(rss.read())
+    except (OSError, ValueError):
+        max_rss = None
+    if timed_out.is_set():
+        return 'timeout', elapsed, max_rss
+    return ('ok' if process.returncode == 0 else 'failed'), elapsed, max_rss
+
+def run_case(module, dataset_directory, case_directory, timeout):
+    """run a single benchmark case in a separate process, return (status, elapsed seconds, peak RSS)
+    the STARTUP case runs hecat with an empty list of steps"""
+    if os.path.isdir(case_directory):
+        shutil.rmtree(case_directory)
+    os.makedirs(case_directory)
+    if module == 'processors/archive_webpages' and not shutil.which('wget'):
+        return 'skipped', None, None
+    config_file = os.path.join(case_directory, 'hecat.yml')
+    if module == STARTUP:
+        dump_yaml({'steps': []}, config_file)
+    else:
+        module_options, directories = CASES[module](dataset_directory, case_directory)
+        for directory in directories:
+            os.makedirs(os.path.join(case_directory, directory), exist_ok=True)
+        dump_yaml({'steps': [{'name': 'benchmark ' + module, 'module': module, 'module_options': module_options}]}, config_file)
+    rss_file = os.path.join(case_directory, 'peak_rss')
+    command = [sys.executable, '-c', CHILD_CODE, rss_file, '--config', config_file, '--log-level', 'ERROR']
+    return run_process(command, os.path.join(case_directory, 'hecat.log'), timeout, rss_file)
+
+def run_benchmarks(sizes, work_directory, modules=None, repeat=1, timeout=DEFAULT_TIMEOUT, seed=0, port=DEFAULT_PORT):
+    """generate datasets (unless already present) and run benchmark cases for each size, return a list of results"""
+    base_url = 'http://127.0.0.1:{}'.format(port)
+    modules = modules or list(CASES)
+    server = start_http_server(port)
+    results = []
+    try:
+        for size in sizes:
+            dataset_directory = os.path.join(work_directory, 'size-{}'.format(size))
+            if not dataset_matches(dataset_directory, size, seed, base_url):
+                generate_dataset(dataset_directory, size, seed=seed, base_url=base_url)
+            for module in [STARTUP] + modules:
+                runs = []
+                for _ in range(repeat):
+                    case_directory = os.path.join(work_directory, 'run-{}'.format(size), to_kebab_case(module.replace('/', '-')))
+                    status, elapsed, max_rss = run_case(module, dataset_directory, case_directory, timeout)
+                    runs.append({'status': status, 'seconds': elapsed, 'max_rss_bytes': max_rss})
+                    if status != 'ok':
+                        break
+                failed = runs[-1]['status'] != 'ok'
+                result = {
+                    'module': module,
+                    'size': size,
+                    'status': runs[-1]['status'],
+                    'seconds': None if failed else min(run['seconds'] for run in runs),
+                    'max_rss_bytes': None if failed else max(run['max_rss_bytes'] or 0 for run in runs) or None,
+                    'runs': runs,
+                }
+                logging.info('%s (size %s): %s', module, size, format_result(result))
+                results.append(result)
+    finally:
+        server.shutdown()
+    return results
+
+def format_result(result):
+    """format the time/memory of a result for display"""
+    if result['status'] != 'ok':
+        return result['status']
+    return '{:.2f}s, {}'.format(result['seconds'], '{:.1f} MiB'.format(result['max_rss_bytes'] / 1048576) if result['max_rss_bytes'] else 'n/a')
+
+def print_results(results):
+    """print a table of results, one row per module, one column per size"""
+    sizes = sorted({result['size'] for result in results})
+    modules = list(dict.fromkeys(result['module'] for result in results))
+    exponents = scaling_exponents(results)
+    by_key = {(result['module'], result['size']): result for result in results}
+    rows = [['module'] + ['size {}'.format(size) for size in sizes] + ['scaling']]
+    for module in modules:
+        rows.append([module] + [format_result(by_key[(module, size)]) if (module, size) in by_key else '' for size in sizes]
+                    + [format_exponent(exponents.get(module))])
+    print_table(rows)
+
+def print_table(rows):
+    """print rows of cells as aligned columns"""
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    for row in rows:
+        print('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+def scaling_exponents(results):
+    """return a dict of {module: k}, where the time taken by the module grows like size^k, estimated by a least squares
+    fit of log(time) against log(size), after subtracting hecat startup time (only for modules measured at 2+ sizes)"""
+    startup = {result['size']: result['seconds'] for result in results if result['module'] == STARTUP and result['status'] == 'ok'}
+    points = {}
+    for result in results:
+        if result['module'] == STARTUP or result['status'] != 'ok':
+            continue
+        seconds = max(result['seconds'] - startup.get(result['size'], 0), 0.01)
+        points.setdefault(result['module'], []).append((math.log(result['size']), math.log(seconds)))
+    exponents = {}
+    for module, module_points in points.items():
+        if len({x for x, _ in module_points}) < 2:
+            continue
+        mean_x = sum(x for x, _ in module_points) / len(module_points)
+        mean_y = sum(y for _, y in module_points) / len(module_points)
+        exponents[module] = (sum((x - mean_x) * (y - mean_y) for x, y in module_points)
+                             / sum((x - mean_x) ** 2 for x, _ in module_points))
+    return exponents
+
+def format_exponent(exponent):
+    """format a scaling exponent for display"""
+    if exponent is None:
+        return ''
+    return 'O(n^{:.2f}){}'.format(exponent, ' superlinear' if exponent >= SUPERLINEAR_EXPONENT else '')
+
+def load_results(results_file):
+    """load results written by write_results()"""
+    with open(results_file, 'r', encoding='utf-8') as results:
+        return json.load(results)['results']
+
+def compare_results(baseline, current, threshold=1.2, memory_threshold=1.2, min_seconds=0.5, max_exponent=None):
+    """compare current results to baseline results, print the comparison, return the list of regressions
+    a step is a regression if it failed, or took more than threshold times its baseline time (and at least min_seconds
+    more), or used more than memory_threshold times its baseline peak RSS, or if its scaling exponent exceeds
+    max_exponent and the baseline exponent"""
+    baseline_by_key = {(result['module'], result['size']): result for result in baseline}
+    regressions = []
+    rows = [['module', 'size', 'baseline', 'current', 'time ratio', 'memory ratio', '']]
+    for result in current:
+        key = (result['module'], result['size'])
+        reference = baseline_by_key.get(key)
+        if reference is None or reference['status'] != 'ok':
+            rows.append([result['module'], str(result['size']), 'n/a', format_result(result), '', '', 'new'])
+            continue
+        if result['status'] != 'ok':
+            rows.append([result['module'], str(result['size']), format_result(reference), format_result(result), '', '', 'REGRESSION'])
+            regressions.append('{} (size {}): {}'.format(result['module'], result['size'], result['status']))
+            continue
+        time_ratio = result['seconds'] / reference['seconds'] if reference['seconds'] else 1
+        memory_ratio = (result['max_rss_bytes'] / reference['max_rss_bytes']) if result['max_rss_bytes'] and reference['max_rss_bytes'] else 1
+        problems = []
+        if time_ratio > threshold and result['seconds'] - reference['seconds'] >= min_seconds:
+            problems.append('{:.2f}x slower'.format(time_ratio))
+        if memory_ratio > memory_threshold:
+            problems.append('{:.2f}x more memory'.format(memory_ratio))
+        if problems:
+            regressions.append('{} (size {}): {}'.format(result['module'], result['size'], ', '.join(problems)))
+        rows.append([result['module'], str(result['size']), format_result(reference), format_result(result),
+                     '{:.2f}'.format(time_ratio), '{:.2f}'.format(memory_ratio), 'REGRESSION' if problems else ''])
+    print_table(rows)
+    print()
+    baseline_exponents = scaling_exponents(baseline)
+    current_exponents = scaling_exponents(current)
+    rows = [['module', 'baseline scaling', 'current scaling', '']]
+    for module, exponent in current_exponents.items():
+        reference = baseline_exponents.get(module)
+        regression = (max_exponent is not None and exponent > max_exponent and (reference is None or exponent > reference + SCALING_TOLERANCE))
+        if regression:
+            regressions.append('{}: scales as {}, more than O(n^{})'.format(module, format_exponent(exponent), max_exponent))
+        rows.append([module, format_exponent(reference), format_exponent(exponent), 'REGRESSION' if regression else ''])
+    if len(rows) > 1:
+        print_table(rows)
+    return regressions
+
+def write_results(results, output_file):
+    """write results to a JSON file, with information about the environment"""
+    from . import __version__ # pylint: disable=import-outside-toplevel
+    with open(output_file, 'w', encoding='utf-8') as output:
+        json.dump({
+            'hecat_version': __version__,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results,
+        }, output, indent=2)
+    logging.info('results written to %s', output_file)
+
+def main():
+    """command-line interface"""
+    parser = argparse.ArgumentParser(prog='python3 -m hecat.benchmark', description='generate synthetic datasets and benchmark hecat modules')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    generate_parser = subparsers.add_parser('generate', help='generate a synthetic dataset')
+    generate_parser.add_argument('directory', help='output directory (removed and recreated)')
+    generate_parser.add_argument('--size', type=int, default=1000, help='number of software and Shaarli items (default 1000)')
+    generate_parser.add_argument('--seed', type=int, default=0, help='random seed (default 0)')
+    generate_parser.add_argument('--base-url', default='http://127.0.0.1:{}'.format(DEFAULT_PORT), help='base URL of generated website URLs (default http://127.0.0.1:{})'.format(DEFAULT_PORT))
+    run_parser = subparsers.add_parser('run', help='run the benchmark suite')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='dataset sizes (default {})'.format(' '.join(str(size) for size in DEFAULT_SIZES)))
+    run_parser.add_argument('--modules', nargs='+', choices=list(CASES), default=None, help='modules to benchmark (default all)')
+    run_parser.add_argument('--work-directory', default='.hecat-benchmark', help='directory for datasets and outputs (default .hecat-benchmark)')
+    run_parser.add_argument('--repeat', type=int, default=1, help='number of runs of each case, the fastest is reported (default 1)')
+    run_parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT, help='maximum duration of each run in seconds (default {})'.format(DEFAULT_TIMEOUT))
+    run_parser.add_argument('--seed', type=int, default=0, help='random seed (default 0)')
+    run_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='port of the local HTTP server (default {})'.format(DEFAULT_PORT))
+    run_parser.add_argument('--output', default=None, help='write results to this JSON file (default none)')
+    compare_parser = subparsers.add_parser('compare', help='compare results to a baseline, exit with an error on regressions')
+    compare_parser.add_argument('baseline', help='baseline results file (written by run --output)')
+    compare_parser.add_argument('current', nargs='?', default=None, help='current results file (default: run the suite with the sizes and modules of the baseline)')
+    compare_parser.add_argument('--threshold', type=float, default=1.2, help='fail if a step takes more than THRESHOLD times its baseline time (default 1.2)')
+    compare_parser.add_argument('--memory-threshold', type=float, default=1.2, help='fail if a step uses more than MEMORY_THRESHOLD times its baseline peak RSS (default 1.2)')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.5, help='ignore time differences smaller than this number of seconds (default 0.5)')
+    compare_parser.add_argument('--max-exponent', type=float, default=None, help='fail if a step scales worse than O(n^MAX_EXPONENT) and worse than in the baseline (default none)')
+    compare_parser.add_argument('--work-directory', default='.hecat-benchmark', help='directory for datasets and outputs (default .hecat-benchmark)')
+    compare_parser.add_argument('--repeat', type=int, default=1, help='number of runs of each case, the fastest is reported (default 1)')
+    compare_parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT, help='maximum duration of each run in seconds (default {})'.format(DEFAULT_TIMEOUT))
+    compare_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='port of the local HTTP server (default {})'.format(DEFAULT_PORT))
+    compare_parser.add_argument('--output', default=None, help='write current results to this JSON file (default none)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(filename)s: %(message)s')
+    if args.command == 'generate':
+        generate_dataset(args.directory, args.size, seed=args.seed, base_url=args.base_url)
+    elif args.command == 'run':
+        results = run_benchmarks(args.sizes, args.work_directory, modules=args.modules, repeat=args.repeat,
+                                 timeout=args.timeout, seed=args.seed, port=args.port)
+        print_results(results)
+        if args.output:
+            write_results(results, args.output)
+    elif args.command == 'compare':
+        baseline = load_results(args.baseline)
+        if args.current:
+            current = load_results(args.current)
+        else:
+            sizes = sorted({result['size'] for result in baseline})
+            modules = [module for module in dict.fromkeys(result['module'] for result in baseline) if module in CASES]
+            current = run_benchmarks(sizes, args.work_directory, modules=modules, repeat=args.repeat, timeout=args.timeout, port=args.port)
+            if args.output:
+                write_results(current, args.output)
+        regressions = compare_results(baseline, current, threshold=args.threshold, memory_threshold=args.memory_threshold,
+                                      min_seconds=args.min_seconds, max_exponent=args.max_exponent)
+        if regressions:
+            for regression in regressions:
+                logging.error('regression: %s', regression)
+            sys.exit(1)
+        logging.info('no regression compared to %s', args.baseline)
+
+if __name__ == '__main__':
+    main()
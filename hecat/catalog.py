@@ -0,0 +1,182 @@
+"""hecat - SQLite catalog of software, tags, platforms and licenses
+The catalog is a single SQLite file compiled from a source directory (see exporters/sqlite_catalog), indexed by tag,
+platform, license, provider and last update date. Steps can query it instead of scanning the whole software list
+for each tag/platform/license.
+Each row keeps the original item as JSON in its `data` column, query functions return these items as dicts.
+The catalog records a signature (modification time/size) of its source files, open_catalog() refuses a catalog whose
+source files were modified after it was built.
+"""
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+from .utils import load_yaml_data, load_yaml_files, list_files, detect_provider
+from .dataset import path_signature
+
+CATALOG_VERSION = 2
+
+SCHEMA = '''
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE software (
+    id INTEGER PRIMARY KEY,
+    file TEXT,
+    name TEXT NOT NULL,
+    description TEXT,
+    website_url TEXT,
+    source_code_url TEXT,
+    demo_url TEXT,
+    provider TEXT,
+    updated_at TEXT,
+    stargazers_count INTEGER,
+    archived INTEGER,
+    depends_3rdparty INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE software_tags (software_id INTEGER NOT NULL, tag TEXT NOT NULL, position INTEGER NOT NULL);
+CREATE TABLE software_platforms (software_id INTEGER NOT NULL, platform TEXT NOT NULL, position INTEGER NOT NULL);
+CREATE TABLE software_licenses (software_id INTEGER NOT NULL, license TEXT NOT NULL, position INTEGER NOT NULL);
+CREATE TABLE tags (name TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE platforms (name TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE licenses (identifier TEXT PRIMARY KEY, name TEXT, url TEXT, source_file TEXT, data TEXT NOT NULL);
+CREATE INDEX software_tags_tag ON software_tags (tag, position);
+CREATE INDEX software_platforms_platform ON software_platforms (platform);
+CREATE INDEX software_licenses_license ON software_licenses (license);
+CREATE INDEX software_provider ON software (provider);
+CREATE INDEX software_updated_at ON software (updated_at);
+'''
+
+def to_json(item):
+    """serialize an item to JSON, dates are stored as strings"""
+    return json.dumps(item, default=str, ensure_ascii=False)
+
+def source_signature(source_paths):
+    """return a digest of the modification time/size of all files in source_paths"""
+    signatures = [(path, path_signature(path)) for path in source_paths]
+    return hashlib.sha1(repr(signatures).encode('utf-8')).hexdigest()
+
+def load_software(software_directory):
+    """return a list of (file name, software item) from software_directory, files containing a list of items are
+    added item by item"""
+    software_files = sorted(list_files(software_directory))
+    software = []
+    for filename, file_data in zip(software_files, load_yaml_files([software_directory + '/' + filename for filename in software_files],
+                                                                   cache_key=software_directory, read_only=True)):
+        software.extend((filename, item) for item in (file_data if isinstance(file_data, list) else [file_data]))
+    return software
+
+def build_catalog(source_directory, catalog_file, licenses_files=None):
+    """compile software/, tags/, platforms/ and licenses files from source_directory to a SQLite catalog
+    the catalog is written to a temporary file first, then moved to catalog_file"""
+    if licenses_files is None:
+        licenses_files = ['licenses.yml']
+    source_paths = [source_directory + '/software', source_directory + '/tags']
+    if os.path.isdir(source_directory + '/platforms'):
+        source_paths.append(source_directory + '/platforms')
+    source_paths.extend(source_directory + '/' + filename.lstrip('/') for filename in licenses_files)
+    signature = source_signature(source_paths)
+    software_list = load_software(source_directory + '/software')
+    tags = load_yaml_data(source_directory + '/tags', read_only=True)
+    platforms = load_yaml_data(source_directory + '/platforms', read_only=True) if os.path.isdir(source_directory + '/platforms') else []
+    temp_file = catalog_file + '.tmp'
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    connection = sqlite3.connect(temp_file)
+    try:
+        connection.executescript(SCHEMA)
+        with connection:
+            connection.executemany('INSERT INTO metadata VALUES (?, ?)', [
+                ('version', str(CATALOG_VERSION)),
+                ('source_directory', source_directory),
+                ('source_paths', json.dumps(source_paths)),
+                ('source_signature', signature),
+                ('built_at', datetime.now().isoformat(timespec='seconds'))])
+            for software_id, (filename, software) in enumerate(software_list):
+                source_code_url = software.get('source_code_url')
+                connection.execute('INSERT INTO software VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                    software_id, filename, software['name'], software.get('description'), software.get('website_url'),
+                    source_code_url, software.get('demo_url'), detect_provider(source_code_url) if source_code_url else None,
+                    str(software['updated_at']) if 'updated_at' in software else None, software.get('stargazers_count'),
+                    software.get('archived'), software.get('depends_3rdparty'), to_json(software)))
+                for table, column in (('software_tags', 'tags'), ('software_platforms', 'platforms'), ('software_licenses', 'licenses')):
+                    connection.executemany('INSERT INTO {} VALUES (?, ?, ?)'.format(table),
+                                           [(software_id, value, position) for position, value in enumerate(software.get(column) or [])])
+            connection.executemany('INSERT OR REPLACE INTO tags VALUES (?, ?)', [(tag['name'], to_json(tag)) for tag in tags])
+            connection.executemany('INSERT OR REPLACE INTO platforms VALUES (?, ?)', [(platform['name'], to_json(platform)) for platform in platforms])
+            for filename in licenses_files:
+                licenses = load_yaml_data(source_directory + '/' + filename.lstrip('/'), read_only=True)
+                connection.executemany('INSERT OR REPLACE INTO licenses VALUES (?, ?, ?, ?, ?)', [
+                    (license['identifier'], license.get('name'), license.get('url'), filename, to_json(license)) for license in licenses])
+        connection.execute('ANALYZE')
+    finally:
+        connection.close()
+    os.replace(temp_file, catalog_file)
+    logging.info('catalog %s written (%s software items, %s tags, %s platforms)', catalog_file, len(software_list), len(tags), len(platforms))
+
+def open_catalog(catalog_file):
+    """open a catalog written by build_catalog() in read-only mode"""
+    if not os.path.isfile(catalog_file):
+        logging.error('catalog file %s not found, it must be created by a previous exporters/sqlite_catalog step', catalog_file)
+        sys.exit(1)
+    connection = sqlite3.connect('file:{}?mode=ro'.format(catalog_file), uri=True)
+    version = connection.execute("SELECT value FROM metadata WHERE key = 'version'").fetchone()
+    if version is None or int(version[0]) != CATALOG_VERSION:
+        logging.error('catalog file %s was created by an incompatible version of hecat, it must be rebuilt', catalog_file)
+        sys.exit(1)
+    metadata = dict(connection.execute("SELECT key, value FROM metadata WHERE key IN ('source_paths', 'source_signature')"))
+    if source_signature(json.loads(metadata['source_paths'])) != metadata['source_signature']:
+        logging.error('source files of catalog file %s were modified after it was built, it must be rebuilt', catalog_file)
+        sys.exit(1)
+    return connection
+
+def query_software(connection, where='', parameters=()):
+    """return software items matching a SQL condition on the software table (aliased as s), in source file order"""
+    rows = connection.execute('SELECT s.data FROM software s {} ORDER BY s.id'.format(where), parameters)
+    return [json.loads(row[0]) for row in rows]
+
+def license_filter(exclude_licenses=None, include_licenses=None):
+    """return a SQL condition and its parameters excluding software with any of exclude_licenses,
+    or only including software with at least one of include_licenses"""
+    if exclude_licenses:
+        return ('NOT EXISTS (SELECT 1 FROM software_licenses l WHERE l.software_id = s.id AND l.license IN ({}))'.format(
+            ', '.join('?' * len(exclude_licenses))), tuple(exclude_licenses))
+    if include_licenses:
+        return ('EXISTS (SELECT 1 FROM software_licenses l WHERE l.software_id = s.id AND l.license IN ({}))'.format(
+            ', '.join('?' * len(include_licenses))), tuple(include_licenses))
+    return ('1', ())
+
+def software_by_tag(connection, tag, primary_only=False, exclude_licenses=None, include_licenses=None):
+    """return software items tagged with tag (only items where it is the first tag if primary_only=True)"""
+    condition, parameters = license_filter(exclude_licenses, include_licenses)
+    return query_software(
+        connection,
+        'JOIN software_tags t ON t.software_id = s.id WHERE t.tag = ? {} AND {}'.format('AND t.position = 0' if primary_only else '', condition),
+        (tag,) + parameters)
+
+def software_by_platform(connection, platform, exclude_licenses=None, include_licenses=None):
+    """return software items for the platform"""
+    condition, parameters = license_filter(exclude_licenses, include_licenses)
+    return query_software(
+        connection, 'JOIN software_platforms p ON p.software_id = s.id WHERE p.platform = ? AND {}'.format(condition), (platform,) + parameters)
+
+def software_by_license(connection, license):
+    """return software items released under the license"""
+    return query_software(connection, 'JOIN software_licenses l ON l.software_id = s.id WHERE l.license = ?', (license,))
+
+def software_by_provider(connection, provider):
+    """return software items hosted on provider (github, gitlab)"""
+    return query_software(connection, 'WHERE s.provider = ?', (provider,))
+
+def software_updated_before(connection, date):
+    """return software items last updated before date (YYYY-MM-DD)"""
+    return query_software(connection, 'WHERE s.updated_at < ?', (date,))
+
+def count_software_by_tag(connection):
+    """return a dict of {tag name: number of software items tagged with it}, for all tags used by software items"""
+    return dict(connection.execute('SELECT tag, COUNT(DISTINCT software_id) FROM software_tags GROUP BY tag'))
+
+def count_software_by_platform(connection):
+    """return a dict of {platform name: number of software items for this platform}"""
+    return dict(connection.execute('SELECT platform, COUNT(DISTINCT software_id) FROM software_platforms GROUP BY platform'))
@@ -0,0 +1,87 @@
+"""hecat - in-memory dataset shared between the steps of a pipeline
+Data loaded by a step (source directories, data files) is kept in memory and returned to the next steps loading the
+same path, instead of being parsed again. An entry is invalidated when a step writes to its path (see invalidate()),
+or when the modification time/size of its files changed since it was loaded.
+Entries are stored in serialized form, each step gets its own copy of the data and can modify it freely.
+Sharing is disabled by default (`share_data` global option): entries are kept in memory for the whole run. Only source
+directories and data files larger than utils.CACHE_MIN_FILE_SIZE are stored, not files loaded one by one.
+"""
+import os
+import pickle
+import logging
+import threading
+
+class Dataset:
+    """in-memory store of loaded data, keyed by absolute path and loading mode"""
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, path, read_only=False):
+        """return a copy of the data loaded from path, or None if it was not loaded yet or has changed since"""
+        key = (os.path.abspath(path), read_only)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return None
+        signature, serialized = entry
+        if signature != path_signature(path):
+            logging.debug('%s was modified since it was loaded', path)
+            self.invalidate(path)
+            return None
+        logging.debug('using data from %s loaded by a previous step', path)
+        return pickle.loads(serialized)
+
+    def has(self, path, read_only=False):
+        """return True if data loaded from path is available and unchanged"""
+        key = (os.path.abspath(path), read_only)
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry is not None and entry[0] == path_signature(path)
+
+    def store(self, path, data, read_only=False):
+        """keep a copy of the data loaded from path"""
+        key = (os.path.abspath(path), read_only)
+        entry = (path_signature(path), pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            self.entries[key] = entry
+
+    def invalidate(self, path):
+        """forget data loaded from path, from a file inside path, or from the directory containing path"""
+        abspath = os.path.abspath(path)
+        with self.lock:
+            for key in list(self.entries):
+                if key[0] == abspath or key[0].startswith(abspath + os.sep) or abspath.startswith(key[0] + os.sep):
+                    logging.debug('invalidating data loaded from %s', key[0])
+                    del self.entries[key]
+
+def path_signature(path):
+    """return a value that changes when a file, or any file in a directory, is modified, added or removed"""
+    if os.path.isdir(path):
+        signature = []
+        for root, _, files in os.walk(path):
+            for file in files:
+                stat = os.stat(os.path.join(root, file))
+                signature.append((root, file, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(signature))
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+# the dataset used by load_yaml_data(), None when data sharing is disabled
+DATASET = {'current': None}
+
+def enable():
+    """start sharing loaded data between steps"""
+    DATASET['current'] = Dataset()
+
+def current():
+    """return the active dataset, or None"""
+    return DATASET['current']
+
+def invalidate(path):
+    """forget shared data loaded from path, to be called after writing to path"""
+    if DATASET['current'] is not None:
+        DATASET['current'].invalidate(path)
@@ -1,4 +1,21 @@
 """exporters"""
-from .markdown_singlepage import render_markdown_singlepage
-from .html_table import render_html_table
-from .markdown_multipage import render_markdown_multipage
+import importlib
+
+# function name: submodule, functions are imported on first access (PEP 562) so that importing this package does
+# not import the dependencies of all exporters
+FUNCTIONS = {
+    'render_markdown_singlepage': 'markdown_singlepage',
+    'render_html_table': 'html_table',
+    'render_markdown_multipage': 'markdown_multipage',
+    'render_sqlite_catalog': 'sqlite_catalog',
+}
+
+def __getattr__(name):
+    """import the submodule providing the function name on first access"""
+    if name not in FUNCTIONS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    function = getattr(importlib.import_module('.' + FUNCTIONS[name], __name__), name)
+    globals()[name] = function
+    return function
+
+__all__ = list(FUNCTIONS)
@@ -4,7 +4,7 @@ steps:
   - name: 将shaarli数据导出为HTML表格
     module: importers/shaarli_api
     module_options:
-      source_file: shaarli.yml # 将从中加载数据的文件
+      source_file: shaarli.yml # 将从中加载数据的文件（或分片数据目录，见 importers/shaarli_api）
       output_file: index.html # (默认 index.html) 输出HTML表格文件
       html_title: "hecat HTML导出" # (默认 "hecat HTML export") 输出HTML标题
       favicon_base64: "iVBORw0KGgoAAAAN..." # (默认为默认favicon) base64编码的png favicon
@@ -23,7 +23,7 @@ import logging
 from datetime import datetime
 from jinja2 import Template
 import markdown
-from ..utils import load_yaml_data
+from ..utils import iter_yaml_items, count_yaml_items
 
 HTML_JINJA = """
 <html>
@@ -206,17 +206,17 @@ def render_html_table(step):
         sys.exit(1)
     if 'archive_dir' not in step['module_options']:
         step['module_options']['archive_dir'] = 'webpages'
-    data = load_yaml_data(step['module_options']['source_file'])
-    link_count = len(data)
+    link_count = count_yaml_items(step['module_options']['source_file'])
     html_template = Template(HTML_JINJA)
     html_template.globals['jinja_markdown'] = jinja_markdown
     html_template.globals['simple_datetime'] = simple_datetime
     with open(step['module_options']['output_file'], 'w+', encoding="utf-8") as html_file:
         logging.info('写入文件 %s', step['module_options']['output_file'])
-        html_file.write(html_template.render(items=data,
-                                            link_count=link_count,
-                                            html_title=step['module_options']['html_title'],
-                                            favicon_base64=step['module_options']['favicon_base64'],
-                                            description_format=step['module_options']['description_format'],
-                                            archive_dir=step['module_options']['archive_dir']
-                                            ))
+        # 逐项渲染并写入，不在内存中构建整个数据集/HTML 文档
+        html_file.writelines(html_template.generate(items=iter_yaml_items(step['module_options']['source_file']),
+                                                    link_count=link_count,
+                                                    html_title=step['module_options']['html_title'],
+                                                    favicon_base64=step['module_options']['favicon_base64'],
+                                                    description_format=step['module_options']['description_format'],
+                                                    archive_dir=step['module_options']['archive_dir']
+                                                    ))
@@ -14,6 +14,7 @@ steps:
     module_options:
       source_directory: tests/awesome-selfhosted-data # 包含 YAML 数据的目录
       output_directory: tests/awesome-selfhosted-html # 写入 Markdown 页面的目录
+      skip_unchanged_pages: True # (默认 True) 只渲染自上次运行以来数据（项目本身、列出或相关的软件）发生变化的标签/平台/软件页面，指纹存储在 OUTPUT_DIRECTORY/.hecat-pages.json 中
       exclude_licenses: # 可选，默认 []
         - '⊘ Proprietary'
         - 'BUSL-1.1'
@@ -66,16 +67,28 @@ OUTPUT_DIR/ 是 HTML 网站的输出目录
     └── tags
 
 源 YAML 目录结构和软件/平台数据的格式在 markdown_singlepage.py 中有文档说明。
+内容未改变的输出文件不会被重写（保留修改时间），因此 sphinx 只重新构建已更改的页面。
 """
 
 import os
 import sys
+import json
+import hashlib
 import logging
 from datetime import datetime, timedelta
 import urllib
 import ruamel.yaml
 from jinja2 import Template
-from ..utils import load_yaml_data, to_kebab_case, render_markdown_licenses
+from ..utils import load_yaml_data, to_kebab_case, render_markdown_licenses, write_file_if_changed
+
+# 每种页面类型相对于 output_directory 的输出目录
+PAGE_DIRECTORIES = {
+    'tag': '/md/tags/',
+    'platform': '/md/platforms/',
+    'software': '/md/software/',
+}
+# 页面指纹清单文件，位于 output_directory 中
+PAGES_MANIFEST_FILE = '.hecat-pages.json'
 
 yaml = ruamel.yaml.YAML(typ='safe')
 yaml.indent(sequence=4, offset=2)
@@ -379,6 +392,17 @@ SOFTWARE_RELATED_JINJA_MARKDOWN="""
 
 """
 
+def software_date_css_class(software):
+    """根据最后更新日期返回软件的 CSS 类"""
+    date_css_class = 'updated-at'
+    if 'updated_at' in software:
+        last_update_time = datetime.strptime(software['updated_at'], "%Y-%m-%d")
+        if last_update_time < datetime.now() - timedelta(days=365):
+            date_css_class = 'redbox'
+        elif last_update_time < datetime.now() - timedelta(days=186):
+            date_css_class = 'orangebox'
+    return date_css_class
+
 def render_markdown_software_detail(software, tags_relative_url='./', platforms_relative_url='./', licenses_relative_url='#list-of-licenses'):
     """渲染软件详细信息页面的内容"""
     tags_dicts_list = []
@@ -394,13 +418,7 @@ def render_markdown_software_detail(software, tags_relative_url='./', platforms_
             "name": platform, 
             "href": platforms_relative_url + urllib.parse.quote(to_kebab_case(platform))         })
     
-    date_css_class = 'updated-at'
-    if 'updated_at' in software:
-        last_update_time = datetime.strptime(software['updated_at'], "%Y-%m-%d")
-        if last_update_time < datetime.now() - timedelta(days=365):
-            date_css_class = 'redbox'
-        elif last_update_time < datetime.now() - timedelta(days=186):
-            date_css_class = 'orangebox'
+    date_css_class = software_date_css_class(software)
             
     detail_template = Template(SOFTWARE_DETAIL_JINJA_MARKDOWN)
     # 注入 to_kebab_case 以便模板中可用
@@ -481,13 +499,7 @@ def render_markdown_software(software, tags_relative_url='tags/', platforms_rela
             "name": platform, 
             "href": platforms_relative_url + urllib.parse.quote(to_kebab_case(platform))         })
     
-    date_css_class = 'updated-at'
-    if 'updated_at' in software:
-        last_update_time = datetime.strptime(software['updated_at'], "%Y-%m-%d")
-        if last_update_time < datetime.now() - timedelta(days=365):
-            date_css_class = 'redbox'
-        elif last_update_time < datetime.now() - timedelta(days=186):
-            date_css_class = 'orangebox'
+    date_css_class = software_date_css_class(software)
     
     # 创建软件页面链接
     software_url = software_relative_url + urllib.parse.quote(to_kebab_case(software['name']))     
@@ -521,7 +533,7 @@ def render_item_page(step, item_type, item, software_list):
         tags_relative_url = './'
         platforms_relative_url = '../platforms/'
         software_relative_url = '../software/'
-        output_dir = step['module_options']['output_directory'] + '/md/tags/'
+        output_dir = step['module_options']['output_directory'] + PAGE_DIRECTORIES['tag']
     elif item_type == 'platform':
         markdown_fieldlist = ':orphan:\n'
         header_template = Template(PLATFORM_HEADER_JINJA_MARKDOWN)
@@ -530,7 +542,7 @@ def render_item_page(step, item_type, item, software_list):
         tags_relative_url = '../tags/'
         platforms_relative_url = './'
         software_relative_url = '../software/'
-        output_dir = step['module_options']['output_directory'] + '/md/platforms/'
+        output_dir = step['module_options']['output_directory'] + PAGE_DIRECTORIES['platform']
     elif item_type == 'software':
         markdown_fieldlist = ':orphan:\n'
         header_template = Template(SOFTWARE_HEADER_JINJA_MARKDOWN)
@@ -539,7 +551,7 @@ def render_item_page(step, item_type, item, software_list):
         tags_relative_url = '../tags/'
         platforms_relative_url = '../platforms/'
         software_relative_url = './'
-        output_dir = step['module_options']['output_directory'] + '/md/software/'
+        output_dir = step['module_options']['output_directory'] + PAGE_DIRECTORIES['software']
         # 确保输出目录存在
         try:
             os.mkdir(output_dir)
@@ -615,9 +627,64 @@ def render_item_page(step, item_type, item, software_list):
     # 确定输出文件名
     output_file_name = output_dir + to_kebab_case(item['name']) + '.md'
     
-    with open(output_file_name, 'w+', encoding="utf-8") as outfile:
+    if write_file_if_changed(output_file_name, markdown_page):
         logging.debug('正在写入输出文件 %s', output_file_name)
-        outfile.write(markdown_page)
+
+def hash_data(data):
+    """返回 JSON 可序列化数据的哈希值"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def page_fingerprints(step, tags, platforms, software_list):
+    """返回 {'页面类型/名称': 指纹} 字典，指纹在页面渲染所依赖的数据发生变化时改变：
+    - 标签/平台页面：项目本身及其列出的软件
+    - 软件页面：软件本身及其相关软件（共享至少一个标签）
+    以及 exclude_licenses 选项和此模块的代码（模板）"""
+    with open(__file__, 'rb') as module_file:
+        common = hash_data([hashlib.sha256(module_file.read()).hexdigest(), step['module_options']['exclude_licenses']])
+    software_hashes = [hash_data([software, software_date_css_class(software)]) for software in software_list]
+    excluded = [any(license in software['licenses'] for license in step['module_options']['exclude_licenses']) for software in software_list]
+    indexes_by_key = {'tags': {}, 'platforms': {}}
+    for index, software in enumerate(software_list):
+        for key, indexes in indexes_by_key.items():
+            for value in software[key]:
+                indexes.setdefault(value, []).append(index)
+    fingerprints = {}
+    for item_type, items, key in (('tag', tags, 'tags'), ('platform', platforms, 'platforms')):
+        for item in items:
+            listed = [software_hashes[index] for index in indexes_by_key[key].get(item['name'], []) if not excluded[index]]
+            fingerprints[item_type + '/' + item['name']] = hash_data([common, item, listed])
+    for index, software in enumerate(software_list):
+        if not excluded[index]:
+            related = set()
+            for tag in software['tags']:
+                related.update(indexes_by_key['tags'][tag])
+            related = [software_hashes[related_index] for related_index in sorted(related)
+                       if software_list[related_index]['name'] != software['name']]
+            fingerprints['software/' + software['name']] = hash_data([common, software_hashes[index], related])
+    return fingerprints
+
+def load_pages_manifest(step):
+    """加载上次运行记录的页面指纹，格式为 {'页面类型/名称': [指纹, 修改时间, 大小]}"""
+    try:
+        with open(step['module_options']['output_directory'] + '/' + PAGES_MANIFEST_FILE, 'r', encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def write_pages_manifest(step, manifest):
+    """写入页面指纹清单（通过临时文件，然后重命名）"""
+    manifest_file_name = step['module_options']['output_directory'] + '/' + PAGES_MANIFEST_FILE
+    with open(manifest_file_name + '.tmp', 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(manifest_file_name + '.tmp', manifest_file_name)
+
+def page_signature(file_name):
+    """返回页面文件的 [修改时间, 大小]，如果文件不存在则返回 None"""
+    try:
+        stat = os.stat(file_name)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
 
 def render_markdown_toctree(tags):
     """渲染 toctree 块"""
@@ -639,11 +706,13 @@ def render_markdown_multipage(step):
         step['module_options']['exclude_licenses'] = []
     if 'output_file' not in step['module_options']:
         step['module_options']['output_file'] = 'index.md'
+    if 'skip_unchanged_pages' not in step['module_options']:
+        step['module_options']['skip_unchanged_pages'] = True
     
-    tags = load_yaml_data(step['module_options']['source_directory'] + '/tags', sort_key='name')
-    platforms = load_yaml_data(step['module_options']['source_directory'] + '/platforms', sort_key='name')
-    software_list = load_yaml_data(step['module_options']['source_directory'] + '/software')
-    licenses = load_yaml_data(step['module_options']['source_directory'] + '/licenses.yml')
+    tags = load_yaml_data(step['module_options']['source_directory'] + '/tags', sort_key='name', read_only=True)
+    platforms = load_yaml_data(step['module_options']['source_directory'] + '/platforms', sort_key='name', read_only=True)
+    software_list = load_yaml_data(step['module_options']['source_directory'] + '/software', read_only=True)
+    licenses = load_yaml_data(step['module_options']['source_directory'] + '/licenses.yml', read_only=True)
     
     # 使用 fieldlist myst-parser 扩展将 TOC 深度限制为 2
     markdown_fieldlist = ':tocdepth: 2\n'
@@ -688,22 +757,29 @@ def render_markdown_multipage(step):
         except FileExistsError:
             pass
     
-    with open(output_file_name, 'w+', encoding="utf-8") as outfile:
+    if write_file_if_changed(output_file_name, markdown):
         logging.info('正在写入输出文件 %s', output_file_name)
-        outfile.write(markdown)
     
-    logging.info('正在渲染标签页面')
-    for tag in tags:
-        render_item_page(step, 'tag', tag, software_list)
-    
-    logging.info('正在渲染平台页面')
-    for platform in platforms:
-        render_item_page(step, 'platform', platform, software_list)
-    
-    logging.info('正在渲染软件页面')
-    for software in software_list:
-        if not any(license in software['licenses'] for license in step['module_options']['exclude_licenses']):
-            render_item_page(step, 'software', software, software_list)
+    fingerprints = page_fingerprints(step, tags, platforms, software_list)
+    previous_manifest = load_pages_manifest(step) if step['module_options']['skip_unchanged_pages'] else {}
+    manifest = {}
+    skipped_count = 0
+    for item_type, items in (('tag', tags), ('platform', platforms), ('software', software_list)):
+        logging.info('正在渲染%s页面', {'tag': '标签', 'platform': '平台', 'software': '软件'}[item_type])
+        for item in items:
+            page = item_type + '/' + item['name']
+            if page not in fingerprints: # exclude_licenses 中的软件
+                continue
+            file_name = step['module_options']['output_directory'] + PAGE_DIRECTORIES[item_type] + to_kebab_case(item['name']) + '.md'
+            previous = previous_manifest.get(page)
+            if previous is not None and previous[0] == fingerprints[page] and previous[1:] == page_signature(file_name):
+                skipped_count += 1
+            else:
+                render_item_page(step, item_type, item, software_list)
+            manifest[page] = [fingerprints[page]] + page_signature(file_name)
+    write_pages_manifest(step, manifest)
+    if skipped_count:
+        logging.info('跳过了 %s 个数据未更改的页面', skipped_count)
     
     try:
         os.mkdir(step['module_options']['output_directory'] + '/_static')
@@ -711,7 +787,6 @@ def render_markdown_multipage(step):
         pass
     
     output_css_file_name = step['module_options']['source_directory'] + '/_static/custom.css'
-    with open(output_css_file_name, 'w+', encoding="utf-8") as outfile:
+    if write_file_if_changed(output_css_file_name, MARKDOWN_CSS):
         logging.info('正在写入输出 CSS 文件 %s', output_css_file_name)
-        outfile.write(MARKDOWN_CSS)
         
\ No newline at end of file
@@ -42,6 +42,7 @@ steps:
       back_to_top_url: '##awesome-selfhosted---non-free-software'
       render_empty_categories: False # (可选，默认 True) 不要渲染包含 0 个项目的类别
       render_category_headers: False # (可选，默认 True) 不要渲染类别标题（描述、相关类别、外部链接...）
+      catalog_file: tests/catalog.sqlite # (可选，默认无) 由 exporters/sqlite_catalog 步骤生成的 SQLite 目录，从中查询每个类别的软件项目，而不是为每个类别扫描整个软件列表
       include_licenses: # (默认无) 仅渲染至少匹配其中一个许可证的项目（不能与 exclude_licenses 一起使用）（按标识符）
         - '⊘ Proprietary'
         - 'BUSL-1.1'
@@ -167,7 +168,8 @@ redirect:
 import sys
 import logging
 import ruamel.yaml
-from ..utils import to_kebab_case, load_yaml_data, render_markdown_licenses
+from ..utils import to_kebab_case, load_yaml_data, render_markdown_licenses, write_file_if_changed
+from ..catalog import open_catalog, software_by_tag
 
 yaml = ruamel.yaml.YAML(typ='safe')
 yaml.indent(sequence=4, offset=2)
@@ -300,11 +302,15 @@ def render_markdown_singlepage(step):
     一个软件项目只列出一次，在其 'tags:' 列表的第一个项目下
     """
     # pylint: disable=consider-using-with
-    tags = load_yaml_data(step['module_options']['source_directory'] + '/tags', sort_key='name')
-    software_list = load_yaml_data(step['module_options']['source_directory'] + '/software')
+    tags = load_yaml_data(step['module_options']['source_directory'] + '/tags', sort_key='name', read_only=True)
+    catalog = None
+    if step['module_options'].get('catalog_file'):
+        catalog = open_catalog(step['module_options']['catalog_file'])
+    else:
+        software_list = load_yaml_data(step['module_options']['source_directory'] + '/software', read_only=True)
     if 'licenses_file' not in step['module_options']:
         step['module_options']['licenses_file'] = 'licenses.yml'
-    licenses = load_yaml_data(step['module_options']['source_directory'] + '/' + step['module_options']['licenses_file'])
+    licenses = load_yaml_data(step['module_options']['source_directory'] + '/' + step['module_options']['licenses_file'], read_only=True)
     markdown_header = ''
     markdown_footer = ''
     if 'markdown_header' in step['module_options']:
@@ -326,8 +332,14 @@ def render_markdown_singlepage(step):
     if 'render_category_headers' not in step['module_options']:
         step['module_options']['render_category_headers'] = True
     for tag in tags:
+        if catalog is not None:
+            software_list = software_by_tag(catalog, tag['name'], primary_only=True,
+                                            exclude_licenses=step['module_options']['exclude_licenses'],
+                                            include_licenses=step['module_options']['include_licenses'])
         markdown_category = render_markdown_singlepage_category(step, tag, software_list)
         markdown_software_list = markdown_software_list + markdown_category
+    if catalog is not None:
+        catalog.close()
     markdown_licenses = render_markdown_licenses(step, licenses, back_to_top_url=step['module_options']['back_to_top_url'])
     markdown_toc_section = render_markdown_toc(
         markdown_header,
@@ -336,5 +348,4 @@ def render_markdown_singlepage(step):
         markdown_footer)
     markdown = '{}{}\n\n{}{}\n{}'.format(
         markdown_header, markdown_toc_section, markdown_software_list, markdown_licenses, markdown_footer)
-    with open(step['module_options']['output_directory'] + '/' + step['module_options']['output_file'], 'w+', encoding="utf-8") as outfile:
-        outfile.write(markdown)
+    write_file_if_changed(step['module_options']['output_directory'] + '/' + step['module_options']['output_file'], markdown)
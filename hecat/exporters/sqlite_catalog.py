@@ -0,0 +1,53 @@
+"""将软件/标签/平台/许可证数据编译为单个 SQLite 目录文件
+该文件按标签、平台、许可证、托管平台（provider）和最后更新日期建立索引，
+后续步骤（processors/awesome_lint、exporters/markdown_singlepage）可以通过 catalog_file 选项查询它，而不必重复扫描软件列表
+如果源文件在目录生成之后被修改，读取目录的步骤会报错退出，必须先重新运行此步骤
+
+# .hecat.yml
+steps:
+  - name: 编译 SQLite 目录
+    module: exporters/sqlite_catalog
+    module_options:
+      source_directory: tests/awesome-selfhosted-data # 数据所在目录的路径
+      output_file: tests/catalog.sqlite # (默认 SOURCE_DIRECTORY/catalog.sqlite) 输出 SQLite 文件的路径
+      licenses_files: # (默认 ['licenses.yml']) 包含许可证列表的文件路径
+        - licenses.yml
+        - licenses-nonfree.yml
+
+  - name: lint
+    module: processors/awesome_lint
+    module_options:
+      source_directory: tests/awesome-selfhosted-data
+      catalog_file: tests/catalog.sqlite
+
+源目录结构：
+├── software
+│   ├── mysoftware.yml
+│   └── ...
+├── platforms
+│   ├── python.yml
+│   └── ...
+├── tags
+│   ├── groupware.yml
+│   └── ...
+└── licenses.yml
+
+输出文件的表结构见 hecat/catalog.py（每一行的 data 列保存原始条目的 JSON 数据）：
+- software (id, file, name, description, website_url, source_code_url, demo_url, provider, updated_at, stargazers_count, archived, depends_3rdparty, data)
+- software_tags (software_id, tag, position), software_platforms (software_id, platform, position), software_licenses (software_id, license, position)
+- tags (name, data), platforms (name, data), licenses (identifier, name, url, source_file, data)
+
+$ sqlite3 tests/catalog.sqlite "SELECT s.name FROM software s JOIN software_tags t ON t.software_id = s.id WHERE t.tag = 'Wikis'"
+"""
+
+from ..catalog import build_catalog
+
+def render_sqlite_catalog(step):
+    """将源目录中的数据编译为 SQLite 目录文件"""
+    if 'output_file' not in step['module_options']:
+        step['module_options']['output_file'] = step['module_options']['source_directory'] + '/catalog.sqlite'
+    if 'licenses_files' not in step['module_options']:
+        step['module_options']['licenses_files'] = ['licenses.yml']
+    build_catalog(step['module_options']['source_directory'],
+                  step['module_options']['output_file'],
+                  licenses_files=step['module_options']['licenses_files'])
@@ -0,0 +1,73 @@
+"""hecat - shared HTTP client with keep-alive connection pools
+Network modules (processors/url_check, processors/software_metadata) send their requests through request(), which uses
+one requests.Session per host (scheme, host and port). Sessions are shared by all steps and threads of the run, so
+connections to the same host are reused instead of paying for a new TCP/TLS handshake on each request (for example the
+GraphQL requests sent to api.github.com). All requests are sent with the same User-Agent header.
+
+# .hecat.yml
+options:
+  http_pool_size: 10 # (default 10) maximum number of connections kept open to each host
+  http_user_agent: hecat/0.0.1 # (default hecat/0.0.1) User-Agent header sent with all HTTP requests
+"""
+import sys
+import logging
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_USER_AGENT = 'hecat/0.0.1'
+
+HTTP_OPTIONS = {
+    'pool_size': DEFAULT_POOL_SIZE,
+    'user_agent': DEFAULT_USER_AGENT
+}
+
+# (scheme, host:port): requests.Session
+SESSIONS = {}
+SESSIONS_LOCK = threading.Lock()
+
+def set_http_options(options):
+    """configure the HTTP client from the 'options' section of the configuration file
+    http_pool_size: maximum number of connections kept open to each host (default 10)
+    http_user_agent: User-Agent header sent with all requests (default hecat/0.0.1)"""
+    pool_size = options.get('http_pool_size', DEFAULT_POOL_SIZE)
+    if not isinstance(pool_size, int) or isinstance(pool_size, bool) or pool_size < 1:
+        logging.error('invalid value for http_pool_size: %s (must be a positive integer)', pool_size)
+        sys.exit(1)
+    HTTP_OPTIONS['pool_size'] = pool_size
+    HTTP_OPTIONS['user_agent'] = options.get('http_user_agent', DEFAULT_USER_AGENT)
+    close_sessions()
+
+def new_session():
+    """return a session whose connection pool keeps up to HTTP_OPTIONS['pool_size'] connections open"""
+    # requests is imported on first use, the CLI imports this module to configure it
+    import requests # pylint: disable=import-outside-toplevel
+    import requests.adapters # pylint: disable=import-outside-toplevel
+    session = requests.Session()
+    # requests to a host are sent by one session, other hosts are only reached through redirects
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_OPTIONS['pool_size'])
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = HTTP_OPTIONS['user_agent']
+    return session
+
+def get_session(url):
+    """return the session used for requests to the host of url, create it on first use"""
+    parts = urlsplit(url)
+    key = (parts.scheme.lower(), parts.netloc.lower())
+    with SESSIONS_LOCK:
+        if key not in SESSIONS:
+            SESSIONS[key] = new_session()
+        return SESSIONS[key]
+
+def request(method, url, **kwargs):
+    """send a request with the session of the host of url, keyword arguments are passed to requests.Session.request()
+    the response must be closed (or its content read) for the connection to be returned to the pool"""
+    return get_session(url).request(method, url, **kwargs)
+
+def close_sessions():
+    """close all sessions and their connections"""
+    with SESSIONS_LOCK:
+        for session in SESSIONS.values():
+            session.close()
+        SESSIONS.clear()
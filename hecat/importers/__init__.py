@@ -1,3 +1,19 @@
 """awesome list markdown importer"""
-from .markdown_awesome import import_markdown_awesome
-from .shaarli_api import import_shaarli_json
+import importlib
+
+# function name: submodule, functions are imported on first access (PEP 562) so that importing this package does
+# not import the dependencies of all importers
+FUNCTIONS = {
+    'import_markdown_awesome': 'markdown_awesome',
+    'import_shaarli_json': 'shaarli_api',
+}
+
+def __getattr__(name):
+    """import the submodule providing the function name on first access"""
+    if name not in FUNCTIONS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    function = getattr(importlib.import_module('.' + FUNCTIONS[name], __name__), name)
+    globals()[name] = function
+    return function
+
+__all__ = list(FUNCTIONS)
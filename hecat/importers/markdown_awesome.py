@@ -44,6 +44,7 @@ import logging
 import re
 import ruamel.yaml
 from ..utils import list_files, to_kebab_case
+from .. import dataset
 
 yaml = ruamel.yaml.YAML()
 yaml.indent(sequence=4, offset=2)
@@ -250,4 +251,5 @@ def import_markdown_awesome(step):
     yaml_software_files = list_files(step['module_options']['output_directory'] + '/software')
     import_platforms(yaml_software_files, step)
     import_licenses(step)
+    dataset.invalidate(step['module_options']['output_directory'])
     
\ No newline at end of file
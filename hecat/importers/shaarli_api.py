@@ -15,24 +15,49 @@ steps:
       clean_removed: False # (default False) remove items from the output file, whose 'url:' was not found in the input file
       sort_by: created # (default 'created') key by which to sort the output list
       sort_reverse: True # (default True) sort the output list in reverse order
+      shard_size: 1000 # (default 1000) when output_file is a directory, number of ids per shard file
+
+output_file may be an existing directory, in which case items are stored in one YAML file per range of
+shard_size ids (00000000.yml, 00000001.yml...). Other modules (processors/download_media,
+processors/archive_webpages, exporters/html_table...) read and write this sharded layout transparently,
+and only rewrite the shard containing an updated item.
 
 Source directory structure:
 └── shaarli.json
 
 Output directory structure:
 └── shaarli.yml
+
+Output directory structure (sharded):
+├── shaarli.d/
+│   ├── 00000000.yml # items with ids 0-999
+│   ├── 00000001.yml # items with ids 1000-1999
+│   └── ...
+└── shaarli.d.order # order of items (sort_by/sort_reverse), restored when loading the directory
 """
 
 import os
 import logging
 import json
 import ruamel.yaml
-from ..utils import load_yaml_data
+from ..utils import load_yaml_data, write_data_shards, discard_journal, DEFAULT_SHARD_SIZE
+from .. import dataset
 
 yaml = ruamel.yaml.YAML()
 yaml.indent(sequence=2, offset=0)
 yaml.width = 99999
 
+def write_output_file(step, items):
+    """write items to the output file, or to shard files if the output file is a directory"""
+    if os.path.isdir(step['module_options']['output_file']):
+        write_data_shards(step['module_options']['output_file'], items, step['module_options'].get('shard_size', DEFAULT_SHARD_SIZE))
+    else:
+        with open(step['module_options']['output_file'], 'w+', encoding="utf-8") as yaml_file:
+            logging.info('writing file %s', step['module_options']['output_file'])
+            yaml.dump(items, yaml_file)
+    # pending changes of processors were loaded with the existing data (skip_existing), or are replaced by the new import
+    discard_journal(step['module_options']['output_file'])
+
 def import_shaarli_json(step):
     """Import data from the JSON output of Shaarli API"""
     if 'skip_existing' not in step['module_options']:
@@ -54,9 +79,7 @@ def import_shaarli_json(step):
         final_data = sorted(list(previous_data.values()),
                             key=lambda x: x[step['module_options']['sort_by']],
                             reverse=step['module_options']['sort_reverse'])
-        with open(step['module_options']['output_file'], 'w+', encoding="utf-8") as yaml_file:
-            logging.info('writing file %s', step['module_options']['output_file'])
-            yaml.dump(final_data, yaml_file)
+        write_output_file(step, final_data)
         logging.info('checking for URLs that are present in the output file, but not in the source file')
         items_were_removed = False
         for final_item in final_data:
@@ -68,10 +91,7 @@ def import_shaarli_json(step):
                 else:
                     logging.warning('item with URL %s not found in %s. Consider deleting it manually or using clean_removed: True.', final_item['url'], step['module_options']['source_file'])
         if step['module_options']['clean_removed'] and items_were_removed:
-            with open(step['module_options']['output_file'], 'w+', encoding="utf-8") as yaml_file:
-                logging.info('writing file %s', step['module_options']['output_file'])
-                yaml.dump(final_data, yaml_file)
+            write_output_file(step, final_data)
     else:
-        with open(step['module_options']['output_file'], 'w+', encoding="utf-8") as yaml_file:
-            logging.debug('writing file %s', step['module_options']['output_file'])
-            yaml.dump(new_data, yaml_file)
+        write_output_file(step, new_data)
+    dataset.invalidate(step['module_options']['output_file'])
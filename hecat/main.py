@@ -2,11 +2,21 @@
 import sys
 import argparse
 import logging
-from .utils import load_yaml_data
-from .importers import import_markdown_awesome, import_shaarli_json
-from .processors import software_metadata, awesome_lint, check_urls, download_media, archive_webpages
-from .exporters import render_markdown_singlepage, render_html_table
-from .exporters import render_markdown_multipage
+import functools
+import copy
+import time
+import contextlib
+from .utils import load_yaml_data, set_load_options
+from .http_client import set_http_options, close_sessions
+from . import dataset
+from .scheduler import run_steps
+from .registry import load_module
+from .profiling import StepProfiler
+from .memory import StepMemoryTracker
+from . import metrics
+from . import tracing
+from .state import StepState, DEFAULT_STATE_FILE
+from .watch import watch
 
 LOG_FORMAT = "%(levelname)s:%(filename)s: %(message)s"
 LOG_LEVEL_MAPPING = {
@@ -16,12 +26,52 @@ LOG_LEVEL_MAPPING = {
                     'ERROR': logging.ERROR,
                     }
 
+def run_step(step, instruments=(), state=None):
+    """使用步骤配置的模块执行单个步骤
+    instruments: 上下文管理器工厂列表，以 step 为参数调用，在步骤执行期间保持进入状态（例如性能分析）
+    state: StepState，如果步骤已在恢复的运行中完成，或自上次成功运行以来步骤的输入、选项和输出没有变化，则跳过该步骤
+    """
+    module = load_module(step['module'])
+    if module is None:
+        logging.error('步骤 %s：未知模块 %s', step['name'], step['module'])
+        sys.exit(1)
+    state_key = None
+    if state is not None:
+        if state.begin_step(step):
+            logging.info('跳过步骤 %s：已在被中断的运行中完成', step['name'])
+            return
+        up_to_date, state_key = state.check(step, module)
+        if up_to_date:
+            logging.info('跳过步骤 %s：自上次成功运行以来输入和输出没有变化（使用 --force 强制执行）', step['name'])
+            state.complete_step(step)
+            return
+    logging.info('执行步骤 %s', step['name'])
+    with contextlib.ExitStack() as stack:
+        for instrument in instruments:
+            stack.enter_context(instrument(step))
+        module(step)
+    if state is not None:
+        if state_key is not None:
+            state.record(step, state_key)
+        state.complete_step(step)
+
 def main():
     """主循环"""
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', dest='config_file', type=str, default='.hecat.yml', help='配置文件（默认 .hecat.yml）')
     parser.add_argument('--log-level', dest='log_level', type=str, default='INFO', help='日志级别（默认 INFO）', choices=['ERROR', 'WARNING', 'INFO', 'DEBUG'])
     parser.add_argument('--log-file', dest='log_file', type=str, default=None, help='日志文件（默认无）')
+    parser.add_argument('--force', dest='force', action='store_true', help='执行所有步骤，即使它们的输入和输出自上次成功运行以来没有变化')
+    parser.add_argument('--resume', dest='resume', action='store_true', help='继续被中断或失败的运行：跳过已完成的步骤，可恢复的步骤（software_metadata）从中断处继续')
+    parser.add_argument('--watch', dest='watch', action='store_true', help='执行所有步骤后监视导入器/导出器的输入文件，在文件更改时重新执行受影响的步骤（Ctrl+C 停止）')
+    parser.add_argument('--watch-interval', dest='watch_interval', type=float, default=1.0, help='--watch 检查文件更改的间隔秒数（默认 1）')
+    parser.add_argument('--profile', dest='profile', action='store_true', help='使用 cProfile 分析每个步骤，将统计数据写入 .pstats 文件并记录累计时间最高的函数')
+    parser.add_argument('--profile-directory', dest='profile_directory', type=str, default='hecat-profile', help='.pstats 文件的输出目录（默认 hecat-profile）')
+    parser.add_argument('--profile-top', dest='profile_top', type=int, default=20, help='每个步骤记录的函数数量（默认 20）')
+    parser.add_argument('--memory-report', dest='memory_report', type=str, default=None, help='记录每个步骤的峰值 RSS 和最大内存分配位置（tracemalloc），在运行结束时记录摘要并将报告以 JSON 格式写入此文件（默认无）')
+    parser.add_argument('--memory-top', dest='memory_top', type=int, default=10, help='每个步骤报告的内存分配位置数量（默认 10）')
+    parser.add_argument('--trace', dest='trace_file', type=str, default=None, help='将步骤、GraphQL 批次、HTTP 请求和子进程的时间线以 Chrome trace event JSON 格式写入此文件，可在 Perfetto 中查看（默认无）')
+    parser.add_argument('--metrics-file', dest='metrics_file', type=str, default=None, help='在运行结束时将步骤指标（持续时间、项目计数、HTTP 请求、GraphQL 速率限制）以 OpenMetrics 文本格式写入此文件，供 node_exporter textfile 收集器使用（默认无）')
     args = parser.parse_args()
     if args.log_file is not None:
         logging_handlers = [ logging.FileHandler(args.log_file), logging.StreamHandler() ]
@@ -29,31 +79,70 @@ def main():
         logging_handlers = [ logging.StreamHandler() ]
     logging.basicConfig(level=LOG_LEVEL_MAPPING.get(args.log_level), format=LOG_FORMAT, handlers = logging_handlers)
     config = load_yaml_data(args.config_file)
-    for step in config['steps']:
-        logging.info('执行步骤 %s', step['name'])
-        if step['module'] == 'importers/markdown_awesome':
-            import_markdown_awesome(step)
-        elif step['module'] == 'importers/shaarli_api':
-            import_shaarli_json(step)
-        elif step['module'] == 'processors/software_metadata':
-            software_metadata(step)
-        elif step['module'] == 'processors/awesome_lint':
-            awesome_lint(step)
-        elif step['module'] == 'processors/url_check':
-            check_urls(step)
-        elif step['module'] == 'processors/archive_webpages':
-            archive_webpages(step)
-        elif step['module'] == 'processors/download_media':
-            download_media(step)
-        elif step['module'] == 'exporters/markdown_singlepage':
-            render_markdown_singlepage(step)
-        elif step['module'] == 'exporters/html_table':
-            render_html_table(step)
-        elif step['module'] == 'exporters/markdown_multipage':
-            render_markdown_multipage(step)
-        else:
-            logging.error('步骤 %s：未知模块 %s', step['name'], step['module'])
-            sys.exit(1)
+    options = config.get('options') or {}
+    set_load_options(options)
+    set_http_options(options)
+    if options.get('share_data', False):
+        dataset.enable()
+    max_parallel_steps = options.get('max_parallel_steps', 1)
+    if args.watch and not options.get('incremental', False):
+        logging.error('--watch 需要启用 incremental 全局选项')
+        sys.exit(1)
+    state = StepState(options.get('state_file', DEFAULT_STATE_FILE), force=args.force, incremental=options.get('incremental', False))
+    state.activate()
+    instruments = []
+    if args.profile:
+        instruments.append(StepProfiler(args.profile_directory, top=args.profile_top))
+    memory_tracker = None
+    if args.memory_report:
+        memory_tracker = StepMemoryTracker(args.memory_report, top=args.memory_top)
+        instruments.append(memory_tracker)
+    if instruments and max_parallel_steps != 1:
+        logging.warning('使用 --profile/--memory-report 时按顺序执行步骤（忽略 max_parallel_steps）')
+        max_parallel_steps = 1
+    metrics_store = None
+    if args.metrics_file:
+        metrics_store = metrics.enable()
+        instruments.append(metrics.StepMetrics(metrics_store))
+    tracer = None
+    if args.trace_file:
+        tracer = tracing.enable()
+        instruments.append(tracing.StepTracer())
+    # 模块会向 module_options 添加默认值，--watch 使用配置的原始副本
+    steps = copy.deepcopy(config['steps'])
+    step_runner = functools.partial(run_step, instruments=instruments, state=state)
+
+    def run_pipeline(pipeline_steps, resume=False):
+        """执行所有步骤，记录运行进度直到所有步骤完成"""
+        state.start_run(resume=resume)
+        run_steps(pipeline_steps, step_runner, max_parallel_steps=max_parallel_steps)
+        state.finish_run()
+
+    success = False
+    try:
+        run_pipeline(config['steps'], resume=args.resume)
+        if args.watch:
+            # 后续运行中 --force 不再适用，只执行输入已更改的步骤
+            state.force = False
+            # hecat 自己写入的文件不触发新的运行
+            watch(steps, run_pipeline, interval=args.watch_interval,
+                  ignored=[state.state_file, args.metrics_file, args.trace_file, args.log_file, args.memory_report])
+        success = True
+    finally:
+        # 运行失败或被中断时保存步骤进度，以便使用 --resume 继续
+        if not success:
+            state.write()
+        close_sessions()
+        if memory_tracker is not None:
+            memory_tracker.report()
+        if metrics_store is not None:
+            metrics_store.set('hecat_run_success', success, ())
+            metrics_store.set('hecat_run_timestamp_seconds', round(time.time(), 3), ())
+            metrics_store.write(args.metrics_file)
+            logging.info('指标已写入 %s', args.metrics_file)
+        if tracer is not None:
+            tracer.write(args.trace_file)
+            logging.info('跟踪已写入 %s', args.trace_file)
     logging.info('所有步骤已完成')
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""hecat - per-step memory accounting (hecat --memory-report FILE)
+For each step, record:
+- the peak resident set size (RSS) of the process during the step. On Linux the peak is reset before each step
+  (/proc/self/clear_refs) and read from /proc/self/status (VmHWM). Elsewhere, the peak RSS of the process since it
+  started is reported (resource.getrusage()), it only grows from one step to the next
+- the peak size of memory blocks allocated by Python during the step, and the source lines which allocated the most
+  memory still in use at the end of the step (tracemalloc)
+A summary is logged at the end of the run, and the full report is written to FILE in JSON format.
+"""
+import sys
+import json
+import time
+import logging
+import tracemalloc
+import contextlib
+
+try:
+    import resource
+except ImportError: # windows
+    resource = None
+
+def reset_peak_rss():
+    """reset the peak RSS of the process if supported, return True on success"""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='utf-8') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss():
+    """return the peak RSS of the process in bytes and the source of the measurement, or (None, None)"""
+    try:
+        with open('/proc/self/status', 'r', encoding='utf-8') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024, 'VmHWM'
+    except OSError:
+        pass
+    if resource is not None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+        return (maxrss if sys.platform == 'darwin' else maxrss * 1024), 'ru_maxrss'
+    return None, None
+
+def children_peak_rss():
+    """return the largest peak RSS of terminated child processes in bytes (wget, yt-dlp, load_workers...), or None"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+def to_mib(size):
+    """format a size in bytes as MiB"""
+    return 'n/a' if size is None else '{:.1f} MiB'.format(size / 1048576)
+
+class StepMemoryTracker:
+    """context manager factory recording memory usage of each step it is called with"""
+    def __init__(self, report_file, top=10, frames=1):
+        self.report_file = report_file
+        self.top = top
+        self.frames = frames
+        self.steps = []
+
+    @contextlib.contextmanager
+    def __call__(self, step):
+        peak_reset = reset_peak_rss()
+        tracemalloc.start(self.frames)
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - start_time
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')))
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rss, rss_source = peak_rss()
+            if rss_source == 'VmHWM' and not peak_reset:
+                rss_source = 'VmHWM (since process start)'
+            self.steps.append({
+                'name': step['name'],
+                'module': step['module'],
+                'duration_seconds': round(duration, 3),
+                'peak_rss_bytes': rss,
+                'peak_rss_source': rss_source,
+                'children_peak_rss_bytes': children_peak_rss(),
+                'traced_peak_bytes': traced_peak,
+                'traced_current_bytes': traced_current,
+                'top_allocations': [{
+                    'file': statistic.traceback[0].filename,
+                    'line': statistic.traceback[0].lineno,
+                    'size_bytes': statistic.size,
+                    'count': statistic.count,
+                } for statistic in snapshot.statistics('lineno')[:self.top]],
+            })
+            logging.info('step %s: peak RSS %s, peak Python allocations %s', step['name'], to_mib(rss), to_mib(traced_peak))
+
+    def report(self):
+        """log a summary of memory usage by step, write the full report to the report file"""
+        for step in self.steps:
+            top_allocations = '\n'.join('    {}:{}: {} ({} blocks)'.format(
+                allocation['file'], allocation['line'], to_mib(allocation['size_bytes']), allocation['count'])
+                for allocation in step['top_allocations'])
+            logging.info('memory usage of step %s (%s): peak RSS %s, peak Python allocations %s, still allocated at the end of the step %s, top allocation sites:\n%s',
+                         step['name'], step['module'], to_mib(step['peak_rss_bytes']), to_mib(step['traced_peak_bytes']),
+                         to_mib(step['traced_current_bytes']), top_allocations)
+        with open(self.report_file, 'w', encoding='utf-8') as report_file:
+            json.dump({'steps': self.steps}, report_file, indent=2)
+        logging.info('memory report written to %s', self.report_file)
@@ -0,0 +1,178 @@
+"""hecat - step metrics in OpenMetrics text format (hecat --metrics-file FILE)
+The file can be collected by the Prometheus node_exporter textfile collector
+(https://github.com/prometheus/node_exporter#textfile-collector), it is written atomically at the end of the run.
+Values describe the last run, all metrics are gauges or summaries:
+- hecat_run_timestamp_seconds, hecat_run_success: end time and result of the run
+- hecat_step_duration_seconds{step,module}, hecat_step_success{step,module}: duration and result of each step
+- hecat_step_items{step,module,result}: number of items processed by the step, by result (success/skipped/error)
+- hecat_http_requests{step,module,method,code}: number of HTTP requests by method and status code (or 'error')
+- hecat_http_request_duration_seconds{step,module,method}: summary of HTTP request durations
+- hecat_graphql_rate_limit_{limit,remaining,used,reset_timestamp_seconds}{step,module,api}: rate limit headers of the
+  last GraphQL API response
+Modules record metrics with the functions below, which do nothing when metrics are disabled. The step and module
+labels are added automatically from the step currently running in the calling thread.
+"""
+import os
+import time
+import threading
+import contextlib
+import contextvars
+from urllib.parse import urlparse
+
+FAMILIES = {
+    'hecat_run_timestamp_seconds': ('gauge', 'Time at which the last hecat run ended'),
+    'hecat_run_success': ('gauge', 'Whether all steps of the last hecat run completed successfully'),
+    'hecat_step_duration_seconds': ('gauge', 'Duration of the step'),
+    'hecat_step_success': ('gauge', 'Whether the step completed successfully'),
+    'hecat_step_items': ('gauge', 'Number of items processed by the step, by result'),
+    'hecat_http_requests': ('gauge', 'Number of HTTP requests sent by the step, by method and status code'),
+    'hecat_http_request_duration_seconds': ('summary', 'Duration of HTTP requests sent by the step'),
+    'hecat_graphql_rate_limit_limit': ('gauge', 'Rate limit of the GraphQL API (last response)'),
+    'hecat_graphql_rate_limit_remaining': ('gauge', 'Remaining GraphQL API requests/points in the current rate limit window (last response)'),
+    'hecat_graphql_rate_limit_used': ('gauge', 'Used GraphQL API requests/points in the current rate limit window (last response)'),
+    'hecat_graphql_rate_limit_reset_timestamp_seconds': ('gauge', 'Time at which the GraphQL API rate limit window resets (last response)'),
+}
+
+# configuration of the step running in the current thread
+CURRENT_STEP = contextvars.ContextVar('hecat_current_step', default=None)
+
+class Metrics:
+    """thread-safe store of metric values, keyed by metric name and labels"""
+    def __init__(self):
+        self.values = {}
+        self.summaries = {}
+        self.lock = threading.Lock()
+
+    def set(self, name, value, labels):
+        """set the value of a gauge"""
+        with self.lock:
+            self.values[(name, labels)] = value
+
+    def add(self, name, value, labels):
+        """increment the value of a gauge"""
+        with self.lock:
+            self.values[(name, labels)] = self.values.get((name, labels), 0) + value
+
+    def observe(self, name, value, labels):
+        """add an observation to a summary"""
+        with self.lock:
+            count, total = self.summaries.get((name, labels), (0, 0))
+            self.summaries[(name, labels)] = (count + 1, total + value)
+
+    def render(self):
+        """return metrics in OpenMetrics text format"""
+        lines = []
+        with self.lock:
+            for name, (metric_type, description) in FAMILIES.items():
+                samples = []
+                for (sample_name, labels), value in sorted(self.values.items()):
+                    if sample_name == name:
+                        samples.append('{}{} {}'.format(name, format_labels(labels), format_value(value)))
+                for (sample_name, labels), (count, total) in sorted(self.summaries.items()):
+                    if sample_name == name:
+                        samples.append('{}_count{} {}'.format(name, format_labels(labels), count))
+                        samples.append('{}_sum{} {}'.format(name, format_labels(labels), format_value(total)))
+                if samples:
+                    lines.append('# TYPE {} {}'.format(name, metric_type))
+                    lines.append('# HELP {} {}'.format(name, description))
+                    lines.extend(samples)
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """write metrics to path atomically (temporary file + rename)"""
+        temp_file = path + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(self.render())
+        os.replace(temp_file, path)
+
+def format_labels(labels):
+    """format a tuple of (name, value) pairs as OpenMetrics labels"""
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                          for name, value in labels) + '}'
+
+def format_value(value):
+    """format a number as an OpenMetrics value"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+# the metrics of the current run, None when metrics are disabled
+METRICS = {'current': None}
+
+def enable():
+    """start recording metrics"""
+    METRICS['current'] = Metrics()
+    return METRICS['current']
+
+def current():
+    """return the active metrics store, or None"""
+    return METRICS['current']
+
+def step_labels(labels):
+    """return labels as a sorted tuple of (name, string value), with the name and module of the current step
+    values are converted to strings so that samples with different label value types can be sorted together"""
+    step = CURRENT_STEP.get()
+    if step is not None:
+        labels.setdefault('step', step['name'])
+        labels.setdefault('module', step['module'])
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def set_value(name, value, **labels):
+    """set a gauge"""
+    if METRICS['current'] is not None:
+        METRICS['current'].set(name, value, step_labels(labels))
+
+def add(name, value=1, **labels):
+    """increment a gauge"""
+    if METRICS['current'] is not None:
+        METRICS['current'].add(name, value, step_labels(labels))
+
+def observe(name, value, **labels):
+    """add an observation to a summary"""
+    if METRICS['current'] is not None:
+        METRICS['current'].observe(name, value, step_labels(labels))
+
+def record_items(success=0, skipped=0, error=0):
+    """record the number of items processed by the current step, by result"""
+    for result, count in (('success', success), ('skipped', skipped), ('error', error)):
+        set_value('hecat_step_items', count, result=result)
+
+def record_http_request(method, status, seconds):
+    """record an HTTP request, status is the HTTP status code or None if the request failed"""
+    add('hecat_http_requests', method=method, code=str(status) if status is not None else 'error')
+    observe('hecat_http_request_duration_seconds', seconds, method=method)
+
+def record_rate_limit(graphql_api, limit, remaining, used, reset):
+    """record rate limit headers of a GraphQL API response, values of -1 (header not present) are ignored"""
+    api = urlparse(graphql_api).hostname
+    for name, value in (('limit', limit), ('remaining', remaining), ('used', used), ('reset_timestamp_seconds', reset)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if value >= 0:
+            set_value('hecat_graphql_rate_limit_' + name, value, api=api)
+
+class StepMetrics:
+    """context manager factory recording the duration and result of each step it is called with"""
+    def __init__(self, metrics_store):
+        self.metrics = metrics_store
+
+    @contextlib.contextmanager
+    def __call__(self, step):
+        token = CURRENT_STEP.set(step)
+        labels = (('module', step['module']), ('step', step['name']))
+        start_time = time.monotonic()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            self.metrics.set('hecat_step_duration_seconds', round(time.monotonic() - start_time, 3), labels)
+            self.metrics.set('hecat_step_success', success, labels)
+            CURRENT_STEP.reset(token)
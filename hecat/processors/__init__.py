@@ -1,6 +1,36 @@
 """processors"""
-from .software_metadata import software_metadata
-from .awesome_lint import awesome_lint
-from .download_media import download_media
-from .url_check import check_urls
-from .archive_webpages import archive_webpages
+import sys
+import types
+import importlib
+
+# function name: submodule, functions are imported on first access (PEP 562) so that importing this package does
+# not import the dependencies of all processors
+FUNCTIONS = {
+    'software_metadata': 'software_metadata',
+    'awesome_lint': 'awesome_lint',
+    'download_media': 'download_media',
+    'check_urls': 'url_check',
+    'archive_webpages': 'archive_webpages',
+}
+
+def __getattr__(name):
+    """import the submodule providing the function name on first access"""
+    if name not in FUNCTIONS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    function = getattr(importlib.import_module('.' + FUNCTIONS[name], __name__), name)
+    globals()[name] = function
+    return function
+
+class ProcessorsPackage(types.ModuleType):
+    """most processor functions are named after their submodule: importing the submodule (import
+    hecat.processors.awesome_lint) sets the package attribute to the submodule, it is replaced by the function so that
+    `from hecat.processors import awesome_lint` always returns the function, as when all submodules were imported by
+    this package"""
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and FUNCTIONS.get(name) == name:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = ProcessorsPackage
+
+__all__ = list(FUNCTIONS)
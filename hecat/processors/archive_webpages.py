@@ -32,6 +32,9 @@ steps:
       clean_excluded: True # (default False) remove existing archived pages matching exclude_regex
       skip_failed: False # (default False) don't attempt to archive items for which the previous archival attempt failed (archive_error: True)
       wget_errors_are_fatal: True # (default False) exit immediately if a wget download error occurs
+      checkpoint: rewrite # (rewrite/journal, default rewrite) rewrite the whole data file after each item, or append changes to DATA_FILE.journal and rewrite the data file periodically/at the end (journal is ignored when data_file is a sharded directory)
+      journal_compact_every: 100 # (default 100) with checkpoint: journal, rewrite the data file after this number of changes
+      shard_size: 1000 # (default 1000) when data_file is a sharded directory (see importers/shaarli_api), number of ids per shard file
 
 # $ hecat --config tests/.hecat.archive_webpages.yml
 
@@ -81,7 +84,9 @@ import shutil
 from pathlib import Path
 from urllib.parse import urlparse, unquote, quote
 import ruamel.yaml
-from ..utils import load_yaml_data, write_data_file
+from ..utils import load_yaml_data, checkpoint_item, flush_checkpoints
+from .. import metrics
+from .. import tracing
 
 # Constants
 DEFAULT_WGET_TIMEOUT = 30
@@ -117,7 +122,9 @@ def wget(step, item, wget_output_directory):
                                    stdout=sys.stdout,
                                    stderr=sys.stderr,
                                    universal_newlines=True)
-    wget_process.communicate()
+    with tracing.span('wget ' + item['url'], 'subprocess', pid=wget_process.pid) as span_args:
+        wget_process.communicate()
+        span_args['returncode'] = wget_process.returncode
     archive_relative_path = wget_output_path(item, wget_output_directory)
     if archive_relative_path is not None:
         local_archive_path = quote(str(item['id']) + '/' + archive_relative_path)
@@ -301,7 +308,7 @@ def process_single_item(step, item, local_archive_dir, items):
         item['archive_error'] = True
         success, error = False, True
 
-    write_data_file(step, items)  # Checkpoint after processing
+    checkpoint_item(step, items, item)  # Checkpoint after processing
     return (success, error)
 
 
@@ -354,7 +361,9 @@ def archive_webpages(step):
                     logging.debug('skipping %s (id %s): no tags matching only_tags', item['url'], item['id'])
                 skipped_count += 1
 
+    flush_checkpoints(step, items)
     cleanup_removed_archives(step['module_options']['output_directory'], items,
                             step['module_options']['clean_removed'])
 
     logging.info('processing complete. Downloaded: %s - Skipped: %s - Errors %s', downloaded_count, skipped_count, error_count)
+    metrics.record_items(success=downloaded_count, skipped=skipped_count, error=error_count)
@@ -21,6 +21,7 @@ steps:
         - https://github.com/knrdl/bicimon # 简单/无需维护
         - https://github.com/Kshitij-Banerjee/Cubiks-2048 # 简单/无需维护
       platforms_required_fields: ['description'] # (可选，默认 ['description']) 所有平台必须定义的属性
+      catalog_file: tests/catalog.sqlite # (可选，默认无) 由 exporters/sqlite_catalog 步骤生成的 SQLite 目录，用于统计每个标签的项目数量，而不是扫描软件列表
 
 
 source_directory: 数据所在目录的路径。目录结构：
@@ -46,6 +47,7 @@ import logging
 import sys
 from datetime import datetime, timedelta
 from ..utils import load_yaml_data, to_kebab_case
+from ..catalog import open_catalog, count_software_by_tag
 
 SOFTWARE_REQUIRED_FIELDS = ['description', 'website_url', 'source_code_url', 'licenses', 'tags']
 SOFTWARE_REQUIRED_LISTS = ['licenses', 'tags']
@@ -120,12 +122,17 @@ def check_attribute_in_list(item, attribute_name, key, attributes_list, errors):
                 message = "{}: {} {} 未列在主 {} 列表中".format(item['name'], attribute_name, attr, attribute_name)
                 log_exception(message, errors)
 
-def check_tag_has_at_least_items(tag, software_list, tags_with_redirect, errors, min_items=3):
-    """检查一个标签是否至少有 N 个软件项目与之关联"""
-    tag_items_count = 0
-    for software in software_list:
-        if tag['name'] in software['tags']:
-            tag_items_count += 1
+def check_tag_has_at_least_items(tag, software_list, tags_with_redirect, errors, min_items=3, tags_items_count=None):
+    """检查一个标签是否至少有 N 个软件项目与之关联
+    如果提供了 tags_items_count（{标签名称: 项目数量}，例如来自 SQLite 目录），则不扫描 software_list
+    """
+    if tags_items_count is not None:
+        tag_items_count = tags_items_count.get(tag['name'], 0)
+    else:
+        tag_items_count = 0
+        for software in software_list:
+            if tag['name'] in software['tags']:
+                tag_items_count += 1
     try:
         assert tag_items_count >= min_items
         logging.debug('%s 个项目标记为 %s', tag_items_count, tag['name'])
@@ -205,7 +212,7 @@ def check_filename_is_kebab_case_software_name(filename, single_yaml_data, error
 def awesome_lint(step):
     """根据格式指南检查所有软件条目"""
     logging.info('根据格式指南检查软件条目/标签。')
-    software_list = load_yaml_data(step['module_options']['source_directory'] + '/software')
+    software_list = load_yaml_data(step['module_options']['source_directory'] + '/software', read_only=True)
     if 'last_updated_info_days' not in step['module_options']:
         step['module_options']['last_updated_info_days'] = 186
     if 'last_updated_warn_days' not in step['module_options']:
@@ -220,18 +227,23 @@ def awesome_lint(step):
         step['module_options']['platforms_required_fields'] = ['description']
     licenses_list = []
     for filename in step['module_options']['licenses_files']:
-        licenses_list = licenses_list + load_yaml_data(step['module_options']['source_directory'] + '/' + filename)
-    tags_list = load_yaml_data(step['module_options']['source_directory'] + '/tags')
+        licenses_list = licenses_list + load_yaml_data(step['module_options']['source_directory'] + '/' + filename, read_only=True)
+    tags_list = load_yaml_data(step['module_options']['source_directory'] + '/tags', read_only=True)
     tags_with_redirect = []
     for tag in tags_list:
         if 'redirect' in tag and tag['redirect']:
             tags_with_redirect.append(tag['name'])
-    platforms_list = load_yaml_data(step['module_options']['source_directory'] + '/platforms')
+    platforms_list = load_yaml_data(step['module_options']['source_directory'] + '/platforms', read_only=True)
+    tags_items_count = None
+    if step['module_options'].get('catalog_file'):
+        catalog = open_catalog(step['module_options']['catalog_file'])
+        tags_items_count = count_software_by_tag(catalog)
+        catalog.close()
     errors = []
     for tag in tags_list:
         check_attribute_in_list(tag, 'related_tags', 'name', tags_list, errors)
         check_required_fields(tag, errors, required_fields=TAGS_REQUIRED_FIELDS, severity=logging.warning)
-        check_tag_has_at_least_items(tag, software_list, tags_with_redirect, errors, min_items=3)
+        check_tag_has_at_least_items(tag, software_list, tags_with_redirect, errors, min_items=3, tags_items_count=tags_items_count)
     for platform in platforms_list:
         check_required_fields(platform, errors, required_fields=step['module_options']['platforms_required_fields'])
     for software in software_list:
@@ -249,7 +261,7 @@ def awesome_lint(step):
         check_required_fields(license, errors, required_fields=LICENSES_REQUIRED_FIELDS)
     for (root, dirs, files) in os.walk(step['module_options']['source_directory'] + '/software'):
         for filename in files:
-            single_yaml_data = load_yaml_data(os.path.join(root, filename))
+            single_yaml_data = load_yaml_data(os.path.join(root, filename), read_only=True)
             check_filename_is_kebab_case_software_name(filename, single_yaml_data, errors)
     if errors:
         logging.error("处理过程中出现错误")
@@ -20,6 +20,9 @@ steps:
       only_audio: False # (default False) download the 'bestaudio' format instead of the default 'best'
       use_download_archive: True # (default True) use a yt-dlp archive file to record downloaded items, skip them if already downloaded
       abort_on_first_error: False # (default False) abort immediately if a download error occurs (before writing to the data file)
+      checkpoint: rewrite # (rewrite/journal, default rewrite) rewrite the whole data file after each item, or append changes to DATA_FILE.journal and rewrite the data file periodically/at the end (journal is ignored when data_file is a sharded directory)
+      journal_compact_every: 100 # (default 100) with checkpoint: journal, rewrite the data file after this number of changes
+      shard_size: 1000 # (default 1000) when data_file is a sharded directory (see importers/shaarli_api), number of ids per shard file
 
 # $ cat tests/.hecat.download_audio.yml
 steps:
@@ -56,11 +59,12 @@ steps:
 └── tests/video/Philipp_Hagemeister - youtube-dl_test_video_a - youtube-BaW_jenozKc.en.vtt
 """
 
-import time
 import logging
 import ruamel.yaml
 import yt_dlp
-from ..utils import load_yaml_data, write_data_file
+from ..utils import load_yaml_data, iter_yaml_items, checkpoint_item, flush_checkpoints
+from .. import metrics
+from .. import tracing
 
 yaml = ruamel.yaml.YAML()
 yaml.indent(sequence=2, offset=0)
@@ -144,7 +148,7 @@ def download_single_item(item, items, ydl_opts, filename_key, error_key, step, a
     """Download a single media item using yt-dlp and update the data file.
 
     Updates the item dict in-place with the downloaded filename or error message,
-    then writes the updated items list back to the data file.
+    then saves the updated item to the data file (see utils.checkpoint_item).
 
     Args:
         item: Item dict to download (updated in-place)
@@ -169,7 +173,8 @@ def download_single_item(item, items, ydl_opts, filename_key, error_key, step, a
     for attempt in range(max_retries + 1):
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(item['url'], download=True)
+                with tracing.span('yt-dlp ' + item['url'], 'subprocess', attempt=attempt + 1):
+                    info = ydl.extract_info(item['url'], download=True)
                 if info is not None:
                     # TODO does not get the real, final filename after audio extraction
                     # https://github.com/ytdl-org/youtube-dl/issues/5710
@@ -178,7 +183,7 @@ def download_single_item(item, items, ydl_opts, filename_key, error_key, step, a
                     # Update item directly (it's a reference to the dict in items list)
                     item[filename_key] = outpath
                     item.pop(error_key, None)
-                    write_data_file(step, items)
+                    checkpoint_item(step, items, item)
                     return True, None
                 else:
                     error_message = "No info returned from yt-dlp"
@@ -186,7 +191,7 @@ def download_single_item(item, items, ydl_opts, filename_key, error_key, step, a
                     if abort_on_error:
                         raise Exception(error_message)
                     item[error_key] = error_message
-                    write_data_file(step, items)
+                    checkpoint_item(step, items, item)
                     return False, error_message # Don't retry, just return
 
         except yt_dlp.utils.DownloadError as e:
@@ -195,7 +200,7 @@ def download_single_item(item, items, ydl_opts, filename_key, error_key, step, a
             if is_403 and attempt < max_retries:
                 logging.warning('%s (id %s): 403 error, retrying %d/%d in %ds: %s',
                                 item['url'], item['id'], attempt + 1, max_retries, retry_delay, error_message)
-                time.sleep(retry_delay)
+                tracing.sleep(retry_delay, 'retry after HTTP 403')
                 continue
 
             # Last attempt or non-403 error
@@ -203,7 +208,7 @@ def download_single_item(item, items, ydl_opts, filename_key, error_key, step, a
             if abort_on_error:
                 raise
             item[error_key] = error_message
-            write_data_file(step, items)
+            checkpoint_item(step, items, item)
             return False, error_message
 
         except AttributeError as e:
@@ -212,7 +217,7 @@ def download_single_item(item, items, ydl_opts, filename_key, error_key, step, a
             if abort_on_error:
                 raise
             item[error_key] = error_message
-            write_data_file(step, items)
+            checkpoint_item(step, items, item)
             return False, error_message
 
     return False, "Max retries exceeded"
@@ -279,9 +284,9 @@ def download_media(step):
     downloaded_count = 0
     error_count = 0
 
-    items = load_yaml_data(module_options['data_file'])
-
-    for item in items:
+    # Stream items to find those to download, without loading the whole data file in memory
+    pending_ids = set()
+    for item in iter_yaml_items(module_options['data_file']):
         should_skip, skip_reason = should_skip_item(
             item,
             module_options,
@@ -294,15 +299,28 @@ def download_media(step):
             skipped_count += 1
             continue
 
-        # Download the item
-        success, error = download_single_item(
-            item, items, ydl_opts, filename_key, error_key, step, abort_on_error
-        )
+        pending_ids.add(item['id'])
+
+    # Load the full data (preserving formatting) only if there is something to write back
+    if pending_ids:
+        items = load_yaml_data(module_options['data_file'])
+
+        for item in items:
+            if item['id'] not in pending_ids:
+                continue
+
+            # Download the item
+            success, error = download_single_item(
+                item, items, ydl_opts, filename_key, error_key, step, abort_on_error
+            )
+
+            if success:
+                downloaded_count += 1
+            else:
+                error_count += 1
 
-        if success:
-            downloaded_count += 1
-        else:
-            error_count += 1
+        flush_checkpoints(step, items)
 
     logging.info('processing complete. Downloaded: %s - Skipped: %s - Errors %s',
                  downloaded_count, skipped_count, error_count)
+    metrics.record_items(success=downloaded_count, skipped=skipped_count, error=error_count)
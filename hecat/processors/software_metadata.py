@@ -3,6 +3,9 @@ Gathers project/repository metadata from GitHub and GitLab APIs and adds some fi
 
 Note: `commit_history` is GitHub-specific and will not be added to GitLab projects
 
+Software entries updated so far are recorded in the hecat state file: if the run is interrupted or fails, `hecat --resume`
+only queries the API for remaining entries.
+
 # hecat.yml
 steps:
   - step: process
@@ -43,11 +46,15 @@ import time
 import logging
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-import requests
 import ruamel.yaml
 from requests.exceptions import ChunkedEncodingError, ConnectionError, Timeout, RequestException
 from json import JSONDecodeError
-from ..utils import load_yaml_data, to_kebab_case
+from ..utils import load_yaml_data, to_kebab_case, detect_provider
+from .. import dataset
+from .. import metrics
+from .. import tracing
+from .. import http_client
+from ..state import step_progress, save_progress
 
 # Variables
 DEFAULT_SLEEP_TIME = 5
@@ -71,15 +78,6 @@ yaml = ruamel.yaml.YAML(typ='rt')
 yaml.indent(sequence=4, offset=2)
 yaml.width = 99999
 
-# Provider detection
-def detect_provider(url):
-    """detect the hosting provider from a repository URL"""
-    if re.search(r'^https://github\.com/[\w\.\-]+/[\w\.\-]+/?$', url):
-        return 'github'
-    if re.search(r'^https://gitlab\.com/[\w\.\-]+/[\w\.\-]+/?$', url):
-        return 'gitlab'
-    return None
-
 def extract_github_repo_identifier(url):
     """extract 'owner/repo' from a GitHub URL"""
     re_result = re.search(r'^https?://github\.com/([^/]+)/([^/]+)/?$', url)
@@ -110,8 +108,12 @@ def write_software_yaml(step, software):
         f"{to_kebab_case(software['name'])}.yml"
     )
     logging.debug('Writing file %s', dest_file)
-    with open(dest_file, 'w+', encoding="utf-8") as yaml_file:
+    with open(dest_file, 'w+', encoding="utf-8") as yaml_file, tracing.span('write ' + dest_file, 'yaml'):
         yaml.dump(software, yaml_file)
+    dataset.invalidate(dest_file)
+    # record progress for hecat --resume
+    step_progress(step).setdefault('updated', []).append(software['source_code_url'])
+    save_progress(step)
 
 
 def _parse_iso_date(iso_datetime_str):
@@ -203,7 +205,15 @@ def process_graphql_request(query, graphql_api, headers, step, max_retries, erro
     base_sleep_time = get_config_option(step, 'sleep_time', DEFAULT_SLEEP_TIME)
 
     try:
-        response = requests.post(graphql_api, json={"query": query}, headers=headers, timeout=60)
+        start_time = time.monotonic()
+        try:
+            with tracing.span('POST ' + graphql_api, 'http', batch=repo_identifier, attempt=attempt) as span_args:
+                response = http_client.request('POST', graphql_api, json={"query": query}, headers=headers, timeout=60)
+                span_args['status'] = response.status_code
+        except RequestException:
+            metrics.record_http_request('POST', None, time.monotonic() - start_time)
+            raise
+        metrics.record_http_request('POST', response.status_code, time.monotonic() - start_time)
 
         # Handle retryable HTTP errors
         if response.status_code in RETRYABLE_STATUS_CODES:
@@ -231,6 +241,7 @@ def process_graphql_request(query, graphql_api, headers, step, max_retries, erro
         used = resp_headers.get('x-ratelimit-used', resp_headers.get('ratelimit-observed', '-1'))
         reset = resp_headers.get('x-ratelimit-reset', resp_headers.get('ratelimit-reset', '-1'))
         logging.debug("Rate limit (Limit/Remain/Used/Reset): %s/%s/%s/%s", limit, remaining, used, reset)
+        metrics.record_rate_limit(graphql_api, limit, remaining, used, reset)
 
         data = response.json()
 
@@ -300,7 +311,7 @@ def _handle_retry(error_code, query, graphql_api, headers, step, max_retries, er
         'GraphQL request failed with %s (attempt %s/%s), waiting %ss',
         error_desc, attempt, max_retries, backoff_time
     )
-    time.sleep(backoff_time)
+    tracing.sleep(backoff_time, 'backoff before retry')
 
     # Attempt 1: Retry with same batch (no splitting)
     if attempt == 1:
@@ -333,7 +344,7 @@ def _handle_retry(error_code, query, graphql_api, headers, step, max_retries, er
             on_batch_split(split_batch, attempt)
             if i < len(split_batches) - 1:
                 logging.debug('sleeping %ss between split chunks', base_sleep_time)
-                time.sleep(base_sleep_time)
+                tracing.sleep(base_sleep_time, 'between split chunks')
 
         return {"split_processed": True}, None
 
@@ -385,14 +396,15 @@ def add_github_metadata(step, github_projects, errors):
     month_queries = build_month_queries(fetch_months)
 
     for batch_num, batch in enumerate(batches, start=1):
-        _process_github_batch(
-            batch, batch_num, len(batches), github_projects, step,
-            headers, month_queries, clean_months, max_retries, errors
-        )
+        with tracing.span('GitHub batch {}/{}'.format(batch_num, len(batches)), 'graphql', size=len(batch)):
+            _process_github_batch(
+                batch, batch_num, len(batches), github_projects, step,
+                headers, month_queries, clean_months, max_retries, errors
+            )
 
         if batch_num < len(batches):
             logging.debug('sleeping %ss between batches', sleep_time)
-            time.sleep(sleep_time)
+            tracing.sleep(sleep_time, 'between batches')
 
 def _process_github_batch( batch, batch_num, total_batches, github_projects, step, headers, month_queries, clean_months, max_retries, errors, attempt=1):
     """process a single batch of GitHub repositories"""
@@ -445,10 +457,11 @@ def _process_github_batch( batch, batch_num, total_batches, github_projects, ste
     def handle_split(split_batch, split_attempt):
         suffix = chr(97 + split_counter['index'])
         split_counter['index'] += 1
-        _process_github_batch(
-            split_batch, f"{batch_num}{suffix}", total_batches, github_projects,
-            step, headers, month_queries, clean_months, max_retries, errors, split_attempt
-        )
+        with tracing.span(f'GitHub batch {batch_num}{suffix} (split)', 'graphql', size=len(split_batch), attempt=split_attempt):
+            _process_github_batch(
+                split_batch, f"{batch_num}{suffix}", total_batches, github_projects,
+                step, headers, month_queries, clean_months, max_retries, errors, split_attempt
+            )
 
     data, _ = process_graphql_request(
         query, GITHUB_GRAPHQL_API, headers, step, max_retries, errors,
@@ -552,14 +565,15 @@ def add_gitlab_metadata(step, gitlab_projects, errors):
     batches = create_batches(repos, batch_size)
 
     for batch_num, batch in enumerate(batches, start=1):
-        _process_gitlab_batch(
-            batch, batch_num, len(batches), gitlab_projects, step,
-            headers, max_retries, errors
-        )
+        with tracing.span('GitLab batch {}/{}'.format(batch_num, len(batches)), 'graphql', size=len(batch)):
+            _process_gitlab_batch(
+                batch, batch_num, len(batches), gitlab_projects, step,
+                headers, max_retries, errors
+            )
 
         if batch_num < len(batches):
             logging.debug('sleeping %ss between batches', sleep_time)
-            time.sleep(sleep_time)
+            tracing.sleep(sleep_time, 'between batches')
 
 
 def _process_gitlab_batch( batch, batch_num, total_batches, gitlab_projects, step, headers, max_retries, errors, attempt=1):
@@ -609,10 +623,11 @@ fragment ProjectDetails on Project {
     def handle_split(split_batch, split_attempt):
         suffix = chr(97 + split_counter['index'])
         split_counter['index'] += 1
-        _process_gitlab_batch(
-            split_batch, f"{batch_num}{suffix}", total_batches, gitlab_projects,
-            step, headers, max_retries, errors, split_attempt
-        )
+        with tracing.span(f'GitLab batch {batch_num}{suffix} (split)', 'graphql', size=len(split_batch), attempt=split_attempt):
+            _process_gitlab_batch(
+                split_batch, f"{batch_num}{suffix}", total_batches, gitlab_projects,
+                step, headers, max_retries, errors, split_attempt
+            )
 
     data, _ = process_graphql_request(
         query, GITLAB_GRAPHQL_API, headers, step, max_retries, errors,
@@ -686,11 +701,20 @@ def software_metadata(step):
 
     metadata_only_missing = get_config_option(step, 'metadata_only_missing', False)
 
+    # Entries already updated before the run was interrupted (hecat --resume)
+    already_updated = set(step_progress(step).get('updated', []))
+    if already_updated:
+        logging.info('resuming: %s software entries were already updated', len(already_updated))
+
     # Check if the source code URL is a supported provider and add it to the appropriate queue
     for software in software_list:
         if 'source_code_url' not in software:
             continue
 
+        if software['source_code_url'] in already_updated:
+            logging.debug('already updated before the run was interrupted, skipping %s', software['source_code_url'])
+            continue
+
         provider = detect_provider(software['source_code_url'])
 
         if provider == 'github':
@@ -21,40 +21,316 @@ steps:
       exclude_regex: # (default []) don't check URLs matching these regular expressions
         - '^https://github.com/[\w\.\-]+/[\w\.\-]+$' # don't check URLs that will be processed by the software_metadata module
         - '^https://www.youtube.com/watch.*$' # don't check youtube video URLs, always returns HTTP 200 even for unavailable videos
+      max_workers: 8 # (默认 8) 同时检查的 URL 数量
+      max_per_host: 2 # (默认 2) 每个主机同时检查的 URL 数量上限，避免向同一服务器发送过多请求
+      cache_file: .hecat-url-cache.sqlite # (默认无缓存) 持久保存每个 URL 检查结果（状态码、延迟、检查时间）的 SQLite 文件
+      cache_success_ttl_days: 7 # (默认 7) 成功的结果在缓存中的有效期（天），在此期间不再检查该 URL
+      cache_error_ttl_days: 1 # (默认 1) 失败的结果在缓存中的有效期（天）
+      max_checks: 500 # (默认 0，不限制) 每次运行最多检查的 URL 数量，优先检查从未检查过或缓存结果最旧的 URL
+      check_method: head # (默认 head) head: 先发送 HEAD 请求，失败时使用 GET 重试；get: 只使用 GET 请求
+      host_delay: 0.25 # (默认 0.25) 同一主机两次请求开始之间的最小间隔（秒）
+      rate_limit_retries: 2 # (默认 2) URL 返回 HTTP 429（或带 Retry-After 的 503）时的最大重试次数
+      max_retry_after: 60 # (默认 60) 重试前最多等待的秒数，Retry-After 更长时不再重试，URL 计为错误
+
+检查之前先从所有源目录/文件的 check_keys 中收集 URL（URL 队列），URL 经过规范化（协议和主机名转为小写，去除默认端口
+和片段 #...，空路径视为 /）后去重，每个 URL 只检查一次。URL 在线程池中并发检查，日志中的进度按检查完成的顺序输出，
+最终的错误报告按 URL 在数据中首次出现的顺序排列，与完成顺序无关，并列出引用每个失效 URL 的所有项目。
+
+调度器轮流从每个主机的队列中取出 URL，交错访问不同的主机，而不是按数据中的顺序连续请求同一主机。每个主机同时最多
+max_per_host 个请求，两次请求开始之间至少间隔 host_delay 秒。主机返回 HTTP 429（或带 Retry-After 的 503）时，
+该主机的所有请求暂停 Retry-After 指定的时间（没有该响应头时指数退避），URL 重新排队。
+
+请求通过共享的 HTTP 客户端发送（见 hecat/http_client.py），只读取响应头，不下载页面内容。HEAD 请求的响应和响应体
+不超过 DRAIN_MAX_SIZE 字节的 GET 响应被完整读取，连接返回连接池供同一主机的下一个请求复用；响应体较大或长度未知时
+关闭连接，而不是下载整个页面。
+check_method 为 head 时，HEAD 请求失败但 GET 请求成功的主机被记住（设置了 cache_file 时保存在缓存文件中），之后对
+这些主机直接使用 GET 请求。
+
+设置 cache_file 后，缓存中未过期的结果将被重用（见 hecat/url_cache.py）。配合 max_checks，可以将对所有 URL 的完整检查
+分摊到多次运行中：超出限制的 URL 推迟到下次运行，报告中使用它们上次的检查结果（从未检查过的 URL 计为跳过）。
 """
 
 import sys
 import ruamel.yaml
 import logging
 import re
-from ..utils import load_yaml_data
+import time
+import functools
+import threading
+import email.utils
+import collections
+import contextvars
+import concurrent.futures
+from datetime import datetime, timezone
+from urllib.parse import urlparse, urlsplit, urlunsplit
+from ..utils import iter_yaml_items
+from .. import metrics
+from .. import tracing
+from .. import http_client
+from ..url_cache import UrlCache, is_fresh
 import requests
 
 VALID_HTTP_CODES = [200, 206]
 # INVALID_HTTP_CODES = [403, 404, 500]
+# 检查过程中每记录多少个结果写入一次缓存文件
+CACHE_COMMIT_INTERVAL = 50
+# 没有 Retry-After 响应头时，第一次重试前等待的秒数（之后每次加倍）
+RATE_LIMIT_BACKOFF = 5
+# Content-Length 不超过此字节数的 GET 响应体被读取，使连接可以复用
+DRAIN_MAX_SIZE = 65536
 
-def check_return_code(url, current_item_index, total_item_count, errors):
+def parse_retry_after(value):
+    """返回 Retry-After 响应头表示的等待秒数（秒数或 HTTP 日期），没有该响应头或无法解析时返回 None"""
+    if value is None:
+        return None
     try:
-        # 当可能时只获取前 200 字节，不支持 Range: 头的服务器将简单地返回整个页面
-        response = requests.get(url, headers={"Range": "bytes=0-200", "User-Agent": "hecat/0.0.1"}, timeout=10)
-        if response.status_code in VALID_HTTP_CODES:
-            logging.info('[%s/%s] %s HTTP %s', current_item_index, total_item_count, url, response.status_code)
-            return True
-        else:
-            error_msg = '{} : HTTP {}'.format(url, response.status_code)
-            logging.error('[%s/%s] %s', current_item_index, total_item_count, error_msg)
-            errors.append(error_msg)
-            return False
-    except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout, requests.exceptions.ContentDecodingError, requests.exceptions.TooManyRedirects) as connection_error:
-        error_msg = '{} : {}'.format(url, connection_error)
-        logging.error('[%s/%s] %s', current_item_index, total_item_count, error_msg)
-        errors.append(error_msg)
+        return max(0, int(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0, round((date - datetime.now(timezone.utc)).total_seconds()))
+
+def is_rate_limited(status, retry_after):
+    """如果响应表示请求过多（HTTP 429，或带 Retry-After 的 HTTP 503），返回 True"""
+    return status == 429 or (status == 503 and retry_after is not None)
+
+def can_drain(method, response):
+    """如果读取响应体的开销小于重新建立连接（HEAD 请求，或 Content-Length 不超过 DRAIN_MAX_SIZE），返回 True"""
+    if method == 'HEAD':
+        return True
+    try:
+        return 0 <= int(response.headers.get('Content-Length')) <= DRAIN_MAX_SIZE
+    except (TypeError, ValueError):
         return False
 
+def request_status(method, url):
+    """发送 HEAD 或 GET 请求并返回 (HTTP 状态码, Retry-After 秒数或 None)
+    较小的响应体被读取，连接返回连接池；较大或长度未知的响应体不下载，连接在收到响应头后关闭"""
+    start_time = time.monotonic()
+    try:
+        with tracing.span('{} {}'.format(method, url), 'http') as span_args:
+            with http_client.request(method, url, timeout=10, stream=True) as response:
+                span_args['status'] = response.status_code
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if can_drain(method, response):
+                    response.content # pylint: disable=pointless-statement
+    except requests.exceptions.RequestException:
+        metrics.record_http_request(method, None, time.monotonic() - start_time)
+        raise
+    metrics.record_http_request(method, response.status_code, time.monotonic() - start_time)
+    return response.status_code, retry_after
+
+def check_return_code(url, check_method='head', head_unsupported_hosts=None, wait_for_host=None):
+    """检查 URL，返回结果字典 (success, status, message, latency, checked_at, head_unsupported, rate_limited, retry_after)
+    check_method 为 head 时先发送 HEAD 请求，如果返回错误则使用 GET 重试；如果 GET 成功，则将主机加入
+    head_unsupported_hosts，之后对该主机的 URL 直接使用 GET
+    如果提供了 wait_for_host(host)，在发送 GET 重试请求之前调用，以遵守对该主机的请求间隔"""
+    if head_unsupported_hosts is None:
+        head_unsupported_hosts = set()
+    checked_at = time.time()
+    start_time = time.monotonic()
+    head_unsupported = False
+    try:
+        host = url_host(url)
+        if check_method == 'head' and host not in head_unsupported_hosts:
+            status, retry_after = request_status('HEAD', url)
+            if status not in VALID_HTTP_CODES and not is_rate_limited(status, retry_after):
+                # 部分服务器对 HEAD 请求返回错误（405、403、404...），使用 GET 确认
+                if wait_for_host is not None:
+                    wait_for_host(host)
+                get_status, retry_after = request_status('GET', url)
+                if get_status in VALID_HTTP_CODES:
+                    logging.info('%s 不能正确处理 HEAD 请求 (HTTP %s)，之后对该主机使用 GET', host, status)
+                    head_unsupported_hosts.add(host)
+                    head_unsupported = True
+                status = get_status
+        else:
+            status, retry_after = request_status('GET', url)
+        return {'success': status in VALID_HTTP_CODES, 'status': status, 'message': 'HTTP {}'.format(status),
+                'latency': round(time.monotonic() - start_time, 3), 'checked_at': checked_at, 'head_unsupported': head_unsupported,
+                'rate_limited': is_rate_limited(status, retry_after), 'retry_after': retry_after}
+    # 连接错误、超时、读取响应体时的错误、无效的 URL...
+    except requests.exceptions.RequestException as connection_error:
+        return {'success': False, 'status': None, 'message': str(connection_error),
+                'latency': round(time.monotonic() - start_time, 3), 'checked_at': checked_at, 'head_unsupported': head_unsupported,
+                'rate_limited': False, 'retry_after': None}
+
+def url_host(url):
+    """返回 URL 的主机名（用于按主机限制并发）"""
+    try:
+        return (urlparse(url).hostname or '').lower()
+    except ValueError:
+        return ''
+
+def check_urls_concurrently(urls, check_url, max_workers=1, max_per_host=1, cache=None, host_delay=0, rate_limit_retries=0, max_retry_after=60):
+    """使用 check_url(url, wait_for_host=...) 检查 URL 列表，最多同时检查 max_workers 个 URL，返回 {url: 结果}，完成顺序不确定
+    轮流从每个主机的队列中取出下一个 URL（主机按其第一个 URL 在列表中的顺序排列），每个主机同时最多 max_per_host 个
+    请求，两次请求开始之间至少间隔 host_delay 秒（同一次检查中的后续请求，例如 HEAD 之后的 GET，由 check_url 调用
+    wait_for_host(host) 等待）。请求过多时（见 is_rate_limited()），该主机暂停 Retry-After 秒
+    （没有该响应头时为 RATE_LIMIT_BACKOFF 秒，每次重试加倍），URL 放回队列的开头，最多重试 rate_limit_retries 次，
+    等待时间超过 max_retry_after 时不再重试
+    如果提供了 cache，每个结果在完成时记录到缓存中（每 CACHE_COMMIT_INTERVAL 个结果写入一次）"""
+    # 还有待检查 URL 的主机，按轮转顺序排列
+    hosts = collections.deque()
+    host_queues = {}
+    for url in urls:
+        host = url_host(url)
+        if host not in host_queues:
+            host_queues[host] = collections.deque()
+            hosts.append(host)
+        host_queues[host].append(url)
+    in_flight_per_host = collections.Counter()
+    # 每个主机下一个请求最早的开始时间 (time.monotonic())，工作线程通过 wait_for_host() 更新
+    next_start = {}
+    next_start_lock = threading.Lock()
+
+    def wait_for_host(host):
+        """等待到可以向 host 发送下一个请求的时间，并将该主机之后的请求推迟 host_delay 秒"""
+        with next_start_lock:
+            start = max(time.monotonic(), next_start.get(host, 0))
+            next_start[host] = start + host_delay
+        delay = start - time.monotonic()
+        if delay > 0:
+            tracing.sleep(delay, 'host delay')
+
+    retries = collections.Counter()
+    running = {}
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hecat-url-check') as executor:
+        while hosts or running:
+            # 轮流为每个可以发送请求的主机启动一个 URL 的检查，直到没有空闲的工作线程，或一整轮没有主机可以启动
+            now = time.monotonic()
+            waiting_hosts = 0
+            while hosts and len(running) < max_workers and waiting_hosts < len(hosts):
+                host = hosts.popleft()
+                with next_start_lock:
+                    can_start = in_flight_per_host[host] < max_per_host and next_start.get(host, 0) <= now
+                    if can_start:
+                        next_start[host] = now + host_delay
+                if can_start:
+                    url = host_queues[host].popleft()
+                    in_flight_per_host[host] += 1
+                    # 在工作线程中保留当前步骤的上下文（指标标签）
+                    running[executor.submit(contextvars.copy_context().run, check_url, url, wait_for_host=wait_for_host)] = url
+                    waiting_hosts = 0
+                else:
+                    waiting_hosts += 1
+                if host_queues[host]:
+                    hosts.append(host)
+                else:
+                    del host_queues[host]
+            # 等待一个检查完成，或等待下一个只因 host_delay/Retry-After 而等待的主机可以发送请求
+            timeout = None
+            if len(running) < max_workers:
+                with next_start_lock:
+                    delayed = [next_start[host] for host in hosts if in_flight_per_host[host] < max_per_host and host in next_start]
+                if delayed:
+                    timeout = max(0, min(delayed) - time.monotonic())
+            if not running:
+                if timeout:
+                    tracing.sleep(timeout, 'host delay')
+                continue
+            done, _ = concurrent.futures.wait(running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                url = running.pop(future)
+                host = url_host(url)
+                in_flight_per_host[host] -= 1
+                result = future.result()
+                if result['rate_limited'] and retries[url] < rate_limit_retries:
+                    delay = result['retry_after'] if result['retry_after'] is not None else RATE_LIMIT_BACKOFF * 2 ** retries[url]
+                    if delay <= max_retry_after:
+                        retries[url] += 1
+                        logging.warning('%s %s，%s 秒后重试（第 %s 次），暂停对 %s 的请求', url, result['message'], delay, retries[url], host)
+                        with next_start_lock:
+                            next_start[host] = max(next_start.get(host, 0), time.monotonic() + delay)
+                        if host not in host_queues:
+                            host_queues[host] = collections.deque()
+                            hosts.append(host)
+                        host_queues[host].appendleft(url)
+                        continue
+                results[url] = result
+                if result['success']:
+                    logging.info('[%s/%s] %s %s', len(results), len(urls), url, result['message'])
+                else:
+                    logging.error('[%s/%s] %s : %s', len(results), len(urls), url, result['message'])
+                if cache is not None:
+                    cache.record(url, result)
+                    if result['head_unsupported']:
+                        cache.record_head_unsupported_host(host)
+                    if len(results) % CACHE_COMMIT_INTERVAL == 0:
+                        cache.commit()
+    return results
+
+def select_urls(urls, cached, success_ttl_days, error_ttl_days, max_checks=0):
+    """返回 (要检查的 URL 列表, 推迟的 URL 列表)：缓存中没有未过期结果的 URL，从未检查过的在前，其余按上次检查时间从旧到新
+    排序（时间相同时保持数据中的顺序），max_checks 大于 0 时只检查前 max_checks 个"""
+    now = time.time()
+    stale_urls = [url for url in urls if url not in cached or not is_fresh(cached[url], now, success_ttl_days, error_ttl_days)]
+    stale_urls.sort(key=lambda url: cached[url]['checked_at'] if url in cached else float('-inf'))
+    if max_checks:
+        return stale_urls[:max_checks], stale_urls[max_checks:]
+    return stale_urls, []
+
+def normalize_url(url):
+    """返回规范化的 URL：协议和主机名转为小写，去除默认端口和片段，空路径替换为 /，无法解析的 URL 原样返回"""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname.lower()
+    if ':' in netloc:
+        netloc = '[' + netloc + ']'
+    if port is not None and port != {'http': 80, 'https': 443}[scheme]:
+        netloc = '{}:{}'.format(netloc, port)
+    if parts.username is not None or parts.password is not None:
+        netloc = parts.netloc.rpartition('@')[0] + '@' + netloc
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+def item_label(item, item_index):
+    """返回用于报告的项目名称"""
+    for key in ['name', 'title', 'identifier', 'url']:
+        if isinstance(item.get(key), str) and item[key]:
+            return item[key]
+    return '#{}'.format(item_index)
+
+def build_frontier(step):
+    """从所有源目录/文件的 check_keys 中收集要检查的 URL，返回 (frontier, 跳过的 URL 数量, 项目数量)
+    项目在同一次遍历中计数，源文件只解析一次
+    frontier 是 {规范化的 URL: [(项目名称, 键, 原始 URL), ...]}，按 URL 在数据中首次出现的顺序排列"""
+    frontier = {}
+    skipped_count = 0
+    current_item_index = 1
+    for item in iter_source_items(step):
+        for key_name in step['module_options']['check_keys']:
+            try:
+                if any(re.search(regex, item[key_name]) for regex in step['module_options']['exclude_regex']):
+                    logging.info('[%s] 跳过 URL %s，匹配排除正则表达式', item_label(item, current_item_index), item[key_name])
+                    skipped_count = skipped_count + 1
+                    continue
+                else:
+                    frontier.setdefault(normalize_url(item[key_name]), []).append((item_label(item, current_item_index), key_name, item[key_name]))
+            except KeyError:
+                pass
+        current_item_index = current_item_index + 1
+    return frontier, skipped_count, current_item_index - 1
+
+def iter_source_items(step):
+    """依次产出所有源目录/文件中的项目，不将整个数据集加载到内存中（已由之前的步骤加载到共享数据中的除外）"""
+    for source_dir_or_file in step['module_options']['source_directories'] + step['module_options']['source_files']:
+        yield from iter_yaml_items(source_dir_or_file, use_shared_data=True)
+
 def check_urls(step):
-    data = []
     errors = []
-    checked_urls = []
     if 'exclude_regex' not in step['module_options'].keys():
         step['module_options']['exclude_regex'] = []
     if 'source_directories' not in step['module_options'].keys():
@@ -63,33 +339,89 @@ def check_urls(step):
         step['module_options']['source_files'] = []
     if 'check_keys' not in step['module_options'].keys():
         step['module_options']['check_keys'] = ['url', 'source_code_url', 'website_url', 'demo_url']
-    for source_dir_or_file in step['module_options']['source_directories'] + step['module_options']['source_files']:
-        new_data = load_yaml_data(source_dir_or_file)
-        data = data + new_data
-    total_item_count = len(data)
-    logging.info('已加载 %s 个项目', total_item_count)
-    skipped_count = 0
+    if 'max_workers' not in step['module_options'].keys():
+        step['module_options']['max_workers'] = 8
+    if 'max_per_host' not in step['module_options'].keys():
+        step['module_options']['max_per_host'] = 2
+    if 'cache_success_ttl_days' not in step['module_options'].keys():
+        step['module_options']['cache_success_ttl_days'] = 7
+    if 'cache_error_ttl_days' not in step['module_options'].keys():
+        step['module_options']['cache_error_ttl_days'] = 1
+    if 'max_checks' not in step['module_options'].keys():
+        step['module_options']['max_checks'] = 0
+    if 'check_method' not in step['module_options'].keys():
+        step['module_options']['check_method'] = 'head'
+    if 'host_delay' not in step['module_options'].keys():
+        step['module_options']['host_delay'] = 0.25
+    if 'rate_limit_retries' not in step['module_options'].keys():
+        step['module_options']['rate_limit_retries'] = 2
+    if 'max_retry_after' not in step['module_options'].keys():
+        step['module_options']['max_retry_after'] = 60
+    for option in ['cache_success_ttl_days', 'cache_error_ttl_days']:
+        value = step['module_options'][option]
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+            logging.error('%s 的值无效: %s（必须是正数或 0）', option, value)
+            sys.exit(1)
+    for option in ['host_delay', 'rate_limit_retries', 'max_retry_after']:
+        value = step['module_options'][option]
+        if not isinstance(value, int if option == 'rate_limit_retries' else (int, float)) or isinstance(value, bool) or value < 0:
+            logging.error('%s 的值无效: %s（必须是正数或 0）', option, value)
+            sys.exit(1)
+    if step['module_options']['check_method'] not in ['head', 'get']:
+        logging.error('check_method 的值无效: %s（必须是 head 或 get）', step['module_options']['check_method'])
+        sys.exit(1)
+    for option in ['max_workers', 'max_per_host']:
+        value = step['module_options'][option]
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            logging.error('%s 的值无效: %s（必须是正整数）', option, value)
+            sys.exit(1)
+    if not isinstance(step['module_options']['max_checks'], int) or isinstance(step['module_options']['max_checks'], bool) or step['module_options']['max_checks'] < 0:
+        logging.error('max_checks 的值无效: %s（必须是正整数或 0）', step['module_options']['max_checks'])
+        sys.exit(1)
     success_count = 0
     error_count = 0
-    current_item_index = 1
-    for item in data:
-        for key_name in step['module_options']['check_keys']:
-            try:
-                if any(re.search(regex, item[key_name]) for regex in step['module_options']['exclude_regex']):
-                    logging.info('[%s/%s] 跳过 URL %s，匹配排除正则表达式', current_item_index, total_item_count, item[key_name])
-                    skipped_count = skipped_count + 1
-                    continue
-                else:
-                    if item[key_name] not in checked_urls:
-                        if check_return_code(item[key_name], current_item_index, total_item_count, errors):
-                            success_count = success_count + 1
-                        else:
-                            error_count = error_count + 1
-                        checked_urls.append(item[key_name])
-            except KeyError:
-                pass
-        current_item_index = current_item_index + 1
+    urls, skipped_count, item_count = build_frontier(step)
+    logging.info('找到 %s 个项目', item_count)
+    logging.info('找到 %s 个唯一 URL（被引用 %s 次）', len(urls), sum(len(references) for references in urls.values()))
+    cache = UrlCache(step['module_options']['cache_file']) if step['module_options'].get('cache_file') else None
+    try:
+        cached = cache.get(urls) if cache is not None else {}
+        head_unsupported_hosts = cache.head_unsupported_hosts() if cache is not None else set()
+        check_url = functools.partial(check_return_code, check_method=step['module_options']['check_method'],
+                                      head_unsupported_hosts=head_unsupported_hosts)
+        urls_to_check, deferred_urls = select_urls(urls, cached, step['module_options']['cache_success_ttl_days'],
+                                                   step['module_options']['cache_error_ttl_days'], step['module_options']['max_checks'])
+        logging.info('检查 %s 个 URL（并发数 %s，每个主机 %s），%s 个使用缓存结果，%s 个推迟到下次运行',
+                     len(urls_to_check), step['module_options']['max_workers'], step['module_options']['max_per_host'],
+                     len(urls) - len(urls_to_check) - len(deferred_urls), len(deferred_urls))
+        results = check_urls_concurrently(urls_to_check, check_url, step['module_options']['max_workers'], step['module_options']['max_per_host'], cache,
+                                          host_delay=step['module_options']['host_delay'],
+                                          rate_limit_retries=step['module_options']['rate_limit_retries'],
+                                          max_retry_after=step['module_options']['max_retry_after'])
+    finally:
+        if cache is not None:
+            cache.close()
+    # 按 URL 在数据中首次出现的顺序生成报告，与完成顺序无关
+    for url in urls:
+        if url in results:
+            result = results[url]
+            message = result['message']
+        elif url in cached:
+            result = cached[url]
+            message = '{} (缓存结果，检查于 {})'.format(result['message'], time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(result['checked_at'])))
+        else:
+            # 从未检查过，且超出了 max_checks
+            skipped_count = skipped_count + 1
+            continue
+        if result['success']:
+            success_count = success_count + 1
+        else:
+            error_count = error_count + 1
+            errors.append('{} : {}'.format(url, message))
+            for label, key_name, original_url in urls[url]:
+                errors.append('  - {} ({}{})'.format(label, key_name, ': ' + original_url if original_url != url else ''))
     logging.info('处理完成。成功: %s - 跳过: %s - 错误: %s', success_count, skipped_count, error_count)
+    metrics.record_items(success=success_count, skipped=skipped_count, error=error_count)
     if errors:
         logging.error("处理过程中出现错误")
         print('\n'.join(errors))
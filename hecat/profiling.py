@@ -0,0 +1,45 @@
+"""hecat - per-step profiling (hecat --profile)
+Each step is run under cProfile. Statistics are written to OUTPUT_DIRECTORY/NN-step-name.pstats, and the functions
+with the highest cumulative time are logged when the step completes. Statistics files can be explored with:
+$ python3 -m pstats hecat-profile/01-step-name.pstats
+$ snakeviz hecat-profile/01-step-name.pstats
+"""
+import os
+import io
+import logging
+import pstats
+import cProfile
+import threading
+import contextlib
+from .utils import to_kebab_case
+
+class StepProfiler:
+    """context manager factory profiling each step it is called with"""
+    def __init__(self, output_directory, top=20):
+        self.output_directory = output_directory
+        self.top = top
+        self.count = 0
+        self.lock = threading.Lock()
+        os.makedirs(output_directory, exist_ok=True)
+
+    def stats_file(self, step):
+        """return the path of the statistics file for the next step"""
+        with self.lock:
+            self.count += 1
+            count = self.count
+        return os.path.join(self.output_directory, '{:02d}-{}.pstats'.format(count, to_kebab_case(step['name'])))
+
+    @contextlib.contextmanager
+    def __call__(self, step):
+        stats_file = self.stats_file(step)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(stats_file)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).strip_dirs().sort_stats('cumulative').print_stats(self.top)
+            logging.info('profile of step %s written to %s, top %s functions by cumulative time:\n%s',
+                         step['name'], stats_file, self.top, summary.getvalue().strip())
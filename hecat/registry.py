@@ -0,0 +1,70 @@
+"""hecat - registry of modules that can be used in pipeline steps
+Modules are only imported when a step uses them, so that running a single step does not import the dependencies of
+all other modules (yt_dlp, jinja2, markdown...).
+Third-party packages can provide their own modules by declaring an entry point in the `hecat.modules` group, named
+after the value of the `module:` step key, and pointing to a function taking the step configuration as argument:
+
+# setup.py
+entry_points={
+    'hecat.modules': [
+        'processors/my_processor = my_package.my_processor:my_processor',
+    ],
+}
+"""
+import logging
+import importlib
+
+ENTRY_POINT_GROUP = 'hecat.modules'
+
+# module name: (python module, function)
+# functions are looked up in their own python module, not in the package: once a submodule is imported, the package
+# attribute with the same name (hecat.processors.software_metadata) may refer to the submodule instead of the function
+BUILTIN_MODULES = {
+    'importers/markdown_awesome': ('hecat.importers.markdown_awesome', 'import_markdown_awesome'),
+    'importers/shaarli_api': ('hecat.importers.shaarli_api', 'import_shaarli_json'),
+    'processors/software_metadata': ('hecat.processors.software_metadata', 'software_metadata'),
+    'processors/awesome_lint': ('hecat.processors.awesome_lint', 'awesome_lint'),
+    'processors/url_check': ('hecat.processors.url_check', 'check_urls'),
+    'processors/archive_webpages': ('hecat.processors.archive_webpages', 'archive_webpages'),
+    'processors/download_media': ('hecat.processors.download_media', 'download_media'),
+    'exporters/markdown_singlepage': ('hecat.exporters.markdown_singlepage', 'render_markdown_singlepage'),
+    'exporters/html_table': ('hecat.exporters.html_table', 'render_html_table'),
+    'exporters/markdown_multipage': ('hecat.exporters.markdown_multipage', 'render_markdown_multipage'),
+    'exporters/sqlite_catalog': ('hecat.exporters.sqlite_catalog', 'render_sqlite_catalog'),
+}
+
+LOADED_MODULES = {}
+
+def entry_points():
+    """return a dict of {module name: entry point} for modules provided by other packages"""
+    try:
+        from importlib.metadata import entry_points as metadata_entry_points
+    except ImportError: # python < 3.8
+        return {}
+    all_entry_points = metadata_entry_points()
+    if hasattr(all_entry_points, 'select'):
+        group = all_entry_points.select(group=ENTRY_POINT_GROUP)
+    else: # python < 3.10
+        group = all_entry_points.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point for entry_point in group}
+
+def available_modules():
+    """return the sorted list of module names that can be used in steps"""
+    return sorted(set(BUILTIN_MODULES) | set(entry_points()))
+
+def load_module(name):
+    """return the function implementing module name, importing it on first use, or None if the module is unknown
+    built-in modules take precedence over modules provided by other packages"""
+    if name in LOADED_MODULES:
+        return LOADED_MODULES[name]
+    if name in BUILTIN_MODULES:
+        python_module, function_name = BUILTIN_MODULES[name]
+        function = getattr(importlib.import_module(python_module), function_name)
+    else:
+        entry_point = entry_points().get(name)
+        if entry_point is None:
+            return None
+        logging.debug('loading module %s from entry point %s', name, entry_point.value)
+        function = entry_point.load()
+    LOADED_MODULES[name] = function
+    return function
@@ -0,0 +1,96 @@
+"""hecat - run pipeline steps in dependency order, running independent steps concurrently
+By default each step depends on all previous steps, and steps run one after the other in the order of the
+configuration file. A step can declare the steps it actually depends on with `depends_on` (a list of names of
+previous steps, or an empty list), it is then started as soon as these steps have completed, in parallel with other
+running steps, up to the `max_parallel_steps` global option.
+Steps run in threads: steps sharing a data_file, output_file or output_directory module option never run at the same
+time, a step always waits for previous steps using the same file/directory.
+"""
+import os
+import sys
+import logging
+import concurrent.futures
+
+def step_dependencies(steps):
+    """return a list containing the set of step indexes each step depends on
+    steps without depends_on depend on all previous steps, depends_on can only reference previous steps
+    a step also depends on previous steps using the same data_file, output_file or output_directory"""
+    indexes = {}
+    dependencies = []
+    for index, step in enumerate(steps):
+        if 'depends_on' not in step:
+            dependencies.append(set(range(index)))
+        else:
+            depends_on = step['depends_on'] or []
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+            depends_on_indexes = set()
+            for name in depends_on:
+                if name not in indexes:
+                    logging.error('step %s: depends_on references %s, which is not the name of a previous step', step['name'], name)
+                    sys.exit(1)
+                depends_on_indexes.add(indexes[name])
+            dependencies.append(depends_on_indexes)
+        indexes[step['name']] = index
+    serialize_shared_files(steps, dependencies)
+    return dependencies
+
+# module options containing the path of a file/directory written by the step
+WRITTEN_PATH_OPTIONS = ['data_file', 'output_file', 'output_directory']
+
+def written_paths(step):
+    """return the set of normalized paths in the data_file, output_file and output_directory module options of a step"""
+    options = step.get('module_options') or {}
+    return {os.path.normpath(options[option]) for option in WRITTEN_PATH_OPTIONS if isinstance(options.get(option), str)}
+
+def serialize_shared_files(steps, dependencies):
+    """make each step depend on previous steps using the same files/directories, when it does not already depend on them"""
+    ancestors = []
+    for index, step in enumerate(steps):
+        paths = written_paths(step)
+        for previous_index in range(index):
+            shared_paths = paths & written_paths(steps[previous_index])
+            if shared_paths and previous_index not in dependencies[index] and not any(previous_index in ancestors[dependency] for dependency in dependencies[index]):
+                logging.info('step %s uses the same files as step %s (%s), it will wait for its completion',
+                             step['name'], steps[previous_index]['name'], ', '.join(sorted(shared_paths)))
+                dependencies[index].add(previous_index)
+        ancestors.append(set(dependencies[index]).union(*(ancestors[dependency] for dependency in dependencies[index])))
+
+def run_steps(steps, run_step, max_parallel_steps=1):
+    """call run_step(step) for each step, as soon as all steps it depends on have completed
+    at most max_parallel_steps steps run at the same time, if a step fails, no new step is started, running steps
+    are allowed to complete, and the exception (usually SystemExit) is raised again"""
+    dependencies = step_dependencies(steps)
+    if not isinstance(max_parallel_steps, int) or isinstance(max_parallel_steps, bool) or max_parallel_steps < 1:
+        logging.error('invalid value for max_parallel_steps: %s (must be a positive integer)', max_parallel_steps)
+        sys.exit(1)
+    if max_parallel_steps == 1:
+        for step in steps:
+            run_step(step)
+        return
+    pending = list(range(len(steps)))
+    completed = set()
+    running = {}
+    error = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel_steps, thread_name_prefix='hecat-step') as executor:
+        while pending or running:
+            if error is None:
+                for index in list(pending):
+                    if len(running) >= max_parallel_steps:
+                        break
+                    if dependencies[index] <= completed:
+                        pending.remove(index)
+                        running[executor.submit(run_step, steps[index])] = index
+            if not running:
+                break
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                exception = future.exception()
+                if exception is not None:
+                    logging.error('step %s failed, not starting any new step', steps[index]['name'])
+                    error = error or exception
+                else:
+                    completed.add(index)
+    if error is not None:
+        raise error
@@ -0,0 +1,329 @@
+"""hecat - skip steps whose inputs, options and outputs did not change since their last successful run, resume
+interrupted runs
+A step is skipped when:
+- it has completed successfully before
+- the content of its input files, its module and module_options, and the code of its module (including the hecat
+  modules it uses: utils, catalog...) are the same
+- its output files were not modified, removed or added since then (modification time/size)
+Inputs and outputs are inferred from module_options for importers and exporters (see MODULE_FILES). Hidden files and
+directories (.git, the state file, caches...) in input directories are ignored. Other steps are always run, unless
+they declare their inputs and outputs (files or directories) with the `inputs` and `outputs` step keys. Incremental
+runs are disabled by default, set the `incremental` global option to True to enable them. Set `incremental: False` on a
+step to always run it, or run hecat with --force to run all steps.
+The state of each step is recorded in the file set by the `state_file` global option (default .hecat-state.json).
+
+The progress of the current run is recorded in the same file: steps completed so far, and the progress of resumable
+steps (processors/software_metadata records software entries already updated, see step_progress()). If a run is
+interrupted or a step fails, run hecat --resume to skip steps already completed in that run (unless their
+configuration changed), and continue resumable steps where they stopped. When incremental runs are disabled, the state
+file is removed once all steps have completed (unless it contains the state of previous incremental runs). processors/archive_webpages and
+processors/download_media record their progress in the data file and always skip items already processed.
+
+# .hecat.yml
+options:
+  incremental: True # (default False) skip steps whose inputs and outputs did not change, False to always run all steps
+  state_file: .hecat-state.json # (default .hecat-state.json) file in which the state of steps is recorded
+steps:
+  - name: export markdown
+    module: exporters/markdown_singlepage
+    module_options:
+      source_directory: tests/awesome-selfhosted-data
+      output_directory: tests/awesome-selfhosted
+      output_file: README.md
+  - name: custom processor
+    module: processors/my_processor # module provided by another package
+    inputs: # (default inferred from module_options, or none) files/directories read by the step
+      - tests/awesome-selfhosted-data/software
+    outputs: # (default inferred from module_options, or none) files/directories written by the step
+      - tests/report.txt
+  - name: check URLs
+    module: processors/url_check
+    incremental: False # (default True) always run the step, even if its inputs and outputs did not change
+"""
+import os
+import sys
+import json
+import time
+import types
+import hashlib
+import logging
+import threading
+
+DEFAULT_STATE_FILE = '.hecat-state.json'
+# bump when the format of the state file changes, to discard existing state
+STATE_VERSION = 1
+# minimum interval between writes of the state file when saving the progress of a step (seconds)
+PROGRESS_SAVE_INTERVAL = 5
+
+# the state of the current run, None when not running a pipeline
+STATE = {'current': None}
+
+def join_path(directory, file):
+    """join a directory and a file name, as done by modules (directory + '/' + file)"""
+    return directory.rstrip('/') + '/' + file
+
+# module name: function returning the (inputs, outputs) of a step from its module_options
+# processors are not listed: they modify their source data in place, or depend on remote resources and on the date
+MODULE_FILES = {
+    'importers/markdown_awesome': lambda options: (
+        [options['source_file']],
+        [options['output_directory']]),
+    'importers/shaarli_api': lambda options: (
+        [options['source_file']],
+        [options['output_file']]),
+    'exporters/markdown_singlepage': lambda options: (
+        [options['source_directory']] + ([options['catalog_file']] if options.get('catalog_file') else []),
+        [join_path(options['output_directory'], options['output_file'])]),
+    'exporters/markdown_multipage': lambda options: (
+        [options['source_directory']],
+        [join_path(options['output_directory'], 'md'), join_path(options['output_directory'], '_static')]),
+    'exporters/html_table': lambda options: (
+        [options['source_file']],
+        [options.get('output_file', 'index.html')]),
+    'exporters/sqlite_catalog': lambda options: (
+        [options['source_directory']],
+        [options.get('output_file', join_path(options['source_directory'], 'catalog.sqlite'))]),
+}
+
+def step_files(step):
+    """return the (inputs, outputs) of a step, or (None, None) if they are not known"""
+    if 'inputs' in step or 'outputs' in step:
+        return list(step.get('inputs') or []), list(step.get('outputs') or [])
+    if step['module'] in MODULE_FILES:
+        try:
+            return MODULE_FILES[step['module']](step.get('module_options') or {})
+        except KeyError:
+            return None, None
+    return None, None
+
+def list_tree(path, ignored=()):
+    """return the sorted list of files in path (path itself if it is a file), ignoring temporary files, hidden files and
+    directories (.git, .hecat-state.json, .hecat-cache...) and files listed in ignored (absolute paths)"""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, directories, names in os.walk(path):
+        directories[:] = sorted(directory for directory in directories if not directory.startswith('.'))
+        files.extend(os.path.join(root, name) for name in sorted(names)
+                     if not name.endswith('.tmp') and not name.startswith('.') and os.path.abspath(os.path.join(root, name)) not in ignored)
+    return files
+
+def is_inside(path, directories):
+    """return True if path is one of directories, or inside one of them"""
+    abspath = os.path.abspath(path)
+    return any(abspath == directory or abspath.startswith(directory + os.sep) for directory in directories)
+
+def step_hash(step):
+    """return a hash of the configuration of a step"""
+    return hashlib.sha256(json.dumps(step, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def step_progress(step):
+    """return a dict in which a resumable step can record its progress (restored from the interrupted run with
+    --resume), the dict must only contain JSON-serializable values, call save_progress() after updating it"""
+    if STATE['current'] is None:
+        return {}
+    return STATE['current'].progress(step)
+
+def save_progress(step):
+    """write the progress of a step to the state file (at most every PROGRESS_SAVE_INTERVAL seconds)"""
+    if STATE['current'] is not None:
+        STATE['current'].save_progress(step)
+
+def module_code_files(module):
+    """return the sorted list of source files of the python module of the function implementing a module, and of the
+    modules of the same package it uses (hecat.utils, hecat.catalog...), found recursively through imported names"""
+    package = module.__module__.split('.')[0]
+    pending = [module.__module__]
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in sys.modules:
+            continue
+        seen.add(name)
+        for value in vars(sys.modules[name]).values():
+            if isinstance(value, types.ModuleType):
+                value_module = value.__name__
+            elif isinstance(value, (types.FunctionType, type)):
+                value_module = value.__module__
+            else:
+                continue
+            if isinstance(value_module, str) and value_module.split('.')[0] == package:
+                pending.append(value_module)
+    return sorted(filter(None, (getattr(sys.modules[name], '__file__', None) for name in seen)))
+
+def module_code_hash(module):
+    """return the hash of the source files of the function implementing a module and of the modules it uses"""
+    module_files = module_code_files(module)
+    if not module_files:
+        return None
+    digest = hashlib.sha256()
+    for module_file in module_files:
+        with open(module_file, 'rb') as source_file:
+            digest.update(hashlib.sha256(source_file.read()).digest())
+    return digest.hexdigest()
+
+class StepState:
+    """state of steps, recorded in a JSON file after each successful step"""
+    def __init__(self, state_file=DEFAULT_STATE_FILE, force=False, incremental=False):
+        self.state_file = state_file
+        self.force = force
+        self.incremental = incremental
+        self.lock = threading.RLock()
+        self.step_hashes = {}
+        self.last_write = 0
+        self.state = {'version': STATE_VERSION, 'steps': {}, 'files': {}}
+        try:
+            with open(state_file, 'r', encoding='utf-8') as state_json:
+                state = json.load(state_json)
+            if state.get('version') == STATE_VERSION:
+                self.state = state
+            else:
+                logging.info('discarding state from %s (format version changed)', state_file)
+        except FileNotFoundError:
+            pass
+        except ValueError as error:
+            logging.warning('discarding invalid state file %s: %s', state_file, error)
+        self.state.setdefault('run', {'completed': {}, 'progress': {}})
+
+    def activate(self):
+        """make this state available to modules through step_progress()/save_progress()"""
+        STATE['current'] = self
+
+    def start_run(self, resume=False):
+        """forget the progress of the previous run, unless resume is True"""
+        with self.lock:
+            run = self.state['run']
+            if not resume:
+                self.state['run'] = {'completed': {}, 'progress': {}}
+            elif run['completed'] or run['progress']:
+                logging.info('resuming the previous run, completed steps: %s', ', '.join(run['completed']) or 'none')
+            else:
+                logging.info('no interrupted run to resume')
+
+    def begin_step(self, step):
+        """record the configuration of a step before it runs (modules add default values to module_options)
+        return True if the step was already completed in the run being resumed"""
+        key = step_hash(step)
+        with self.lock:
+            self.step_hashes[step['name']] = key
+            progress = self.state['run']['progress'].get(step['name'])
+            if progress is not None and progress['step_hash'] != key:
+                logging.info('step %s: configuration changed since the interrupted run, starting it from scratch', step['name'])
+                del self.state['run']['progress'][step['name']]
+            return self.state['run']['completed'].get(step['name']) == key
+
+    def complete_step(self, step):
+        """record that a step completed (or was up to date) in the current run"""
+        with self.lock:
+            self.state['run']['completed'][step['name']] = self.step_hashes[step['name']]
+            self.state['run']['progress'].pop(step['name'], None)
+        self.write()
+
+    def finish_run(self):
+        """forget the progress of the current run once all steps have completed
+        the state file is removed if it only contained the progress of the run (incremental runs disabled)"""
+        with self.lock:
+            self.state['run'] = {'completed': {}, 'progress': {}}
+            if not self.incremental and not self.state['steps'] and not self.state['files']:
+                if os.path.exists(self.state_file):
+                    os.remove(self.state_file)
+                return
+        self.write()
+
+    def progress(self, step):
+        """return the progress dict of a step, see step_progress()"""
+        with self.lock:
+            progress = self.state['run']['progress'].setdefault(step['name'], {'step_hash': self.step_hashes.get(step['name']), 'cursor': {}})
+            return progress['cursor']
+
+    def save_progress(self, step):
+        """write the state file if it was not written in the last PROGRESS_SAVE_INTERVAL seconds"""
+        with self.lock:
+            if time.monotonic() - self.last_write >= PROGRESS_SAVE_INTERVAL:
+                self.write()
+
+    def file_hash(self, path):
+        """return the hash of a file's content, reusing the hash recorded in the state if its modification time/size
+        did not change"""
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        with self.lock:
+            known = self.state['files'].get(path)
+        if known is not None and known[:2] == signature:
+            return known[2]
+        file_hash = hashlib.sha256()
+        with open(path, 'rb') as data_file:
+            for block in iter(lambda: data_file.read(1048576), b''):
+                file_hash.update(block)
+        with self.lock:
+            self.state['files'][path] = signature + [file_hash.hexdigest()]
+        return file_hash.hexdigest()
+
+    def inputs_hash(self, step, module, inputs, outputs):
+        """return a hash of the content of input files (excluding outputs), module, module_options and module code
+        return None if an input does not exist"""
+        output_paths = [os.path.abspath(output) for output in outputs]
+        digest = hashlib.sha256()
+        digest.update(json.dumps([step['module'], step.get('module_options'), module_code_hash(module)],
+                                 sort_keys=True, default=str).encode('utf-8'))
+        for input_path in inputs:
+            if not os.path.exists(input_path):
+                return None
+            # the state file is not an input, even when it is inside an input directory (source_directory: ./)
+            for path in list_tree(input_path, ignored={os.path.abspath(self.state_file)}):
+                if not is_inside(path, output_paths):
+                    digest.update('{}\0{}\0'.format(path, self.file_hash(path)).encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def outputs_signature(outputs):
+        """return the list of output files with their modification time/size, or None if an output does not exist"""
+        signature = []
+        for output_path in outputs:
+            if not os.path.exists(output_path):
+                return None
+            for path in list_tree(output_path):
+                stat = os.stat(path)
+                signature.append([path, stat.st_mtime_ns, stat.st_size])
+        return signature
+
+    def check(self, step, module):
+        """return (up_to_date, key): up_to_date is True if the step can be skipped, key must be passed to record()
+        after the step completes successfully (None if the state of the step cannot be tracked)"""
+        if not self.incremental or not step.get('incremental', True):
+            return False, None
+        inputs, outputs = step_files(step)
+        if inputs is None or not inputs:
+            return False, None
+        key = self.inputs_hash(step, module, inputs, outputs)
+        if key is None or self.force:
+            return False, key
+        with self.lock:
+            previous = self.state['steps'].get(step['name'])
+        if previous is None or previous['inputs_hash'] != key:
+            return False, key
+        outputs_signature = self.outputs_signature(outputs)
+        if outputs_signature is None or previous['outputs'] != outputs_signature:
+            logging.info('step %s: outputs were modified or removed since the last run', step['name'])
+            return False, key
+        return True, key
+
+    def record(self, step, key):
+        """record the successful completion of a step, and write the state file"""
+        _, outputs = step_files(step)
+        with self.lock:
+            self.state['steps'][step['name']] = {
+                'inputs_hash': key,
+                'outputs': self.outputs_signature(outputs),
+                'completed_at': round(time.time(), 3),
+            }
+        self.write()
+
+    def write(self):
+        """write the state file atomically (temporary file + rename)"""
+        with self.lock:
+            temp_file = self.state_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as state_json:
+                json.dump(self.state, state_json)
+            os.replace(temp_file, self.state_file)
+            self.last_write = time.monotonic()
@@ -0,0 +1,93 @@
+"""hecat - timeline of steps, API batches, HTTP requests and subprocesses (hecat --trace FILE)
+Spans are written to FILE in the Chrome trace event JSON format at the end of the run. The file can be opened in
+Perfetto (https://ui.perfetto.dev) or chrome://tracing. Each thread is shown on its own track, spans are nested by
+time. Span categories:
+- step: each step of the pipeline
+- graphql: GitHub/GitLab GraphQL batches and batches split after failures (processors/software_metadata)
+- http: HTTP requests (processors/url_check, processors/software_metadata)
+- subprocess: wget (processors/archive_webpages) and yt-dlp downloads (processors/download_media)
+- sleep: waits between batches and before retries
+- yaml: loading and writing YAML data files
+Modules record spans with span(), which does nothing when tracing is disabled.
+"""
+import os
+import json
+import time
+import threading
+import contextlib
+
+class Tracer:
+    """thread-safe list of trace events"""
+    def __init__(self):
+        self.events = []
+        self.threads = set()
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.add_event({'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0, 'args': {'name': 'hecat'}})
+
+    def add_event(self, event):
+        """add an event, and the name of its thread the first time the thread is seen"""
+        with self.lock:
+            if event['ph'] != 'M' and event['tid'] not in self.threads:
+                self.threads.add(event['tid'])
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': event['tid'],
+                                    'args': {'name': threading.current_thread().name}})
+            self.events.append(event)
+
+    def complete(self, name, category, start, duration, args):
+        """add a complete event (ph X), start and duration in seconds (time.perf_counter())"""
+        self.add_event({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round(start * 1000000, 3),
+            'dur': round(duration * 1000000, 3),
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+            'args': args,
+        })
+
+    def write(self, path):
+        """write the trace to path atomically (temporary file + rename)"""
+        temp_file = path + '.tmp'
+        with self.lock:
+            trace = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+        with open(temp_file, 'w', encoding='utf-8') as trace_file:
+            json.dump(trace, trace_file)
+        os.replace(temp_file, path)
+
+# the tracer of the current run, None when tracing is disabled
+TRACER = {'current': None}
+
+def enable():
+    """start recording spans"""
+    TRACER['current'] = Tracer()
+    return TRACER['current']
+
+@contextlib.contextmanager
+def span(name, category, **args):
+    """record the time spent in the with block as a span, extra keyword arguments are shown as span arguments"""
+    tracer = TRACER['current']
+    if tracer is None:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as exception:
+        args['exception'] = type(exception).__name__
+        raise
+    finally:
+        tracer.complete(name, category, start, time.perf_counter() - start, args)
+
+def sleep(seconds, reason):
+    """time.sleep(), recorded as a span of the sleep category"""
+    with span('sleep: ' + reason, 'sleep', seconds=seconds):
+        time.sleep(seconds)
+
+class StepTracer:
+    """context manager factory recording a span for each step it is called with"""
+    @contextlib.contextmanager
+    def __call__(self, step):
+        with span(step['name'], 'step', module=step['module']):
+            yield
@@ -0,0 +1,97 @@
+"""hecat - persistent cache of URL check results (processors/url_check `cache_file` module option)
+Each URL is stored with the result of its last check: success, HTTP status code (NULL for connection errors), error
+message, latency and time of the check. processors/url_check reuses results which are more recent than their TTL
+(`cache_success_ttl_days`, shorter `cache_error_ttl_days` for failures), and checks the stalest URLs first when
+`max_checks` limits the number of URLs checked in a run, so that a full sweep can be spread across several runs.
+Hosts which returned an error to a HEAD request but not to a GET request are also recorded, and checked with GET only
+for HEAD_UNSUPPORTED_TTL_DAYS days.
+
+$ sqlite3 .hecat-url-cache.sqlite "SELECT url, status, message FROM url_checks WHERE success = 0 ORDER BY checked_at"
+"""
+import os
+import time
+import sqlite3
+import logging
+
+# bump when the format of the cache or its keys change (2: URLs are normalized, see processors/url_check)
+URL_CACHE_VERSION = 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS url_checks (
+    url TEXT PRIMARY KEY,
+    success INTEGER NOT NULL,
+    status INTEGER,
+    message TEXT,
+    latency REAL,
+    checked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS url_checks_checked_at ON url_checks (checked_at);
+CREATE TABLE IF NOT EXISTS head_unsupported_hosts (host TEXT PRIMARY KEY, detected_at REAL NOT NULL);
+'''
+
+# hosts which do not handle HEAD requests are checked again with HEAD after this number of days
+HEAD_UNSUPPORTED_TTL_DAYS = 30
+# number of URLs queried at once (SQLite limits the number of parameters of a statement)
+QUERY_CHUNK_SIZE = 500
+
+class UrlCache:
+    """SQLite store of the last check result of each URL, results are dicts with the keys of the url_checks table
+    the connection must only be used from the thread which created the cache"""
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(cache_file)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        version = self.connection.execute("SELECT value FROM metadata WHERE key = 'version'").fetchone()
+        if version is not None and int(version[0]) != URL_CACHE_VERSION:
+            logging.info('discarding URL cache %s (format version changed)', cache_file)
+            self.connection.executescript('DROP TABLE url_checks; DROP TABLE head_unsupported_hosts; DELETE FROM metadata;')
+            self.connection.executescript(SCHEMA)
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO metadata VALUES (?, ?)', ('version', str(URL_CACHE_VERSION)))
+
+    def get(self, urls):
+        """return a dict of {url: result} for URLs of the list which are in the cache"""
+        urls = list(urls)
+        results = {}
+        for start in range(0, len(urls), QUERY_CHUNK_SIZE):
+            chunk = urls[start:start + QUERY_CHUNK_SIZE]
+            rows = self.connection.execute('SELECT * FROM url_checks WHERE url IN ({})'.format(', '.join('?' * len(chunk))), chunk)
+            for row in rows:
+                result = dict(row)
+                result['success'] = bool(result['success'])
+                results[result.pop('url')] = result
+        return results
+
+    def record(self, url, result):
+        """record the result of a check, call commit() to write it"""
+        self.connection.execute('INSERT OR REPLACE INTO url_checks VALUES (?, ?, ?, ?, ?, ?)', (
+            url, int(result['success']), result['status'], result['message'], result['latency'], result['checked_at']))
+
+    def head_unsupported_hosts(self):
+        """return the set of hosts recorded as not handling HEAD requests in the last HEAD_UNSUPPORTED_TTL_DAYS days"""
+        rows = self.connection.execute('SELECT host FROM head_unsupported_hosts WHERE detected_at > ?',
+                                       (time.time() - HEAD_UNSUPPORTED_TTL_DAYS * 86400,))
+        return {row[0] for row in rows}
+
+    def record_head_unsupported_host(self, host):
+        """record a host which does not handle HEAD requests, call commit() to write it"""
+        self.connection.execute('INSERT OR REPLACE INTO head_unsupported_hosts VALUES (?, ?)', (host, time.time()))
+
+    def commit(self):
+        """write recorded results to the cache file"""
+        self.connection.commit()
+
+    def close(self):
+        """write recorded results and close the cache file"""
+        self.connection.commit()
+        self.connection.close()
+
+def is_fresh(result, now, success_ttl_days, error_ttl_days):
+    """return True if a cached result is more recent than the TTL matching its success"""
+    ttl_days = success_ttl_days if result['success'] else error_ttl_days
+    return now - result['checked_at'] < ttl_days * 86400
@@ -1,8 +1,41 @@
 """hecat - common utilities"""
 import sys
 import os
+import re
 import ruamel.yaml
 import logging
+import concurrent.futures
+import functools
+import hashlib
+import pickle
+import json
+from . import dataset
+from . import tracing
+
+# bump when the format of cached data changes, to invalidate existing cache files
+CACHE_VERSION = 1
+# data loaded from a directory is cached in a single cache file, files loaded on their own are only cached when they are
+# at least this size (bytes): small files are fast to parse, and caching them would create one cache file per file
+CACHE_MIN_FILE_SIZE = 1048576
+
+# changes to single items of a data file are appended to DATA_FILE.journal (see checkpoint_item())
+JOURNAL_SUFFIX = '.journal'
+# number of changes recorded in the journal of each data file since it was last written
+JOURNAL_ENTRIES = {}
+# sharded data directories for which checkpoint: journal was requested (and ignored, see checkpoint_item())
+JOURNAL_IGNORED = set()
+# sharded data directory: (id of the list of items, number of items, shard_size, {shard name: [item indexes]}), so that
+# checkpoint_item() does not compute the shard of every item on each checkpoint (see shard_indexes())
+SHARD_INDEXES = {}
+# default number of ids per file, for data files stored as a directory of shards (see write_data_shards())
+DEFAULT_SHARD_SIZE = 1000
+# the order of items in a sharded data directory is recorded in DIRECTORY.order (see write_data_shards())
+ORDER_SUFFIX = '.order'
+
+LOAD_OPTIONS = {
+    'workers': 1,
+    'cache_directory': None
+}
 
 def list_files(directory):
     """list files in a directory, return an alphabetically sorted list"""
@@ -33,33 +66,243 @@ def to_kebab_case(string):
     newstring = string.translate(str.maketrans(replacements)).lower()
     return newstring
 
-def load_yaml_data(path, sort_key=False):
+def detect_provider(url):
+    """detect the hosting provider from a repository URL"""
+    if re.search(r'^https://github\.com/[\w\.\-]+/[\w\.\-]+/?$', url):
+        return 'github'
+    if re.search(r'^https://gitlab\.com/[\w\.\-]+/[\w\.\-]+/?$', url):
+        return 'gitlab'
+    return None
+
+def set_load_options(options):
+    """configure how load_yaml_data parses source files, from the 'options' section of the configuration file
+    load_workers: number of processes used to parse files in a directory (default 1, 0 = one per CPU)
+    cache_directory: directory where parsed data is cached between runs (default none, no caching), one cache file per
+    source directory, and per source file larger than CACHE_MIN_FILE_SIZE"""
+    workers = options.get('load_workers', 1)
+    if not isinstance(workers, int) or isinstance(workers, bool) or workers < 0:
+        logging.error('invalid value for load_workers: %s (must be a positive integer, or 0 to use all CPUs)', workers)
+        sys.exit(1)
+    LOAD_OPTIONS['workers'] = workers or os.cpu_count() or 1
+    LOAD_OPTIONS['cache_directory'] = options.get('cache_directory', None)
+
+def load_yaml_file(path, read_only=False):
+    """load data from a single YAML file
+    if read_only=True, use the faster (C/libyaml-based when available) safe loader, which returns plain dicts/lists
+    and does not preserve comments/formatting, the data should not be written back to the file"""
+    yaml = ruamel.yaml.YAML(typ='safe' if read_only else 'rt')
+    logging.debug('loading data from %s', path)
+    with open(path, 'r', encoding="utf-8") as yaml_data:
+        return yaml.load(yaml_data)
+
+def parse_yaml_files(paths, read_only=False):
+    """parse a list of YAML files, return a list of items in the same order
+    files are parsed by a pool of LOAD_OPTIONS['workers'] processes when more than 1 worker is configured"""
+    workers = min(LOAD_OPTIONS['workers'], len(paths))
+    if workers <= 1:
+        return [load_yaml_file(path, read_only) for path in paths]
+    logging.debug('loading %s files using %s processes', len(paths), workers)
+    chunksize = max(1, len(paths) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(functools.partial(load_yaml_file, read_only=read_only), paths, chunksize=chunksize))
+
+def cache_file_path(path, read_only=False):
+    """return the path to the cache file for a source file or directory"""
+    cache_id = os.path.abspath(path) + (':safe' if read_only else ':rt')
+    digest = hashlib.sha1(cache_id.encode('utf-8')).hexdigest()
+    return os.path.join(LOAD_OPTIONS['cache_directory'], digest + '.pickle')
+
+def read_cache(cache_file):
+    """return cached entries {path: ((mtime_ns, size), item)} from a cache file, or an empty dict"""
+    try:
+        with open(cache_file, 'rb') as cache:
+            cached = pickle.load(cache)
+    except FileNotFoundError:
+        return {}
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as err:
+        logging.warning('ignoring unreadable cache file %s: %s', cache_file, err)
+        return {}
+    if cached.get('version') != CACHE_VERSION:
+        logging.debug('ignoring cache file %s from a different version', cache_file)
+        return {}
+    return cached['entries']
+
+def write_cache(cache_file, entries):
+    """write cache entries to a cache file"""
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file + '.tmp', 'wb') as cache:
+        pickle.dump({'version': CACHE_VERSION, 'entries': entries}, cache, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_file + '.tmp', cache_file)
+
+def load_yaml_files(paths, cache_key=None, read_only=False):
+    """load data from a list of YAML files, return a list of items in the same order
+    if a cache directory is configured, only files that changed (mtime/size) since the previous run of
+    load_yaml_files() with the same cache_key are parsed, others are loaded from the cache"""
+    if not LOAD_OPTIONS['cache_directory'] or cache_key is None:
+        return parse_yaml_files(paths, read_only)
+    cache_file = cache_file_path(cache_key, read_only)
+    cached = read_cache(cache_file)
+    entries = {}
+    changed = []
+    for path in paths:
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if path in cached and cached[path][0] == signature:
+            entries[path] = cached[path]
+        else:
+            changed.append((path, signature))
+    if changed:
+        logging.debug('%s: %s files changed since last cached load', cache_key, len(changed))
+        for (path, signature), item in zip(changed, parse_yaml_files([path for path, _ in changed], read_only)):
+            entries[path] = (signature, item)
+    if changed or len(cached) != len(entries):
+        write_cache(cache_file, entries)
+    return [entries[path][1] for path in paths]
+
+def load_yaml_data(path, sort_key=False, read_only=False):
     """load data from YAML source files
     if the path is a file, data will be loaded directly from it
     if the path is a directory, data will be loaded by adding the content of each file in the directory to a list
-    if sort_key=SOMEKEY is passed, items will be sorted alphabetically by the specified key"""
-    yaml = ruamel.yaml.YAML(typ='rt')
-    data = []
+    (files containing a list of items, such as shards written by write_data_shards(), are added item by item, in the
+    order recorded by write_data_shards())
+    if sort_key=SOMEKEY is passed, items will be sorted alphabetically by the specified key
+    if read_only=True, data is loaded as plain dicts/lists using the faster safe loader (see load_yaml_file())
+    when data sharing is enabled (see hecat/dataset.py), directories and data files larger than CACHE_MIN_FILE_SIZE are
+    kept in memory for the next steps"""
+    shared_data = dataset.current()
+    if shared_data is not None and not (os.path.isdir(path) or (os.path.isfile(path) and os.path.getsize(path) >= CACHE_MIN_FILE_SIZE)):
+        shared_data = None
+    data = shared_data.get(path, read_only) if shared_data is not None else None
+    if data is None:
+        with tracing.span('load ' + path, 'yaml', read_only=read_only):
+            if os.path.isfile(path):
+                cache_key = path if os.path.getsize(path) >= CACHE_MIN_FILE_SIZE else None
+                data = load_yaml_files([path], cache_key=cache_key, read_only=read_only)[0]
+            elif os.path.isdir(path):
+                data = []
+                for file_data in load_yaml_files([path + '/' + file for file in sorted(list_files(path))], cache_key=path, read_only=read_only):
+                    if isinstance(file_data, list):
+                        data.extend(file_data)
+                    else:
+                        data.append(file_data)
+                data = restore_order(path, data)
+            else:
+                logging.error('%s is not a file or directory', path)
+                sys.exit(1)
+        if shared_data is not None:
+            shared_data.store(path, data, read_only)
+    if os.path.isfile(path + JOURNAL_SUFFIX):
+        replay_journal(path, data)
+    if sort_key:
+        data = sorted(data, key=lambda k: k[sort_key].upper())
+    return data
+
+def order_file_path(directory):
+    """return the path to the file recording the order of items in a sharded data directory"""
+    return directory.rstrip('/') + ORDER_SUFFIX
+
+def restore_order(directory, items):
+    """return items loaded from a sharded data directory in the order they were written by write_data_shards()
+    (shards contain ranges of ids, the order of the list is usually different, e.g. newest first)
+    items missing from the order file (added manually) are kept at the end, in shard order"""
+    try:
+        with open(order_file_path(directory), 'r', encoding='utf-8') as order_file:
+            order = json.load(order_file)
+    except FileNotFoundError:
+        return items
+    positions = {item_id: position for position, item_id in enumerate(order)}
+    return sorted(items, key=lambda item: positions.get(item.get('id') if isinstance(item, dict) else None, len(positions)))
+
+def split_yaml_sequence(yaml_file):
+    """split a YAML file containing a top-level block sequence into chunks of text, one per item
+    return None if the file does not start with a top-level block sequence (mapping, flow sequence, indented sequence...)"""
+    chunk = []
+    for line in yaml_file:
+        if line.startswith('-') and line[1:2] in ('', ' ', '\n', '\r') and not line.startswith('---'):
+            if chunk:
+                yield ''.join(chunk)
+            chunk = [line]
+        elif chunk:
+            chunk.append(line)
+        elif line.strip() and not line.lstrip().startswith('#') and not line.startswith(('%', '---')):
+            # first significant line is not a sequence item
+            yield None
+            return
+    if chunk:
+        yield ''.join(chunk)
+
+def iter_yaml_file_items(path):
+    """yield items from a YAML file one at a time, without loading the whole file in memory when it contains a
+    top-level block sequence (as written by write_data_file()), items are loaded with the read-only safe loader"""
+    yaml = ruamel.yaml.YAML(typ='safe')
+    logging.debug('loading data from %s', path)
+    with open(path, 'r', encoding="utf-8") as yaml_file:
+        for chunk in split_yaml_sequence(yaml_file):
+            if chunk is None:
+                yaml_file.seek(0)
+                data = yaml.load(yaml_file)
+                if isinstance(data, list):
+                    yield from data
+                else:
+                    yield data
+                return
+            yield from yaml.load(chunk)
+
+def iter_yaml_items(path, use_shared_data=False):
+    """yield items from YAML source files one at a time, in the same order as load_yaml_data(path)
+    memory usage does not grow with the number of items, items are plain dicts/lists and should not be written back
+    changes pending in the journal of a data file (see checkpoint_item()) are applied
+    items of a sharded data directory whose order was recorded by write_data_shards() are loaded in memory to be
+    yielded in this order
+    if use_shared_data=True and the data was already loaded by a previous step (see hecat/dataset.py), a copy of the
+    whole data is taken from memory instead of parsing the files again (memory usage then grows with the number of
+    items, but it already does for the shared dataset)"""
+    shared_data = dataset.current()
+    for read_only in (True, False):
+        if use_shared_data and shared_data is not None and shared_data.has(path, read_only):
+            yield from load_yaml_data(path, read_only=read_only)
+            return
+    journal = {}
+    if os.path.isfile(path + JOURNAL_SUFFIX):
+        with open(path + JOURNAL_SUFFIX, 'r', encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                journal[entry['id']] = entry['item']
     if os.path.isfile(path):
-        logging.debug('loading data from %s', path)
-        with open(path, 'r', encoding="utf-8") as yaml_data:
-            data = yaml.load(yaml_data)
-        if sort_key:
-            data = sorted(data, key=lambda k: k[sort_key].upper())
-        return data
+        files = [path]
     elif os.path.isdir(path):
-        for file in sorted(list_files(path)):
-            source_file = path + '/' + file
-            logging.debug('loading data from %s', source_file)
-            with open(source_file, 'r', encoding="utf-8") as yaml_data:
-                item = yaml.load(yaml_data)
-                data.append(item)
-            if sort_key:
-                data = sorted(data, key=lambda k: k[sort_key].upper())
-        return data
+        files = [path + '/' + file for file in sorted(list_files(path))]
     else:
         logging.error('%s is not a file or directory', path)
         sys.exit(1)
+    items = (item for file in files for item in iter_yaml_file_items(file))
+    if os.path.isdir(path) and os.path.isfile(order_file_path(path)):
+        items = restore_order(path, list(items))
+    for item in items:
+        if journal and isinstance(item, dict) and item.get('id') in journal:
+            yield journal[item['id']]
+        else:
+            yield item
+
+def count_yaml_items(path):
+    """return the number of items iter_yaml_items(path) would yield, without parsing files containing a block sequence
+    or a mapping (a single item), other files (flow or indented sequences) are parsed"""
+    if os.path.isdir(path):
+        return sum(count_yaml_items(path + '/' + file) for file in list_files(path))
+    with open(path, 'r', encoding="utf-8") as yaml_file:
+        count = 0
+        for chunk in split_yaml_sequence(yaml_file):
+            if chunk is None:
+                yaml_file.seek(0)
+                first_line = next(line for line in yaml_file if line.strip() and not line.lstrip().startswith('#') and not line.startswith(('%', '---')))
+                if not first_line.lstrip().startswith(('[', '-')):
+                    return 1
+                return sum(1 for _ in iter_yaml_file_items(path))
+            count += 1
+        return count
 
 def load_config(config_file):
     """load steps/settings from a configuration file"""
@@ -99,13 +342,148 @@ def render_markdown_licenses(step, licenses, back_to_top_url=None):
             sys.exit(1)
     return markdown_licenses
 
-def write_data_file(step, items):
-    """write updated data back to the data file"""
+def write_yaml_file(path, items, temp_file=None, severity=logging.info):
+    """write data to a YAML file, through a temporary file which is then renamed"""
     yaml = ruamel.yaml.YAML(typ='rt')
     yaml.indent(sequence=2, offset=0)
     yaml.width = 99999
-    with open(step['module_options']['data_file'] + '.tmp', 'w', encoding="utf-8") as temp_yaml_file:
-        logging.info('writing temporary data file %s', step['module_options']['data_file'] + '.tmp')
+    if temp_file is None:
+        temp_file = path + '.tmp'
+    with open(temp_file, 'w', encoding="utf-8") as temp_yaml_file, tracing.span('write ' + path, 'yaml'):
+        severity('writing temporary data file %s', temp_file)
         yaml.dump(items, temp_yaml_file)
-    logging.info('writing data file %s', step['module_options']['data_file'])
-    os.rename(step['module_options']['data_file'] + '.tmp', step['module_options']['data_file'])
\ No newline at end of file
+    severity('writing data file %s', path)
+    os.rename(temp_file, path)
+
+def write_file_if_changed(path, content):
+    """write text content to a file, unless the file already contains exactly this content
+    unchanged files keep their modification time, so that incremental builds (sphinx, hecat --watch) ignore them
+    return True if the file was written"""
+    try:
+        with open(path, 'r', encoding='utf-8') as existing_file:
+            if existing_file.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    with open(path, 'w', encoding='utf-8') as output_file:
+        output_file.write(content)
+    return True
+
+def shard_file_name(item, shard_size):
+    """return the name of the shard file an item belongs to, shards contain items by ranges of shard_size ids"""
+    return '{:08d}.yml'.format(item['id'] // shard_size)
+
+def write_data_shard(directory, name, items):
+    """write a single shard file to a sharded data directory"""
+    # write the temporary file outside the directory, so that it is never loaded as a shard
+    write_yaml_file(os.path.join(directory, name), items, temp_file=directory.rstrip('/') + '.' + name + '.tmp', severity=logging.debug)
+
+def shard_indexes(directory, items, shard_size, rebuild=False):
+    """return {shard name: [indexes of the items it contains]} for the list of items of a sharded data directory
+    computed once per list of items, and again only if the number of items or shard_size changed, or rebuild=True"""
+    cached = SHARD_INDEXES.get(directory)
+    if not rebuild and cached is not None and cached[:3] == (id(items), len(items), shard_size):
+        return cached[3]
+    indexes = {}
+    for index, item in enumerate(items):
+        indexes.setdefault(shard_file_name(item, shard_size), []).append(index)
+    SHARD_INDEXES[directory] = (id(items), len(items), shard_size, indexes)
+    return indexes
+
+def write_data_shards(directory, items, shard_size=DEFAULT_SHARD_SIZE):
+    """write items to a sharded data directory, one YAML file per range of shard_size ids
+    the order of the list is recorded in DIRECTORY.order, and restored when loading the directory
+    shard files which no longer contain any item are removed"""
+    shards = {}
+    for item in items:
+        shards.setdefault(shard_file_name(item, shard_size), []).append(item)
+    logging.info('writing %s items to %s shards in %s', len(items), len(shards), directory)
+    for name, shard_items in shards.items():
+        write_data_shard(directory, name, shard_items)
+    for file in list_files(directory):
+        if file not in shards:
+            logging.info('removing shard %s/%s which no longer contains any item', directory, file)
+            os.remove(os.path.join(directory, file))
+    order_file = order_file_path(directory)
+    with open(order_file + '.tmp', 'w', encoding='utf-8') as order_json:
+        json.dump([item['id'] for item in items], order_json)
+    os.replace(order_file + '.tmp', order_file)
+
+def write_data_file(step, items):
+    """write updated data back to the data file
+    if the data file is a directory, items are written to one file per range of ids (shard_size module option, default 1000)"""
+    if os.path.isdir(step['module_options']['data_file']):
+        write_data_shards(step['module_options']['data_file'], items, step['module_options'].get('shard_size', DEFAULT_SHARD_SIZE))
+    else:
+        write_yaml_file(step['module_options']['data_file'], items)
+    dataset.invalidate(step['module_options']['data_file'])
+    # all changes recorded in the journal are now part of the data file
+    discard_journal(step['module_options']['data_file'])
+
+def discard_journal(data_file):
+    """remove the journal of a data file, after the data file was written with all changes it contains, or from scratch
+    (a journal left in place would be replayed over the new content the next time the file is loaded)"""
+    if os.path.isfile(data_file + JOURNAL_SUFFIX):
+        logging.debug('removing journal file %s', data_file + JOURNAL_SUFFIX)
+        os.remove(data_file + JOURNAL_SUFFIX)
+    JOURNAL_ENTRIES.pop(data_file, None)
+
+def replay_journal(path, items):
+    """apply changes recorded in the journal of a data file to the list of items loaded from it
+    each journal line contains the full, updated version of an item, identified by its 'id' key"""
+    items_by_id = {item['id']: item for item in items if 'id' in item}
+    entries_count = 0
+    with open(path + JOURNAL_SUFFIX, 'r', encoding="utf-8") as journal:
+        for line_number, line in enumerate(journal, start=1):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # the last line may be incomplete if the previous run was interrupted while writing it
+                logging.warning('%s%s: ignoring invalid journal entry on line %s', path, JOURNAL_SUFFIX, line_number)
+                continue
+            if entry['id'] not in items_by_id:
+                logging.warning('%s%s: ignoring journal entry for unknown id %s', path, JOURNAL_SUFFIX, entry['id'])
+                continue
+            item = items_by_id[entry['id']]
+            item.clear()
+            item.update(entry['item'])
+            entries_count += 1
+    logging.info('replayed %s changes from journal %s%s', entries_count, path, JOURNAL_SUFFIX)
+
+def checkpoint_item(step, items, item):
+    """save changes made to a single item of the data file
+    with the checkpoint: journal module option, the updated item is appended to the data file's journal, and the data
+    file is only rewritten every journal_compact_every (default 100) changes, or when flush_checkpoints() is called
+    otherwise, the whole data file is rewritten
+    if the data file is a sharded directory, only the shard containing the item is rewritten (checkpoint: journal is
+    ignored, rewriting a single shard is already cheap)"""
+    data_file = step['module_options']['data_file']
+    if os.path.isdir(data_file):
+        if step['module_options'].get('checkpoint', 'rewrite') == 'journal' and data_file not in JOURNAL_IGNORED:
+            logging.info('%s is a sharded data directory, checkpoint: journal is ignored, only the shard containing each updated item is rewritten', data_file)
+            JOURNAL_IGNORED.add(data_file)
+        shard_size = step['module_options'].get('shard_size', DEFAULT_SHARD_SIZE)
+        name = shard_file_name(item, shard_size)
+        indexes = shard_indexes(data_file, items, shard_size).get(name, [])
+        if not any(items[index] is item for index in indexes):
+            # items were replaced or reordered since the index was computed
+            indexes = shard_indexes(data_file, items, shard_size, rebuild=True)[name]
+        write_data_shard(data_file, name, [items[index] for index in indexes])
+        dataset.invalidate(os.path.join(data_file, name))
+        return
+    if step['module_options'].get('checkpoint', 'rewrite') != 'journal':
+        write_data_file(step, items)
+        return
+    with open(data_file + JOURNAL_SUFFIX, 'a', encoding="utf-8") as journal:
+        journal.write(json.dumps({'id': item['id'], 'item': item}, default=str, ensure_ascii=False) + '\n')
+        journal.flush()
+        os.fsync(journal.fileno())
+    JOURNAL_ENTRIES[data_file] = JOURNAL_ENTRIES.get(data_file, 0) + 1
+    logging.debug('recorded changes to item %s in journal %s%s', item['id'], data_file, JOURNAL_SUFFIX)
+    if JOURNAL_ENTRIES[data_file] >= step['module_options'].get('journal_compact_every', 100):
+        write_data_file(step, items)
+
+def flush_checkpoints(step, items):
+    """write the data file if changes are still pending in its journal"""
+    if os.path.isfile(step['module_options']['data_file'] + JOURNAL_SUFFIX):
+        write_data_file(step, items)
\ No newline at end of file
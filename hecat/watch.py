@@ -0,0 +1,108 @@
+"""hecat - watch input files and re-run affected steps when they change (hecat --watch)
+After a first run of all steps, the inputs of importers/exporters (and of steps declaring their `inputs`, see
+hecat/state.py) are polled for changes. When files change, hecat waits until they have not changed for one polling
+interval (so that a batch of edits triggers a single run), then runs these steps again: steps whose inputs did not
+change are skipped. Other steps (processors) only run once. Stop watching with Ctrl+C.
+Files written by hecat itself are not watched, so that a run does not trigger the next one: hidden files and
+directories (.git, .hecat-state.json, .hecat-cache...), temporary files, and files passed as `ignored` (state file,
+metrics/trace/log files, URL check cache).
+"""
+import os
+import sys
+import copy
+import time
+import logging
+from .state import step_files, list_tree, is_inside
+
+def watched_steps(steps):
+    """return copies of the steps whose inputs are known, depends_on lists only keep names of watched steps"""
+    watched = []
+    names = set()
+    for step in steps:
+        inputs, _ = step_files(step)
+        if not inputs or not step.get('incremental', True):
+            continue
+        step = copy.deepcopy(step)
+        if 'depends_on' in step:
+            depends_on = step['depends_on'] or []
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+            step['depends_on'] = [name for name in depends_on if name in names]
+        watched.append(step)
+        names.add(step['name'])
+    return watched
+
+def watched_files(steps):
+    """return the list of input paths of steps, and the list of absolute output paths (excluded from inputs)"""
+    inputs = []
+    outputs = []
+    for step in steps:
+        step_inputs, step_outputs = step_files(step)
+        inputs.extend(path for path in step_inputs if path not in inputs)
+        outputs.extend(os.path.abspath(path) for path in step_outputs)
+    return inputs, outputs
+
+def snapshot(inputs, outputs, ignored=()):
+    """return a dict of {file: (modification time, size)} for all files in inputs, except outputs, hidden/temporary
+    files and files in ignored (absolute paths)"""
+    signatures = {}
+    for input_path in inputs:
+        if not os.path.exists(input_path):
+            continue
+        for path in list_tree(input_path, ignored):
+            if is_inside(path, outputs):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError: # removed while listing
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+def changed_files(before, after):
+    """return the sorted list of files added, modified or removed between two snapshots"""
+    return sorted(path for path in set(before) | set(after) if before.get(path) != after.get(path))
+
+def ignored_files(steps, paths):
+    """return the set of absolute paths of files written by hecat which must not trigger a run: paths (state file,
+    metrics/trace/log files...) and the cache files of steps (cache_file module option)"""
+    paths = list(paths) + [(step.get('module_options') or {}).get('cache_file') for step in steps]
+    return {os.path.abspath(path) for path in paths if path}
+
+def watch(steps, run_steps, interval=1.0, ignored=()):
+    """call run_steps(steps) with the steps whose inputs are known each time their inputs change, until interrupted
+    steps must be a pristine copy of the configuration (modules add default values to module_options)
+    changes to files in ignored (files written by hecat itself, see ignored_files()) are not watched"""
+    ignored = ignored_files(steps, ignored)
+    steps = watched_steps(steps)
+    if not steps:
+        logging.error('--watch: no step with known inputs to watch (importers, exporters, or steps declaring inputs)')
+        sys.exit(1)
+    inputs, outputs = watched_files(steps)
+    logging.info('watching %s for changes (steps: %s), press Ctrl+C to stop', ', '.join(inputs), ', '.join(step['name'] for step in steps))
+    before = snapshot(inputs, outputs, ignored)
+    try:
+        while True:
+            time.sleep(interval)
+            after = snapshot(inputs, outputs, ignored)
+            if after == before:
+                continue
+            # wait until files stop changing
+            while True:
+                time.sleep(interval)
+                latest = snapshot(inputs, outputs, ignored)
+                if latest == after:
+                    break
+                after = latest
+            changes = changed_files(before, after)
+            logging.info('%s files changed: %s', len(changes), ', '.join(changes[:10]) + (' ...' if len(changes) > 10 else ''))
+            before = after
+            try:
+                run_steps(copy.deepcopy(steps))
+                logging.info('all steps completed, watching for changes')
+            except SystemExit:
+                logging.error('a step failed, watching for changes')
+            except Exception as error: # pylint: disable=broad-except
+                logging.error('a step failed (%s: %s), watching for changes', type(error).__name__, error)
+    except KeyboardInterrupt:
+        logging.info('stopped watching')
@@ -25,6 +25,7 @@ setup(
     },
     install_requires=[
         'ruamel.yaml==0.17.21',
+        'ruamel.yaml.clib; platform_python_implementation=="CPython"',
         'python-dateutil',
         'requests',
         'yt_dlp',
@@ -0,0 +1,32 @@
+"""unit tests for hecat.catalog"""
+import os
+import pytest
+from hecat import catalog, utils
+
+def write_source(directory):
+    """write a minimal source directory with 2 software files, one of them containing a list of items"""
+    for subdirectory in ('software', 'tags'):
+        (directory / subdirectory).mkdir(parents=True)
+    utils.write_yaml_file(str(directory / 'software' / 'b.yml'), {'name': 'B', 'tags': ['Wikis'], 'licenses': ['MIT']})
+    utils.write_yaml_file(str(directory / 'software' / 'a.yml'), [{'name': 'A1', 'tags': ['Wikis']}, {'name': 'A2', 'tags': ['Blogs']}])
+    utils.write_yaml_file(str(directory / 'tags' / 'wikis.yml'), {'name': 'Wikis'})
+    utils.write_yaml_file(str(directory / 'licenses.yml'), [{'identifier': 'MIT', 'name': 'MIT License'}])
+
+def test_software_rows_keep_their_file_name(tmp_path):
+    """each software row records the file it was loaded from, also for files containing several items"""
+    write_source(tmp_path)
+    catalog.build_catalog(str(tmp_path), str(tmp_path / 'catalog.sqlite'))
+    connection = catalog.open_catalog(str(tmp_path / 'catalog.sqlite'))
+    assert list(connection.execute('SELECT file, name FROM software ORDER BY id')) == [('a.yml', 'A1'), ('a.yml', 'A2'), ('b.yml', 'B')]
+    assert [software['name'] for software in catalog.software_by_tag(connection, 'Wikis')] == ['A1', 'B']
+    connection.close()
+
+def test_stale_catalog_is_refused(tmp_path):
+    """a catalog whose source files were modified after it was built can not be opened"""
+    write_source(tmp_path)
+    catalog.build_catalog(str(tmp_path), str(tmp_path / 'catalog.sqlite'))
+    catalog.open_catalog(str(tmp_path / 'catalog.sqlite')).close()
+    utils.write_yaml_file(str(tmp_path / 'software' / 'b.yml'), {'name': 'B', 'tags': ['Blogs']})
+    os.utime(tmp_path / 'software' / 'b.yml', ns=(0, 0))
+    with pytest.raises(SystemExit):
+        catalog.open_catalog(str(tmp_path / 'catalog.sqlite'))
@@ -0,0 +1,33 @@
+"""unit tests for hecat.exporters.markdown_multipage"""
+import copy
+from hecat.exporters import markdown_multipage
+
+STEP = {'module_options': {'exclude_licenses': ['WTFPL']}}
+TAGS = [{'name': 'Wikis'}, {'name': 'Blogs'}, {'name': 'Games'}]
+PLATFORMS = [{'name': 'Python'}, {'name': 'PHP'}]
+SOFTWARE = [
+    {'name': 'wiki', 'tags': ['Wikis'], 'platforms': ['Python'], 'licenses': ['MIT']},
+    {'name': 'wiki-blog', 'tags': ['Wikis', 'Blogs'], 'platforms': ['PHP'], 'licenses': ['MIT']},
+    {'name': 'blog', 'tags': ['Blogs'], 'platforms': ['PHP'], 'licenses': ['MIT']},
+    {'name': 'game', 'tags': ['Games'], 'platforms': ['Python'], 'licenses': ['MIT']},
+    {'name': 'excluded', 'tags': ['Games'], 'platforms': ['Python'], 'licenses': ['WTFPL']},
+]
+
+def changed_pages(software_list):
+    """return the sorted list of pages whose fingerprint differs from the fingerprint with SOFTWARE"""
+    before = markdown_multipage.page_fingerprints(STEP, TAGS, PLATFORMS, SOFTWARE)
+    after = markdown_multipage.page_fingerprints(STEP, TAGS, PLATFORMS, software_list)
+    return sorted(page for page in set(before) | set(after) if before.get(page) != after.get(page))
+
+def test_editing_software_only_changes_related_pages():
+    """editing a software entry changes its page, its tag/platform pages and pages of software sharing a tag"""
+    software_list = copy.deepcopy(SOFTWARE)
+    software_list[0]['description'] = 'changed'
+    assert changed_pages(software_list) == ['platform/Python', 'software/wiki', 'software/wiki-blog', 'tag/Wikis']
+
+def test_excluded_software_only_changes_related_pages():
+    """software excluded by exclude_licenses has no page and is not listed on tag/platform pages, but it is listed as
+    related software"""
+    software_list = copy.deepcopy(SOFTWARE)
+    software_list[4]['description'] = 'changed'
+    assert changed_pages(software_list) == ['software/game']
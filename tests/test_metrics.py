@@ -0,0 +1,28 @@
+"""unit tests for hecat.metrics"""
+import pytest
+from hecat import metrics
+
+@pytest.fixture
+def metrics_store(monkeypatch):
+    """enable metrics for the test"""
+    monkeypatch.setitem(metrics.METRICS, 'current', metrics.Metrics())
+    return metrics.current()
+
+def test_failed_and_successful_requests_are_rendered(metrics_store):
+    """requests without HTTP status are counted with code="error" next to status codes"""
+    metrics.record_http_request('GET', 200, 0.1)
+    metrics.record_http_request('GET', None, 0.2)
+    metrics.record_http_request('GET', 200, 0.3)
+    rendered = metrics_store.render()
+    assert 'hecat_http_requests{code="200",method="GET"} 2\n' in rendered
+    assert 'hecat_http_requests{code="error",method="GET"} 1\n' in rendered
+    assert 'hecat_http_request_duration_seconds_count{method="GET"} 3\n' in rendered
+    assert rendered.endswith('# EOF\n')
+
+def test_metrics_file_is_written(metrics_store, tmp_path):
+    """metrics are written in OpenMetrics text format, label values are escaped"""
+    metrics.set_value('hecat_step_items', 3, result='success', step='say "hi"', module='processors/url_check')
+    metrics_store.write(str(tmp_path / 'hecat.prom'))
+    rendered = (tmp_path / 'hecat.prom').read_text(encoding='utf-8')
+    assert '# TYPE hecat_step_items gauge\n' in rendered
+    assert 'hecat_step_items{module="processors/url_check",result="success",step="say \\"hi\\""} 3\n' in rendered
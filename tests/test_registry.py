@@ -0,0 +1,16 @@
+"""unit tests for hecat.registry and lazy imports of module packages"""
+import importlib
+from hecat import registry
+
+def test_builtin_modules_are_functions():
+    """all built-in modules resolve to the function implementing them"""
+    for name, (python_module, function_name) in registry.BUILTIN_MODULES.items():
+        function = registry.load_module(name)
+        assert callable(function) and function.__name__ == function_name
+        assert function.__module__ == python_module
+
+def test_package_attributes_are_functions_after_submodule_import():
+    """importing a submodule does not replace the function of the same name exported by the package"""
+    importlib.import_module('hecat.processors.awesome_lint')
+    from hecat.processors import awesome_lint # pylint: disable=import-outside-toplevel
+    assert callable(awesome_lint) and awesome_lint.__module__ == 'hecat.processors.awesome_lint'
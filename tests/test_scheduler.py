@@ -0,0 +1,34 @@
+"""unit tests for hecat.scheduler"""
+import threading
+import pytest
+from hecat import scheduler
+
+def test_steps_without_depends_on_wait_for_all_previous_steps():
+    """steps without depends_on depend on all previous steps, depends_on only on the listed steps"""
+    steps = [{'name': 'a'}, {'name': 'b', 'depends_on': []}, {'name': 'c'}, {'name': 'd', 'depends_on': 'b'}]
+    assert scheduler.step_dependencies(steps) == [set(), set(), {0, 1}, {1}]
+
+def test_depends_on_must_reference_a_previous_step():
+    """referencing a later or unknown step is refused"""
+    with pytest.raises(SystemExit):
+        scheduler.step_dependencies([{'name': 'a', 'depends_on': ['b']}, {'name': 'b'}])
+
+def test_steps_sharing_a_data_file_are_serialized():
+    """a step waits for previous steps writing the same data file, even if it does not declare it"""
+    steps = [{'name': 'import', 'module_options': {'output_file': 'shaarli.yml'}},
+             {'name': 'videos', 'depends_on': ['import'], 'module_options': {'data_file': 'shaarli.yml'}},
+             {'name': 'webpages', 'depends_on': ['import'], 'module_options': {'data_file': './shaarli.yml'}},
+             {'name': 'other', 'depends_on': ['import'], 'module_options': {'data_file': 'other.yml'}}]
+    assert scheduler.step_dependencies(steps) == [set(), {0}, {0, 1}, {0}]
+
+def test_independent_steps_run_concurrently():
+    """steps whose dependencies have completed run at the same time, up to max_parallel_steps"""
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+    def run_step(step):
+        if step['name'] != 'first':
+            barrier.wait()
+        order.append(step['name'])
+    steps = [{'name': 'first'}, {'name': 'a', 'depends_on': ['first']}, {'name': 'b', 'depends_on': ['first']}]
+    scheduler.run_steps(steps, run_step, max_parallel_steps=2)
+    assert order[0] == 'first' and sorted(order[1:]) == ['a', 'b']
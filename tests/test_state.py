@@ -0,0 +1,68 @@
+"""unit tests for hecat.state"""
+from hecat import state
+from hecat.exporters import render_markdown_singlepage
+
+def test_incremental_runs_are_disabled_by_default(tmp_path):
+    """without the incremental option, steps are never skipped"""
+    step_state = state.StepState(str(tmp_path / 'state.json'))
+    step = {'name': 'export', 'module': 'exporters/sqlite_catalog', 'module_options': {'source_directory': str(tmp_path)}}
+    assert step_state.check(step, render_markdown_singlepage) == (False, None)
+
+def test_module_code_hash_includes_helper_modules():
+    """the code hash of a module covers the hecat modules it uses (utils, catalog...)"""
+    files = state.module_code_files(render_markdown_singlepage)
+    assert any(file.endswith('markdown_singlepage.py') for file in files)
+    assert any(file.endswith('utils.py') for file in files)
+    assert any(file.endswith('catalog.py') for file in files)
+
+def test_state_file_is_removed_after_plain_runs(tmp_path):
+    """without incremental runs, the state file only exists until all steps have completed"""
+    step = {'name': 'step'}
+    for incremental in (False, True):
+        state_file = tmp_path / 'state-{}.json'.format(incremental)
+        step_state = state.StepState(str(state_file), incremental=incremental)
+        step_state.start_run()
+        step_state.begin_step(step)
+        step_state.complete_step(step)
+        assert state_file.exists()
+        step_state.finish_run()
+        assert state_file.exists() == incremental
+
+def test_failed_plain_run_can_be_resumed(tmp_path):
+    """a run without incremental or --resume which fails in a step can be resumed: completed steps are skipped and
+    resumable steps continue where they stopped"""
+    state_file = str(tmp_path / 'state.json')
+    steps = [{'name': 'import'}, {'name': 'metadata'}, {'name': 'export'}]
+    step_state = state.StepState(state_file)
+    step_state.start_run()
+    step_state.begin_step(steps[0])
+    step_state.complete_step(steps[0])
+    step_state.begin_step(steps[1])
+    step_state.progress(steps[1])['updated'] = ['a', 'b']
+    step_state.write() # main writes the state when the run fails
+    step_state = state.StepState(state_file)
+    step_state.start_run(resume=True)
+    assert step_state.begin_step(steps[0])
+    assert not step_state.begin_step(steps[1])
+    assert step_state.progress(steps[1]) == {'updated': ['a', 'b']}
+
+def test_unchanged_step_is_skipped_with_state_file_in_inputs(tmp_path, monkeypatch):
+    """the state file, .git and other hidden files inside an input directory (source_directory: ./) are not inputs"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'software').mkdir()
+    (tmp_path / 'software' / 'a.yml').write_text('name: a\n', encoding='utf-8')
+    (tmp_path / '.git').mkdir()
+    (tmp_path / '.git' / 'index').write_text('1', encoding='utf-8')
+    step = {'name': 'export', 'module': 'exporters/sqlite_catalog', 'module_options': {'source_directory': './', 'output_file': 'out/catalog.sqlite'}}
+    (tmp_path / 'out').mkdir()
+    results = []
+    for run in range(3):
+        step_state = state.StepState('.hecat-state.json', incremental=True)
+        up_to_date, key = step_state.check(step, render_markdown_singlepage)
+        results.append(up_to_date)
+        if not up_to_date:
+            (tmp_path / 'out' / 'catalog.sqlite').write_text('catalog', encoding='utf-8')
+            step_state.record(step, key)
+        (tmp_path / '.git' / 'index').write_text(str(run), encoding='utf-8')
+    assert results == [False, True, True]
+    assert not any('.git' in path or 'hecat-state' in path for path in step_state.state['files'])
@@ -0,0 +1,42 @@
+"""unit tests for hecat.url_cache"""
+import sqlite3
+import time
+from hecat import url_cache
+
+def result(success, checked_at):
+    """return a check result"""
+    return {'success': success, 'status': 200 if success else 404, 'message': 'OK' if success else 'Not Found', 'latency': 0.1, 'checked_at': checked_at}
+
+def test_results_are_recorded(tmp_path):
+    """recorded results are returned by get() after reopening the cache"""
+    cache = url_cache.UrlCache(str(tmp_path / 'cache' / 'urls.sqlite'))
+    cache.record('https://example.org/', result(True, 1000))
+    cache.record('https://example.org/missing', result(False, 2000))
+    cache.record_head_unsupported_host('example.org')
+    cache.close()
+    cache = url_cache.UrlCache(str(tmp_path / 'cache' / 'urls.sqlite'))
+    cached = cache.get(['https://example.org/', 'https://example.org/missing', 'https://example.com/'])
+    assert cached == {'https://example.org/': result(True, 1000),
+                      'https://example.org/missing': result(False, 2000)}
+    assert cache.head_unsupported_hosts() == {'example.org'}
+    cache.close()
+
+def test_cache_from_another_version_is_discarded(tmp_path):
+    """results recorded by another version of the cache format are discarded"""
+    cache = url_cache.UrlCache(str(tmp_path / 'urls.sqlite'))
+    cache.record('https://example.org/', result(True, 1000))
+    cache.close()
+    connection = sqlite3.connect(str(tmp_path / 'urls.sqlite'))
+    with connection:
+        connection.execute("UPDATE metadata SET value = '1' WHERE key = 'version'")
+    connection.close()
+    cache = url_cache.UrlCache(str(tmp_path / 'urls.sqlite'))
+    assert cache.get(['https://example.org/']) == {}
+    cache.close()
+
+def test_freshness_depends_on_success():
+    """errors expire after error_ttl_days, successes after success_ttl_days"""
+    now = time.time()
+    assert url_cache.is_fresh(result(True, now - 2 * 86400), now, 7, 1)
+    assert not url_cache.is_fresh(result(False, now - 2 * 86400), now, 7, 1)
+    assert not url_cache.is_fresh(result(True, now), now, 0, 0)
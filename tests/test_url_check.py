@@ -0,0 +1,124 @@
+"""unit tests for hecat.processors.url_check"""
+import time
+import pytest
+import requests
+from hecat.processors import url_check
+
+def test_select_urls_checks_stalest_first():
+    """URLs never checked come first, then the oldest results, fresh results are not checked again"""
+    now = time.time()
+    cached = {'https://b.org/': {'success': True, 'checked_at': now - 10 * 86400},
+              'https://c.org/': {'success': True, 'checked_at': now - 20 * 86400},
+              'https://d.org/': {'success': True, 'checked_at': now - 86400},
+              'https://e.org/': {'success': False, 'checked_at': now - 2 * 86400}}
+    urls = ['https://b.org/', 'https://c.org/', 'https://d.org/', 'https://e.org/', 'https://a.org/']
+    assert url_check.select_urls(urls, cached, 7, 1) == (['https://a.org/', 'https://c.org/', 'https://b.org/', 'https://e.org/'], [])
+    assert url_check.select_urls(urls, cached, 7, 1, max_checks=2) == (['https://a.org/', 'https://c.org/'], ['https://b.org/', 'https://e.org/'])
+
+@pytest.mark.parametrize('option', ['cache_success_ttl_days', 'cache_error_ttl_days'])
+@pytest.mark.parametrize('value', [-1, '7', True])
+def test_invalid_ttl_is_refused(option, value):
+    """cache TTLs must be numbers >= 0"""
+    step = {'name': 'check URLs', 'module': 'processors/url_check', 'module_options': {option: value}}
+    with pytest.raises(SystemExit):
+        url_check.check_urls(step)
+
+@pytest.mark.parametrize('url, normalized', [
+    ('HTTPS://Example.ORG', 'https://example.org/'),
+    ('https://example.org:443/path?q=1#section', 'https://example.org/path?q=1'),
+    ('http://example.org:8080/Path', 'http://example.org:8080/Path'),
+    ('  https://user@Example.org/  ', 'https://user@example.org/'),
+    ('http://[::1]:80/', 'http://[::1]/'),
+    ('ftp://Example.org/file', 'ftp://Example.org/file'),
+    ('https://example.org:bad/', 'https://example.org:bad/'),
+])
+def test_normalize_url(url, normalized):
+    """scheme and host are lowercased, default ports and fragments removed, other URLs are kept as is"""
+    assert url_check.normalize_url(url) == normalized
+
+def test_frontier_deduplicates_normalized_urls(tmp_path):
+    """equivalent URLs are checked once, all items referencing them are reported"""
+    (tmp_path / 'data.yml').write_text('- title: a\n  url: https://Example.org\n- title: b\n  url: https://example.org/#top\n'
+                                       '- title: c\n  url: https://example.org/skip\n', encoding='utf-8')
+    step = {'module_options': {'source_directories': [], 'source_files': [str(tmp_path / 'data.yml')], 'check_keys': ['url'],
+                               'exclude_regex': ['/skip$']}}
+    frontier, skipped_count, item_count = url_check.build_frontier(step)
+    assert frontier == {'https://example.org/': [('a', 'url', 'https://Example.org'), ('b', 'url', 'https://example.org/#top')]}
+    assert (skipped_count, item_count) == (1, 3)
+
+class Response: # pylint: disable=too-few-public-methods
+    """response with headers only"""
+    def __init__(self, headers):
+        self.headers = headers
+
+@pytest.mark.parametrize('method, headers, drained', [
+    ('HEAD', {}, True),
+    ('GET', {'Content-Length': '0'}, True),
+    ('GET', {'Content-Length': str(url_check.DRAIN_MAX_SIZE)}, True),
+    ('GET', {'Content-Length': str(url_check.DRAIN_MAX_SIZE + 1)}, False),
+    ('GET', {}, False),
+    ('GET', {'Content-Length': 'invalid'}, False),
+])
+def test_only_small_bodies_are_drained(method, headers, drained):
+    """bodies are read to reuse the connection for HEAD and small GET responses only"""
+    assert url_check.can_drain(method, Response(headers)) == drained
+
+@pytest.mark.parametrize('value, seconds', [
+    (None, None),
+    ('120', 120),
+    ('-5', 0),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', 0),
+    ('soon', None),
+])
+def test_parse_retry_after(value, seconds):
+    """Retry-After is a number of seconds or an HTTP date, past dates mean no wait"""
+    assert url_check.parse_retry_after(value) == seconds
+
+def check_result(success=True, rate_limited=False):
+    """return the result of a check"""
+    return {'success': success, 'status': 429 if rate_limited else 200, 'message': 'HTTP 200', 'latency': 0, 'checked_at': 0,
+            'head_unsupported': False, 'rate_limited': rate_limited, 'retry_after': 0 if rate_limited else None}
+
+def test_hosts_are_checked_in_turn():
+    """URLs are taken from each host in turn instead of in list order"""
+    order = []
+    def check_url(url, wait_for_host):
+        order.append(url)
+        return check_result()
+    urls = ['https://a.org/1', 'https://a.org/2', 'https://a.org/3', 'https://b.org/1', 'https://c.org/1']
+    results = url_check.check_urls_concurrently(urls, check_url, max_workers=1, max_per_host=1)
+    assert order == ['https://a.org/1', 'https://b.org/1', 'https://c.org/1', 'https://a.org/2', 'https://a.org/3']
+    assert set(results) == set(urls)
+
+def test_host_delay_applies_to_each_request():
+    """requests to the same host, including a second request for the same URL (HEAD then GET), are host_delay apart"""
+    starts = []
+    def check_url(url, wait_for_host):
+        starts.append(time.monotonic())
+        wait_for_host(url_check.url_host(url))
+        starts.append(time.monotonic())
+        return check_result()
+    url_check.check_urls_concurrently(['https://a.org/1', 'https://a.org/2'], check_url, max_workers=4, max_per_host=2, host_delay=0.05)
+    starts.sort()
+    assert all(later - earlier >= 0.045 for earlier, later in zip(starts, starts[1:]))
+
+def test_rate_limited_urls_are_retried():
+    """a URL answered with HTTP 429 is checked again, up to rate_limit_retries times"""
+    calls = []
+    def check_url(url, wait_for_host):
+        calls.append(url)
+        return check_result(rate_limited=len(calls) == 1)
+    results = url_check.check_urls_concurrently(['https://a.org/'], check_url, rate_limit_retries=1)
+    assert calls == ['https://a.org/', 'https://a.org/'] and results['https://a.org/']['success']
+    results = url_check.check_urls_concurrently(['https://a.org/'], lambda url, wait_for_host: check_result(rate_limited=True), rate_limit_retries=0)
+    assert results['https://a.org/']['rate_limited']
+
+@pytest.mark.parametrize('exception', [requests.exceptions.ChunkedEncodingError, requests.exceptions.InvalidURL,
+                                       requests.exceptions.MissingSchema, requests.exceptions.InvalidSchema])
+def test_request_errors_are_reported_as_failures(monkeypatch, exception):
+    """any requests error is reported as a failed check instead of stopping the check of other URLs"""
+    def request(method, url, **kwargs):
+        raise exception('broken')
+    monkeypatch.setattr(url_check.http_client, 'request', request)
+    result = url_check.check_return_code('https://example.org/')
+    assert not result['success'] and result['status'] is None and result['message'] == 'broken'
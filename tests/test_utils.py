@@ -0,0 +1,183 @@
+"""unit tests for hecat.utils"""
+import os
+import pytest
+from hecat import utils, dataset
+
+@pytest.fixture
+def cache_directory(tmp_path, monkeypatch):
+    """enable the YAML cache in a temporary directory"""
+    directory = tmp_path / 'cache'
+    monkeypatch.setitem(utils.LOAD_OPTIONS, 'cache_directory', str(directory))
+    return directory
+
+def write_items(directory, count):
+    """write count YAML files containing one item each"""
+    directory.mkdir()
+    for index in range(count):
+        (directory / '{:03d}.yml'.format(index)).write_text('name: item {}\n'.format(index), encoding='utf-8')
+
+def test_directory_is_cached_in_a_single_file(tmp_path, cache_directory):
+    """loading a directory writes one cache file, reused while files are unchanged"""
+    write_items(tmp_path / 'software', 5)
+    data = utils.load_yaml_data(str(tmp_path / 'software'), read_only=True)
+    assert [item['name'] for item in data] == ['item {}'.format(index) for index in range(5)]
+    assert len(os.listdir(cache_directory)) == 1
+    (tmp_path / 'software' / '002.yml').write_text('name: changed\n', encoding='utf-8')
+    data = utils.load_yaml_data(str(tmp_path / 'software'), read_only=True)
+    assert data[2]['name'] == 'changed'
+
+def test_small_files_loaded_on_their_own_are_not_cached(tmp_path, cache_directory):
+    """loading files one by one (processors/awesome_lint) does not create one cache file per file"""
+    write_items(tmp_path / 'software', 5)
+    for name in sorted(os.listdir(tmp_path / 'software')):
+        utils.load_yaml_data(str(tmp_path / 'software' / name), read_only=True)
+    assert not cache_directory.exists()
+
+def test_large_files_are_cached(tmp_path, cache_directory, monkeypatch):
+    """data files larger than CACHE_MIN_FILE_SIZE get their own cache file"""
+    monkeypatch.setattr(utils, 'CACHE_MIN_FILE_SIZE', 10)
+    (tmp_path / 'data.yml').write_text('- id: 1\n  title: first\n- id: 2\n  title: second\n', encoding='utf-8')
+    assert len(utils.load_yaml_data(str(tmp_path / 'data.yml'))) == 2
+    assert len(os.listdir(cache_directory)) == 1
+
+def write_data(path, items):
+    """write a list of items to a YAML data file"""
+    utils.write_yaml_file(str(path), items)
+
+def test_journal_is_replayed_on_load(tmp_path):
+    """changes recorded with checkpoint: journal are applied when the data file is loaded again"""
+    data_file = tmp_path / 'shaarli.yml'
+    write_data(data_file, [{'id': 1, 'title': 'one'}, {'id': 2, 'title': 'two'}])
+    step = {'module_options': {'data_file': str(data_file), 'checkpoint': 'journal'}}
+    items = utils.load_yaml_data(str(data_file))
+    items[1]['video_downloaded'] = True
+    utils.checkpoint_item(step, items, items[1])
+    assert (tmp_path / 'shaarli.yml.journal').exists()
+    reloaded = utils.load_yaml_data(str(data_file))
+    assert reloaded[1]['video_downloaded'] is True
+    assert [item['id'] for item in utils.iter_yaml_items(str(data_file))] == [1, 2]
+    assert list(utils.iter_yaml_items(str(data_file)))[1]['video_downloaded'] is True
+    utils.flush_checkpoints(step, reloaded)
+    assert not (tmp_path / 'shaarli.yml.journal').exists()
+    assert utils.load_yaml_data(str(data_file))[1]['video_downloaded'] is True
+
+def test_journal_is_compacted(tmp_path):
+    """the data file is rewritten and the journal removed after journal_compact_every changes"""
+    data_file = tmp_path / 'shaarli.yml'
+    write_data(data_file, [{'id': index} for index in range(3)])
+    step = {'module_options': {'data_file': str(data_file), 'checkpoint': 'journal', 'journal_compact_every': 2}}
+    items = utils.load_yaml_data(str(data_file))
+    for item in items[:2]:
+        item['archived'] = True
+        utils.checkpoint_item(step, items, item)
+    assert not (tmp_path / 'shaarli.yml.journal').exists()
+    assert [item.get('archived') for item in utils.load_yaml_file(str(data_file))] == [True, True, None]
+
+def test_incomplete_journal_line_is_ignored(tmp_path):
+    """a journal line truncated by an interrupted run is skipped"""
+    data_file = tmp_path / 'shaarli.yml'
+    write_data(data_file, [{'id': 1, 'title': 'one'}])
+    (tmp_path / 'shaarli.yml.journal').write_text('{"id": 1, "item": {"id": 1, "title": "new"}}\n{"id": 1, "it', encoding='utf-8')
+    assert utils.load_yaml_data(str(data_file))[0]['title'] == 'new'
+
+def test_shaarli_import_discards_stale_journal(tmp_path):
+    """importing data from scratch removes the journal of the previous data file"""
+    from hecat.importers.shaarli_api import import_shaarli_json # pylint: disable=import-outside-toplevel
+    data_file = tmp_path / 'shaarli.yml'
+    write_data(data_file, [{'id': 1, 'url': 'https://example.org/', 'title': 'old', 'created': '2020'}])
+    (tmp_path / 'shaarli.yml.journal').write_text('{"id": 1, "item": {"id": 1, "title": "journaled"}}\n', encoding='utf-8')
+    (tmp_path / 'shaarli.json').write_text('[{"id": 1, "url": "https://example.org/", "title": "new", "created": "2021"}]', encoding='utf-8')
+    import_shaarli_json({'module_options': {'source_file': str(tmp_path / 'shaarli.json'), 'output_file': str(data_file), 'skip_existing': False}})
+    assert not (tmp_path / 'shaarli.yml.journal').exists()
+    assert utils.load_yaml_data(str(data_file))[0]['title'] == 'new'
+
+def test_sharded_directory_keeps_list_order(tmp_path):
+    """items of a sharded directory are loaded in the order they were written, not in shard/id order"""
+    directory = tmp_path / 'shaarli.d'
+    directory.mkdir()
+    items = [{'id': item_id, 'title': str(item_id)} for item_id in [2500, 7, 1200, 3, 2400]]
+    utils.write_data_shards(str(directory), items, shard_size=1000)
+    assert sorted(os.listdir(directory)) == ['00000000.yml', '00000001.yml', '00000002.yml']
+    assert [item['id'] for item in utils.load_yaml_data(str(directory))] == [2500, 7, 1200, 3, 2400]
+    assert [item['id'] for item in utils.iter_yaml_items(str(directory))] == [2500, 7, 1200, 3, 2400]
+
+def test_sharded_checkpoint_rewrites_one_shard(tmp_path):
+    """an updated item only rewrites its shard, the order of items is unchanged"""
+    directory = tmp_path / 'shaarli.d'
+    directory.mkdir()
+    utils.write_data_shards(str(directory), [{'id': 1500}, {'id': 10}, {'id': 20}], shard_size=1000)
+    first_shard_mtime = os.stat(directory / '00000001.yml').st_mtime_ns
+    items = utils.load_yaml_data(str(directory))
+    items[2]['archived'] = True
+    utils.checkpoint_item({'module_options': {'data_file': str(directory), 'shard_size': 1000}}, items, items[2])
+    assert os.stat(directory / '00000001.yml').st_mtime_ns == first_shard_mtime
+    reloaded = utils.load_yaml_data(str(directory))
+    assert [item['id'] for item in reloaded] == [1500, 10, 20]
+    assert reloaded[2]['archived'] is True
+
+def test_sharded_checkpoints_compute_shards_once(tmp_path, monkeypatch):
+    """successive checkpoints of the same list of items do not compute the shard of every item again"""
+    directory = tmp_path / 'shaarli.d'
+    directory.mkdir()
+    utils.write_data_shards(str(directory), [{'id': index} for index in range(30)], shard_size=10)
+    items = utils.load_yaml_data(str(directory))
+    step = {'module_options': {'data_file': str(directory), 'shard_size': 10}}
+    calls = []
+    shard_file_name = utils.shard_file_name
+    monkeypatch.setattr(utils, 'shard_file_name', lambda item, shard_size: calls.append(item) or shard_file_name(item, shard_size))
+    for item in items:
+        item['archived'] = True
+        utils.checkpoint_item(step, items, item)
+    assert len(calls) == 2 * len(items)
+    assert all(item['archived'] for item in utils.load_yaml_data(str(directory)))
+
+def test_items_missing_from_order_file_come_last(tmp_path):
+    """items added to shards by hand are kept, after the items of the order file"""
+    directory = tmp_path / 'shaarli.d'
+    directory.mkdir()
+    utils.write_data_shards(str(directory), [{'id': 5}, {'id': 1}], shard_size=1000)
+    write_data(directory / '00000000.yml', [{'id': 1}, {'id': 3}, {'id': 5}])
+    assert [item['id'] for item in utils.load_yaml_data(str(directory))] == [5, 1, 3]
+
+def test_count_does_not_parse_mapping_files(tmp_path, monkeypatch):
+    """files containing a single mapping are counted as one item without being parsed"""
+    write_items(tmp_path / 'software', 3)
+    (tmp_path / 'data.yml').write_text('# comment\n- id: 1\n- id: 2\n', encoding='utf-8')
+    def fail(path):
+        raise AssertionError('{} was parsed'.format(path))
+    monkeypatch.setattr(utils, 'iter_yaml_file_items', fail)
+    assert utils.count_yaml_items(str(tmp_path / 'software')) == 3
+    assert utils.count_yaml_items(str(tmp_path / 'data.yml')) == 2
+
+def test_count_parses_flow_sequences(tmp_path):
+    """flow sequences can not be split line by line, they are parsed"""
+    (tmp_path / 'data.yml').write_text('[{id: 1}, {id: 2}, {id: 3}]\n', encoding='utf-8')
+    assert utils.count_yaml_items(str(tmp_path / 'data.yml')) == 3
+
+def test_iter_streams_cached_directories(tmp_path, cache_directory, monkeypatch):
+    """streaming a directory does not load the whole directory from the cache"""
+    write_items(tmp_path / 'software', 3)
+    utils.load_yaml_data(str(tmp_path / 'software'), read_only=True)
+    monkeypatch.setattr(utils, 'load_yaml_data', lambda *args, **kwargs: pytest.fail('whole directory loaded'))
+    assert [item['name'] for item in utils.iter_yaml_items(str(tmp_path / 'software'))] == ['item 0', 'item 1', 'item 2']
+
+def test_iter_uses_shared_dataset(tmp_path, monkeypatch):
+    """streaming data already loaded by a previous step does not parse it again"""
+    monkeypatch.setitem(dataset.DATASET, 'current', dataset.Dataset())
+    monkeypatch.setattr(utils, 'CACHE_MIN_FILE_SIZE', 10)
+    write_data(tmp_path / 'data.yml', [{'id': 1}, {'id': 2}])
+    utils.load_yaml_data(str(tmp_path / 'data.yml'))
+    def fail(path):
+        raise AssertionError('{} was parsed'.format(path))
+    monkeypatch.setattr(utils, 'iter_yaml_file_items', fail)
+    assert [item['id'] for item in utils.iter_yaml_items(str(tmp_path / 'data.yml'), use_shared_data=True)] == [1, 2]
+
+def test_only_directories_and_large_files_are_shared(tmp_path, monkeypatch):
+    """files loaded one by one are not kept in the shared dataset"""
+    monkeypatch.setitem(dataset.DATASET, 'current', dataset.Dataset())
+    write_items(tmp_path / 'software', 2)
+    for name in sorted(os.listdir(tmp_path / 'software')):
+        utils.load_yaml_data(str(tmp_path / 'software' / name), read_only=True)
+    assert not dataset.current().entries
+    utils.load_yaml_data(str(tmp_path / 'software'), read_only=True)
+    assert dataset.current().has(str(tmp_path / 'software'), read_only=True)
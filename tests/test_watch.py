@@ -0,0 +1,40 @@
+"""unit tests for hecat.watch"""
+from hecat import watch
+
+def test_changed_files():
+    """added, modified and removed files are reported"""
+    before = {'a': (1, 1), 'b': (1, 1), 'c': (1, 1)}
+    after = {'a': (1, 1), 'b': (2, 1), 'd': (1, 1)}
+    assert watch.changed_files(before, after) == ['b', 'c', 'd']
+
+def test_snapshot_ignores_files_written_by_hecat(tmp_path):
+    """the state file, hidden/temporary files and outputs are not watched"""
+    for name in ('a.yml', '.hecat-state.json', 'state.json', 'b.yml.tmp', 'out/page.md', '.git/index'):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text('x', encoding='utf-8')
+    signatures = watch.snapshot([str(tmp_path)], [str(tmp_path / 'out')], {str(tmp_path / 'state.json')})
+    assert list(signatures) == [str(tmp_path / 'a.yml')]
+
+def test_watch_runs_steps_once_per_change(tmp_path, monkeypatch):
+    """an edit triggers one run, files written by the run itself do not trigger another one"""
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'a.yml').write_text('name: a\n', encoding='utf-8')
+    state_file = tmp_path / 'data' / 'state.json'
+    steps = [{'name': 'export', 'module': 'exporters/sqlite_catalog',
+              'module_options': {'source_directory': str(tmp_path / 'data'), 'output_file': str(tmp_path / 'catalog.sqlite')}}]
+    runs = []
+    def run_steps(steps):
+        runs.append(steps)
+        state_file.write_text(str(len(runs)), encoding='utf-8')
+        (tmp_path / 'data' / '.hecat-cache').mkdir(exist_ok=True)
+        (tmp_path / 'data' / '.hecat-cache' / 'cache.pickle').write_text(str(len(runs)), encoding='utf-8')
+    sleeps = []
+    def sleep(interval):
+        sleeps.append(interval)
+        if len(sleeps) == 2:
+            (tmp_path / 'data' / 'a.yml').write_text('name: changed\n', encoding='utf-8')
+        if len(sleeps) == 10:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(watch.time, 'sleep', sleep)
+    watch.watch(steps, run_steps, interval=0, ignored=[str(state_file)])
+    assert len(runs) == 1